@@ -0,0 +1,89 @@
+"""Add event archive segments and spool archive states
+
+Revision ID: a9c3e5f7b1d2
+Revises: f2b8d6e1a4c7
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a9c3e5f7b1d2'
+down_revision: Union[str, Sequence[str], None] = 'f2b8d6e1a4c7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'event_archive_segments',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('kind', sa.String(length=50), nullable=False),
+        sa.Column('file_name', sa.String(length=255), nullable=False),
+        sa.Column('cutoff_at', sa.DateTime(), nullable=False),
+        sa.Column('min_event_at', sa.DateTime(), nullable=False),
+        sa.Column('max_event_at', sa.DateTime(), nullable=False),
+        sa.Column('event_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('byte_size', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('created_at', sa.DateTime(), nullable=False, server_default=sa.func.now()),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('file_name'),
+    )
+    op.create_index(
+        'ix_event_archive_segments_kind_cutoff',
+        'event_archive_segments',
+        ['kind', 'cutoff_at'],
+    )
+    op.create_table(
+        'event_archive_segment_owners',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('segment_id', sa.Integer(), nullable=False),
+        sa.Column('owner_id', sa.Integer(), nullable=False),
+        sa.Column('event_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('min_event_at', sa.DateTime(), nullable=False),
+        sa.Column('max_event_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['segment_id'], ['event_archive_segments.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index(
+        'ix_event_archive_segment_owners_owner',
+        'event_archive_segment_owners',
+        ['owner_id', 'segment_id'],
+    )
+    op.create_table(
+        'spool_archive_states',
+        sa.Column('spool_id', sa.Integer(), nullable=False),
+        sa.Column('archived_until', sa.DateTime(), nullable=False),
+        sa.Column('last_event_id', sa.Integer(), nullable=False),
+        sa.Column('last_event_at', sa.DateTime(), nullable=False),
+        sa.Column('event_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('tara_g', sa.Float(), nullable=True),
+        sa.Column('remaining_weight_g', sa.Float(), nullable=True),
+        sa.Column('last_plausible_remaining_g', sa.Float(), nullable=True),
+        sa.Column('blocked_event_id', sa.Integer(), nullable=True),
+        sa.Column('rollup_remaining_g', sa.Float(), nullable=True),
+        sa.Column('location_id', sa.Integer(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=False, server_default=sa.func.now()),
+        sa.ForeignKeyConstraint(['spool_id'], ['spools.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('spool_id'),
+    )
+    op.create_index(
+        'ix_printer_slot_events_printer_event_at',
+        'printer_slot_events',
+        ['printer_id', 'event_at', 'id'],
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_printer_slot_events_printer_event_at', table_name='printer_slot_events')
+    op.drop_table('spool_archive_states')
+    op.drop_index('ix_event_archive_segment_owners_owner', table_name='event_archive_segment_owners')
+    op.drop_table('event_archive_segment_owners')
+    op.drop_index('ix_event_archive_segments_kind_cutoff', table_name='event_archive_segments')
+    op.drop_table('event_archive_segments')
@@ -0,0 +1,99 @@
+"""Use a non-null location sentinel in spool_consumption_daily
+
+Revision ID: b4d7f1a3c8e6
+Revises: a9c3e5f7b1d2
+Create Date: 2026-10-19 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b4d7f1a3c8e6'
+down_revision: Union[str, Sequence[str], None] = 'a9c3e5f7b1d2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Names the unnamed foreign key of SQLite so batch mode can drop it
+NAMING_CONVENTION = {"fk": "fk_%(table_name)s_%(column_0_name)s_%(referred_table_name)s"}
+LOCATION_FK = 'fk_spool_consumption_daily_location_id_locations'
+
+rollup = sa.table(
+    'spool_consumption_daily',
+    sa.column('day', sa.Date()),
+    sa.column('filament_id', sa.Integer()),
+    sa.column('location_id', sa.Integer()),
+    sa.column('consumed_g', sa.Float()),
+    sa.column('event_count', sa.Integer()),
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+
+    # NULLs were distinct in the unique key: merge the repeated rows
+    merged = bind.execute(
+        sa.select(
+            rollup.c.day,
+            rollup.c.filament_id,
+            sa.func.sum(rollup.c.consumed_g),
+            sa.func.sum(rollup.c.event_count),
+        )
+        .where(rollup.c.location_id.is_(None))
+        .group_by(rollup.c.day, rollup.c.filament_id)
+    ).all()
+    bind.execute(sa.delete(rollup).where(rollup.c.location_id.is_(None)))
+
+    fk_name = next(
+        (
+            fk['name']
+            for fk in sa.inspect(bind).get_foreign_keys('spool_consumption_daily')
+            if fk['constrained_columns'] == ['location_id']
+        ),
+        None,
+    )
+    with op.batch_alter_table('spool_consumption_daily', naming_convention=NAMING_CONVENTION) as batch_op:
+        batch_op.drop_constraint(fk_name or LOCATION_FK, type_='foreignkey')
+        batch_op.alter_column(
+            'location_id',
+            existing_type=sa.Integer(),
+            nullable=False,
+            server_default='0',
+        )
+
+    if merged:
+        op.bulk_insert(rollup, [
+            {'day': day, 'filament_id': filament_id, 'location_id': 0, 'consumed_g': consumed_g, 'event_count': event_count}
+            for day, filament_id, consumed_g, event_count in merged
+        ])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('spool_consumption_daily') as batch_op:
+        batch_op.alter_column(
+            'location_id',
+            existing_type=sa.Integer(),
+            nullable=True,
+            server_default=None,
+        )
+
+    locations = sa.table('locations', sa.column('id', sa.Integer()))
+    op.execute(
+        sa.update(rollup)
+        .where(sa.or_(rollup.c.location_id == 0, rollup.c.location_id.not_in(sa.select(locations.c.id))))
+        .values(location_id=None)
+    )
+
+    with op.batch_alter_table('spool_consumption_daily') as batch_op:
+        batch_op.create_foreign_key(
+            LOCATION_FK,
+            'locations',
+            ['location_id'],
+            ['id'],
+            ondelete='SET NULL',
+        )
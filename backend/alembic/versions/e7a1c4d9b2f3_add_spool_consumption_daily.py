@@ -0,0 +1,47 @@
+"""Add spool_consumption_daily rollup table
+
+Revision ID: e7a1c4d9b2f3
+Revises: c5d8f74c07af
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7a1c4d9b2f3'
+down_revision: Union[str, Sequence[str], None] = 'c5d8f74c07af'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'spool_consumption_daily',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('filament_id', sa.Integer(), nullable=False),
+        sa.Column('location_id', sa.Integer(), nullable=True),
+        sa.Column('consumed_g', sa.Float(), nullable=False, server_default='0'),
+        sa.Column('event_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('updated_at', sa.DateTime(), nullable=False, server_default=sa.func.now()),
+        sa.ForeignKeyConstraint(['filament_id'], ['filaments.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['location_id'], ['locations.id'], ondelete='SET NULL'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('day', 'filament_id', 'location_id', name='uq_spool_consumption_daily_key'),
+    )
+    op.create_index(
+        'ix_spool_consumption_daily_filament_day',
+        'spool_consumption_daily',
+        ['filament_id', 'day'],
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_spool_consumption_daily_filament_day', table_name='spool_consumption_daily')
+    op.drop_table('spool_consumption_daily')
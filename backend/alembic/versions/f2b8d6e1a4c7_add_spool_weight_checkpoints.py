@@ -0,0 +1,53 @@
+"""Add spool_weight_checkpoints and spool_events replay index
+
+Revision ID: f2b8d6e1a4c7
+Revises: e7a1c4d9b2f3
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2b8d6e1a4c7'
+down_revision: Union[str, Sequence[str], None] = 'e7a1c4d9b2f3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        'ix_spool_events_spool_event_at',
+        'spool_events',
+        ['spool_id', 'event_at', 'id'],
+    )
+    op.create_table(
+        'spool_weight_checkpoints',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('spool_id', sa.Integer(), nullable=False),
+        sa.Column('event_id', sa.Integer(), nullable=False),
+        sa.Column('event_at', sa.DateTime(), nullable=False),
+        sa.Column('remaining_weight_g', sa.Float(), nullable=True),
+        sa.Column('tara_g', sa.Float(), nullable=True),
+        sa.Column('events_replayed', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('created_at', sa.DateTime(), nullable=False, server_default=sa.func.now()),
+        sa.ForeignKeyConstraint(['spool_id'], ['spools.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['event_id'], ['spool_events.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index(
+        'ix_spool_weight_checkpoints_spool_event_at',
+        'spool_weight_checkpoints',
+        ['spool_id', 'event_at'],
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_spool_weight_checkpoints_spool_event_at', table_name='spool_weight_checkpoints')
+    op.drop_table('spool_weight_checkpoints')
+    op.drop_index('ix_spool_events_spool_event_at', table_name='spool_events')
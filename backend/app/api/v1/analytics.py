@@ -0,0 +1,262 @@
+from datetime import date, datetime, timedelta
+from typing import Literal
+
+from fastapi import APIRouter, HTTPException, Query, status
+from pydantic import BaseModel
+from sqlalchemy import func, select
+
+from app.api.deps import DBSession, PrincipalDep
+from app.models import Filament, Location, Spool, SpoolConsumptionDaily, SpoolStatus
+from app.models.consumption import NO_LOCATION
+from app.services.runout_forecast_service import runout_forecaster
+
+router = APIRouter(prefix="/analytics", tags=["analytics"])
+
+MAX_RANGE_DAYS = 3 * 366
+
+
+class ConsumptionPoint(BaseModel):
+    period_start: date
+    consumed_g: float
+    event_count: int
+
+
+class ConsumptionSeries(BaseModel):
+    key: str
+    label: str
+    total_g: float
+    points: list[ConsumptionPoint]
+
+
+class ConsumptionSeriesResponse(BaseModel):
+    date_from: date
+    date_to: date
+    bucket: str
+    group_by: str
+    series: list[ConsumptionSeries]
+
+
+class SpoolRunout(BaseModel):
+    spool_id: int
+    filament_id: int
+    remaining_weight_g: float
+    daily_rate_g: float
+    days_to_empty: float | None = None
+
+
+class FilamentRunout(BaseModel):
+    filament_id: int
+    filament_designation: str
+    filament_type: str
+    spool_count: int
+    remaining_weight_g: float
+    daily_rate_g: float
+    days_to_empty: float | None = None
+
+
+class RunoutForecastResponse(BaseModel):
+    spools: list[SpoolRunout]
+    filaments: list[FilamentRunout]
+
+
+def _bucket_start(day: date, bucket: str) -> date:
+    if bucket == "week":
+        return day - timedelta(days=day.weekday())
+    if bucket == "month":
+        return day.replace(day=1)
+    return day
+
+
+def _bucket_starts(date_from: date, date_to: date, bucket: str) -> list[date]:
+    starts: list[date] = []
+    current = _bucket_start(date_from, bucket)
+    while current <= date_to:
+        starts.append(current)
+        if bucket == "week":
+            current += timedelta(days=7)
+        elif bucket == "month":
+            current = (current.replace(day=28) + timedelta(days=4)).replace(day=1)
+        else:
+            current += timedelta(days=1)
+    return starts
+
+
+@router.get("/consumption", response_model=ConsumptionSeriesResponse)
+async def get_consumption_series(
+    db: DBSession,
+    principal: PrincipalDep,
+    date_from: date | None = None,
+    date_to: date | None = None,
+    bucket: Literal["day", "week", "month"] = "day",
+    group_by: Literal["none", "type", "filament", "location"] = "none",
+    filament_id: int | None = None,
+    location_id: int | None = None,
+    type: str | None = Query(None, description="Filament material type, e.g. PETG"),
+):
+    """Consumption time series served from the daily rollup table."""
+    # Rollup days are UTC dates
+    date_to = date_to or datetime.utcnow().date()
+    date_from = date_from or (date_to - timedelta(days=89))
+    if date_from > date_to:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={"code": "validation_error", "message": "date_from must not be after date_to"},
+        )
+    if (date_to - date_from).days > MAX_RANGE_DAYS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={"code": "validation_error", "message": f"Range must not exceed {MAX_RANGE_DAYS} days"},
+        )
+
+    if group_by == "type":
+        key_col = Filament.type
+        label_col = Filament.type
+    elif group_by == "filament":
+        key_col = SpoolConsumptionDaily.filament_id
+        label_col = Filament.designation
+    elif group_by == "location":
+        key_col = func.nullif(SpoolConsumptionDaily.location_id, NO_LOCATION)
+        label_col = Location.name
+    else:
+        key_col = None
+        label_col = None
+
+    columns = [
+        SpoolConsumptionDaily.day,
+        func.sum(SpoolConsumptionDaily.consumed_g),
+        func.sum(SpoolConsumptionDaily.event_count),
+    ]
+    group_cols = [SpoolConsumptionDaily.day]
+    if key_col is not None:
+        columns += [key_col, label_col]
+        group_cols += [key_col, label_col]
+
+    stmt = (
+        select(*columns)
+        .join(Filament, SpoolConsumptionDaily.filament_id == Filament.id)
+        .outerjoin(Location, SpoolConsumptionDaily.location_id == Location.id)
+        .where(SpoolConsumptionDaily.day >= date_from, SpoolConsumptionDaily.day <= date_to)
+        .group_by(*group_cols)
+    )
+    if filament_id is not None:
+        stmt = stmt.where(SpoolConsumptionDaily.filament_id == filament_id)
+    if location_id is not None:
+        stmt = stmt.where(SpoolConsumptionDaily.location_id == location_id)
+    if type:
+        stmt = stmt.where(func.upper(Filament.type) == type.upper())
+
+    result = await db.execute(stmt)
+
+    # Downsample daily rows into the requested buckets
+    buckets: dict[str, dict[date, list[float]]] = {}
+    labels: dict[str, str] = {}
+    for row in result.all():
+        day, consumed, count = row[0], float(row[1] or 0), int(row[2] or 0)
+        if key_col is not None:
+            key = "none" if row[3] is None else str(row[3])
+            labels[key] = row[4] or ("Unzugewiesen" if group_by == "location" else key)
+        else:
+            key = "all"
+            labels[key] = "All"
+        entry = buckets.setdefault(key, {}).setdefault(_bucket_start(day, bucket), [0.0, 0])
+        entry[0] += consumed
+        entry[1] += count
+
+    starts = _bucket_starts(date_from, date_to, bucket)
+    series: list[ConsumptionSeries] = []
+    for key, per_bucket in buckets.items():
+        points = [
+            ConsumptionPoint(
+                period_start=start,
+                consumed_g=round(per_bucket.get(start, [0.0, 0])[0], 2),
+                event_count=int(per_bucket.get(start, [0.0, 0])[1]),
+            )
+            for start in starts
+        ]
+        series.append(ConsumptionSeries(
+            key=key,
+            label=labels[key],
+            total_g=round(sum(p.consumed_g for p in points), 2),
+            points=points,
+        ))
+    series.sort(key=lambda s: s.total_g, reverse=True)
+
+    return ConsumptionSeriesResponse(
+        date_from=date_from,
+        date_to=date_to,
+        bucket=bucket,
+        group_by=group_by,
+        series=series,
+    )
+
+
+@router.get("/runout", response_model=RunoutForecastResponse)
+async def get_runout_forecast(
+    db: DBSession,
+    principal: PrincipalDep,
+    filament_id: int | None = None,
+):
+    """Projected days until empty per spool and per filament.
+
+    Spools/filaments without recent consumption have no days_to_empty and
+    are listed last.
+    """
+    stmt = (
+        select(Spool.id, Spool.filament_id, Spool.remaining_weight_g)
+        .join(SpoolStatus, Spool.status_id == SpoolStatus.id)
+        .where(Spool.deleted_at.is_(None))
+        .where(SpoolStatus.key != "archived")
+        .where(Spool.remaining_weight_g.isnot(None))
+        .where(Spool.remaining_weight_g > 0)
+    )
+    if filament_id is not None:
+        stmt = stmt.where(Spool.filament_id == filament_id)
+    rows = (await db.execute(stmt)).all()
+
+    await runout_forecaster.ensure_loaded(db)
+    spool_forecasts = runout_forecaster.forecast_spools(
+        (row[0], row[1], float(row[2])) for row in rows
+    )
+    filament_forecasts = runout_forecaster.forecast_filaments(spool_forecasts)
+
+    filament_info: dict[int, tuple[str, str]] = {}
+    filament_ids = [f.filament_id for f in filament_forecasts]
+    if filament_ids:
+        filament_rows = await db.execute(
+            select(Filament.id, Filament.designation, Filament.type).where(Filament.id.in_(filament_ids))
+        )
+        filament_info = {row[0]: (row[1], row[2]) for row in filament_rows.all()}
+
+    def sort_key(item):
+        return (item.days_to_empty is None, item.days_to_empty or 0, item.remaining_weight_g)
+
+    spools = sorted(
+        (
+            SpoolRunout(
+                spool_id=f.spool_id,
+                filament_id=f.filament_id,
+                remaining_weight_g=f.remaining_weight_g,
+                daily_rate_g=round(f.daily_rate_g, 2),
+                days_to_empty=round(f.days_to_empty, 1) if f.days_to_empty is not None else None,
+            )
+            for f in spool_forecasts
+        ),
+        key=sort_key,
+    )
+    filaments = sorted(
+        (
+            FilamentRunout(
+                filament_id=f.filament_id,
+                filament_designation=filament_info.get(f.filament_id, ("", ""))[0],
+                filament_type=filament_info.get(f.filament_id, ("", ""))[1],
+                spool_count=f.spool_count,
+                remaining_weight_g=round(f.remaining_weight_g, 2),
+                daily_rate_g=round(f.daily_rate_g, 2),
+                days_to_empty=round(f.days_to_empty, 1) if f.days_to_empty is not None else None,
+            )
+            for f in filament_forecasts
+        ),
+        key=sort_key,
+    )
+
+    return RunoutForecastResponse(spools=spools, filaments=filaments)
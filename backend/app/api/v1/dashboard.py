@@ -5,10 +5,12 @@ from sqlalchemy import func, select, desc
 from pydantic import BaseModel
 
 from app.api.deps import DBSession, PrincipalDep
+from app.core.config import settings
 from app.models import Filament, Location, Manufacturer, Spool, SpoolStatus
 from app.models.spool import SpoolEvent
 from app.models.printer import Printer
 from app.models.filament import Color, FilamentColor
+from app.services.runout_forecast_service import runout_forecaster
 
 router = APIRouter(prefix="/dashboard", tags=["dashboard"])
 
@@ -44,6 +46,8 @@ class LowStockSpool(BaseModel):
     manufacturer_name: str
     remaining_weight_g: float
     low_weight_threshold_g: int
+    daily_rate_g: float | None = None
+    days_to_empty: float | None = None
 
 
 class EmptySpool(BaseModel):
@@ -184,7 +188,8 @@ async def get_dashboard_stats(
         for row in non_empty_result.all()
     ]
 
-    # Spulen mit fast-leeren Restgewicht (remaining_weight_g > 0 AND remaining_weight_g <= low_weight_threshold_g)
+    # Spulen, die laut Verbrauchsprognose innerhalb des Horizonts leer laufen.
+    # Ohne Verbrauch in den letzten Wochen greift weiterhin low_weight_threshold_g.
     low_stock_stmt = (
         select(
             Spool.id.label("spool_id"),
@@ -193,6 +198,7 @@ async def get_dashboard_stats(
             Manufacturer.name.label("manufacturer_name"),
             Spool.remaining_weight_g,
             Spool.low_weight_threshold_g,
+            Spool.filament_id,
         )
         .join(Filament, Spool.filament_id == Filament.id)
         .join(Manufacturer, Filament.manufacturer_id == Manufacturer.id)
@@ -201,22 +207,37 @@ async def get_dashboard_stats(
         .where(SpoolStatus.key != "archived")
         .where(Spool.remaining_weight_g.isnot(None))
         .where(Spool.remaining_weight_g > 0)
-        .where(Spool.remaining_weight_g <= Spool.low_weight_threshold_g)
-        .order_by(Spool.remaining_weight_g.asc())
-        .limit(limit)
     )
-    low_stock_result = await db.execute(low_stock_stmt)
-    low_stock_spools = [
-        LowStockSpool(
+    low_stock_rows = (await db.execute(low_stock_stmt)).all()
+    await runout_forecaster.ensure_loaded(db)
+    forecasts = runout_forecaster.forecast_spools(
+        (row[0], row[6], float(row[4])) for row in low_stock_rows
+    )
+
+    low_stock_spools = []
+    for row, forecast in zip(low_stock_rows, forecasts):
+        if forecast.days_to_empty is not None:
+            if forecast.days_to_empty > settings.runout_horizon_days:
+                continue
+        elif row[4] > row[5]:
+            continue
+        low_stock_spools.append(LowStockSpool(
             spool_id=row[0],
             filament_designation=row[1],
             filament_type=row[2],
             manufacturer_name=row[3],
             remaining_weight_g=float(row[4]),
             low_weight_threshold_g=int(row[5]),
-        )
-        for row in low_stock_result.all()
-    ]
+            daily_rate_g=round(forecast.daily_rate_g, 2) if forecast.daily_rate_g > 0 else None,
+            days_to_empty=round(forecast.days_to_empty, 1) if forecast.days_to_empty is not None else None,
+        ))
+    # Prognostizierte zuerst (nach Reichweite), danach nach Restgewicht
+    low_stock_spools.sort(key=lambda s: (
+        s.days_to_empty is None,
+        s.days_to_empty if s.days_to_empty is not None else 0,
+        s.remaining_weight_g,
+    ))
+    low_stock_spools = low_stock_spools[:limit]
 
     # Leere Spulen (remaining_weight_g <= 0)
     empty_stmt = (
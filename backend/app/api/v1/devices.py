@@ -5,9 +5,10 @@ from fastapi import APIRouter, Depends, HTTPException, Header, status
 from sqlalchemy import select
 
 from app.api.deps import DBSession
-from app.api.v1.schemas_device import HeartbeatRequest, LocateRequest, LocateResponse, WeighRequest, WeighResponse, WriteTagRequest, WriteTagResponse
+from app.api.v1.schemas_device import HeartbeatRequest, LocateRequest, LocateResponse, WeighBatchRequest, WeighBatchResponse, WeighRequest, WeighResponse, WriteTagRequest, WriteTagResponse
 from app.core.security import Principal, generate_token_secret, hash_password_async
 from app.models import Device, Location, Spool
+from app.services.scale_debouncer import scale_debouncer
 from app.services.spool_service import SpoolService
 
 router = APIRouter(prefix="/devices", tags=["devices"])
@@ -220,7 +221,23 @@ async def weigh_spool(
 
     # Record Measurement
     principal = Principal(auth_type="device", device_id=device.id, scopes=device.scopes)
-    
+
+    if scale_debouncer.enabled:
+        # Settling readings are coalesced, the response carries the provisional value
+        await scale_debouncer.submit(
+            device_id=device.id,
+            spool_id=spool.id,
+            measured_weight_g=data.measured_weight_g,
+            principal=principal,
+            note=f"Recorded by device {device.name}",
+        )
+        remaining = service.remaining_after_measurement(spool, data.measured_weight_g)
+        return WeighResponse(
+            remaining_weight_g=remaining if remaining is not None else 0.0,
+            spool_id=spool.id,
+            filament_name=spool.filament.designation if spool.filament else None
+        )
+
     event, remaining = await service.record_measurement(
         spool=spool,
         measured_weight_g=data.measured_weight_g,
@@ -237,6 +254,34 @@ async def weigh_spool(
     )
 
 
+@router.post("/scale/weight/batch", response_model=WeighBatchResponse)
+async def weigh_spools_batch(
+    data: WeighBatchRequest,
+    db: DBSession,
+    device: Device = Depends(get_current_device),
+):
+    """Buffered readings of an offline scale, recorded in one transaction."""
+    service = SpoolService(db)
+    principal = Principal(auth_type="device", device_id=device.id, scopes=device.scopes)
+
+    results = await service.record_measurements_batch(
+        [
+            {
+                "rfid_uid": reading.tag_uuid,
+                "spool_id": reading.spool_id,
+                "measured_weight_g": reading.measured_weight_g,
+                "event_at": reading.event_at,
+            }
+            for reading in data.readings
+        ],
+        principal=principal,
+        source="device",
+        note=f"Recorded by device {device.name}",
+    )
+    recorded = sum(1 for r in results if r["status"] == "ok")
+    return WeighBatchResponse(recorded=recorded, failed=len(results) - recorded, results=results)
+
+
 @router.post("/scale/locate", response_model=LocateResponse)
 async def locate_spool(
     data: LocateRequest,
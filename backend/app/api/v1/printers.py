@@ -1,19 +1,24 @@
 import asyncio
+import json
 import logging
 import subprocess
 import tempfile
 import time
+from datetime import datetime
 from pathlib import Path
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
-from fastapi.responses import Response
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import Response, StreamingResponse
 from pydantic import BaseModel
 from sqlalchemy import func, select
 from sqlalchemy.orm import selectinload
 
 from app.api.deps import DBSession, PrincipalDep, RequirePermission
 from app.api.v1.schemas import PaginatedResponse
-from app.models import Filament, FilamentColor, Color, Location, Printer, PrinterAmsUnit, PrinterSlot, PrinterSlotAssignment, Spool
+from app.models import Filament, FilamentColor, Color, Location, Printer, PrinterAmsUnit, PrinterSlot, PrinterSlotAssignment, PrinterSlotEvent, Spool
+from app.services.event_archive_store import PRINTER_SLOT_EVENTS, EventArchiveStore
+from app.services.printer_event_bus import printer_event_bus
+from app.services.printer_state_projection import printer_state_projection
 
 logger = logging.getLogger(__name__)
 
@@ -21,6 +26,8 @@ router = APIRouter(prefix="/printers", tags=["printers"])
 
 _camera_cache: dict[int, tuple[bytes, float]] = {}
 CAMERA_CACHE_TTL = 1
+# Seconds without a message after which the event stream sends a keepalive
+SSE_KEEPALIVE_SECONDS = 15
 
 
 class PrinterCreate(BaseModel):
@@ -81,6 +88,21 @@ class SlotResponse(BaseModel):
         from_attributes = True
 
 
+class SlotEventResponse(BaseModel):
+    id: int
+    printer_id: int
+    slot_id: int
+    event_type: str
+    event_at: datetime
+    spool_id: int | None
+    rfid_uid: str | None
+    external_id: str | None
+    meta: dict | None
+
+    class Config:
+        from_attributes = True
+
+
 class PrinterResponse(BaseModel):
     id: int
     name: str
@@ -141,20 +163,12 @@ class PrinterStatusResponse(BaseModel):
 
 @router.get("/status", response_model=list[PrinterStatusResponse])
 async def get_printers_status(
-    db: DBSession,
     principal: PrincipalDep,
 ):
+    """Live status of all active printers, served from memory (no DB access)."""
     from app.plugins.manager import plugin_manager
 
-    result = await db.execute(
-        select(Printer)
-        .where(Printer.deleted_at.is_(None), Printer.is_active == True)
-        .options(
-            selectinload(Printer.ams_units),
-            selectinload(Printer.slots).selectinload(PrinterSlot.assignment),
-        )
-    )
-    printers = result.scalars().all()
+    printers = await printer_state_projection.active_printers()
     all_status = plugin_manager.get_all_printer_status()
 
     out: list[dict] = []
@@ -290,6 +304,37 @@ async def get_printers_status(
     return out
 
 
+@router.get("/events")
+async def stream_printer_events(
+    request: Request,
+    principal: PrincipalDep,
+):
+    """Server-Sent Events with print_state, slot and spool changes.
+
+    Messages carry only what changed; after a "resync" message the client
+    should reload /printers/status.
+    """
+
+    async def stream():
+        subscription = printer_event_bus.subscribe()
+        try:
+            yield "retry: 5000\n\n"
+            while not await request.is_disconnected():
+                message = await subscription.next(SSE_KEEPALIVE_SECONDS)
+                if message is None:
+                    yield ": keepalive\n\n"
+                    continue
+                yield f"event: {message['type']}\ndata: {json.dumps(message, default=str)}\n\n"
+        finally:
+            printer_event_bus.unsubscribe(subscription)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.get("/{printer_id}/camera")
 async def get_camera_snapshot(
     printer_id: int,
@@ -788,3 +833,36 @@ async def list_slots(
         select(PrinterSlot).where(PrinterSlot.printer_id == printer_id).order_by(PrinterSlot.slot_no)
     )
     return result.scalars().all()
+
+
+@router.get("/{printer_id}/slot-events", response_model=PaginatedResponse[SlotEventResponse])
+async def list_slot_events(
+    printer_id: int,
+    db: DBSession,
+    principal: PrincipalDep,
+    page: int = Query(1, ge=1),
+    page_size: int = Query(50, ge=1, le=200),
+):
+    offset = (page - 1) * page_size
+    result = await db.execute(
+        select(PrinterSlotEvent)
+        .where(PrinterSlotEvent.printer_id == printer_id)
+        .order_by(PrinterSlotEvent.event_at.desc(), PrinterSlotEvent.id.desc())
+        .offset(offset)
+        .limit(page_size)
+    )
+    items = list(result.scalars().all())
+
+    count_result = await db.execute(
+        select(func.count()).select_from(PrinterSlotEvent).where(PrinterSlotEvent.printer_id == printer_id)
+    )
+    live_total = count_result.scalar() or 0
+
+    archive = EventArchiveStore(db)
+    archived_total = await archive.count_events(PRINTER_SLOT_EVENTS, printer_id)
+    if archived_total and len(items) < page_size:
+        items += await archive.page_events(
+            PRINTER_SLOT_EVENTS, printer_id, max(0, offset - live_total), page_size - len(items)
+        )
+
+    return PaginatedResponse(items=items, page=page, page_size=page_size, total=live_total + archived_total)
@@ -1,6 +1,7 @@
 from fastapi import APIRouter
 
 from app.api.v1.admin import router as admin_router
+from app.api.v1.analytics import router as analytics_router
 from app.api.v1.dashboard import router as dashboard_router
 from app.api.v1.devices import router as devices_router
 from app.api.v1.filaments import router, router_colors, router_filaments
@@ -19,6 +20,7 @@ api_router.include_router(router)
 api_router.include_router(router_colors)
 api_router.include_router(router_filaments)
 api_router.include_router(dashboard_router)
+api_router.include_router(analytics_router)
 api_router.include_router(router_locations)
 api_router.include_router(router_spools)
 api_router.include_router(router_spool_measurements)
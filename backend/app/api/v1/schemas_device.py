@@ -1,3 +1,5 @@
+from datetime import datetime
+
 from pydantic import BaseModel, Field
 
 
@@ -13,6 +15,28 @@ class WeighResponse(BaseModel):
     filament_name: str | None
 
 
+class WeighBatchItem(WeighRequest):
+    event_at: datetime | None = None
+
+
+class WeighBatchRequest(BaseModel):
+    readings: list[WeighBatchItem] = Field(..., min_length=1, max_length=1000)
+
+
+class WeighBatchResult(BaseModel):
+    index: int
+    status: str
+    spool_id: int | None = None
+    remaining_weight_g: float | None = None
+    message: str | None = None
+
+
+class WeighBatchResponse(BaseModel):
+    recorded: int
+    failed: int
+    results: list[WeighBatchResult]
+
+
 class LocateRequest(BaseModel):
     spool_id: int | None = None
     spool_tag_uuid: str | None = None
@@ -1,7 +1,7 @@
 from datetime import datetime
 from typing import Any
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 
 class SpoolStatusResponse(BaseModel):
@@ -167,3 +167,31 @@ class DeviceMeasurementRequest(BaseModel):
     external_id: str | None = None
     measured_weight_g: float
     event_at: datetime | None = None
+
+
+class BatchMeasurementItem(BaseModel):
+    rfid_uid: str | None = None
+    external_id: str | None = None
+    spool_id: int | None = None
+    measured_weight_g: float
+    event_at: datetime | None = None
+
+
+class BatchMeasurementRequest(BaseModel):
+    items: list[BatchMeasurementItem] = Field(..., min_length=1, max_length=1000)
+    note: str | None = None
+
+
+class BatchMeasurementResult(BaseModel):
+    index: int
+    status: str
+    spool_id: int | None = None
+    event_id: int | None = None
+    remaining_weight_g: float | None = None
+    message: str | None = None
+
+
+class BatchMeasurementResponse(BaseModel):
+    recorded: int
+    failed: int
+    results: list[BatchMeasurementResult]
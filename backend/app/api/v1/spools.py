@@ -9,6 +9,8 @@ from app.api.deps import DBSession, PrincipalDep, RequirePermission
 from app.api.v1.schemas import PaginatedResponse
 from app.api.v1.schemas_spool import (
     AdjustmentRequest,
+    BatchMeasurementRequest,
+    BatchMeasurementResponse,
     ConsumptionRequest,
     DeviceMeasurementRequest,
     LocationCreate,
@@ -25,7 +27,10 @@ from app.api.v1.schemas_spool import (
     BulkStatusChangeRequest,
 )
 from app.models import Filament, Location, Spool, SpoolEvent, SpoolStatus
+from app.services.consumption_rollup_service import ConsumptionRollupService
+from app.services.event_archive_store import SPOOL_EVENTS, EventArchiveStore
 from app.services.spool_service import SpoolService
+from app.services.status_registry import status_registry
 
 router_locations = APIRouter(prefix="/locations", tags=["locations"])
 
@@ -138,6 +143,7 @@ async def delete_location(
             detail={"code": "conflict", "message": "Location has spools, cannot delete"},
         )
 
+    await ConsumptionRollupService(db).fold_location(location_id)
     await db.delete(location)
     await db.commit()
 
@@ -174,11 +180,12 @@ async def list_spools(
     if filament_id:
         query = query.where(Spool.filament_id == filament_id)
     
+    archived_status_id = await status_registry.get_id(db, "archived")
     if status_id:
         query = query.where(Spool.status_id == status_id)
-    else:
+    elif archived_status_id is not None:
         # Exclude archived spools by default
-        query = query.join(SpoolStatus).where(SpoolStatus.key != "archived")
+        query = query.where(Spool.status_id != archived_status_id)
 
     if location_id:
         query = query.where(Spool.location_id == location_id)
@@ -196,9 +203,9 @@ async def list_spools(
     
     if status_id:
         count_query = count_query.where(Spool.status_id == status_id)
-    else:
+    elif archived_status_id is not None:
         # Exclude archived spools by default
-        count_query = count_query.join(SpoolStatus).where(SpoolStatus.key != "archived")
+        count_query = count_query.where(Spool.status_id != archived_status_id)
 
     if location_id:
         count_query = count_query.where(Spool.location_id == location_id)
@@ -223,11 +230,10 @@ async def create_spool(
         )
 
     if data.status_id:
-        result = await db.execute(select(SpoolStatus).where(SpoolStatus.id == data.status_id))
+        status_id = data.status_id if await status_registry.get_key(db, data.status_id) else None
     else:
-        result = await db.execute(select(SpoolStatus).where(SpoolStatus.key == "new"))
-    status_obj = result.scalar_one_or_none()
-    if not status_obj:
+        status_id = await status_registry.get_id(db, "new")
+    if status_id is None:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail={"code": "validation_error", "message": "Status not found"},
@@ -235,7 +241,7 @@ async def create_spool(
 
     spool_data = data.model_dump()
     if "status_id" not in spool_data or spool_data["status_id"] is None:
-        spool_data["status_id"] = status_obj.id
+        spool_data["status_id"] = status_id
 
     spool = Spool(**spool_data)
     db.add(spool)
@@ -466,21 +472,30 @@ async def list_spool_events(
     page: int = Query(1, ge=1),
     page_size: int = Query(50, ge=1, le=200),
 ):
+    offset = (page - 1) * page_size
     result = await db.execute(
         select(SpoolEvent)
         .where(SpoolEvent.spool_id == spool_id)
-        .order_by(SpoolEvent.event_at.desc())
-        .offset((page - 1) * page_size)
+        .order_by(SpoolEvent.event_at.desc(), SpoolEvent.id.desc())
+        .offset(offset)
         .limit(page_size)
     )
-    items = result.scalars().all()
+    items = list(result.scalars().all())
 
     count_result = await db.execute(
         select(func.count()).select_from(SpoolEvent).where(SpoolEvent.spool_id == spool_id)
     )
-    total = count_result.scalar() or 0
+    live_total = count_result.scalar() or 0
+
+    # Older events may live in the archive, page on into it
+    archive = EventArchiveStore(db)
+    archived_total = await archive.count_events(SPOOL_EVENTS, spool_id)
+    if archived_total and len(items) < page_size:
+        items += await archive.page_events(
+            SPOOL_EVENTS, spool_id, max(0, offset - live_total), page_size - len(items)
+        )
 
-    return PaginatedResponse(items=items, page=page, page_size=page_size, total=total)
+    return PaginatedResponse(items=items, page=page, page_size=page_size, total=live_total + archived_total)
 
 
 router_spool_measurements = APIRouter(tags=["spool-measurements"])
@@ -516,3 +531,31 @@ async def device_measurement(
         source="device",
     )
     return event
+
+
+@router_spool_measurements.post("/spool-measurements/batch", response_model=BatchMeasurementResponse)
+async def device_measurements_batch(
+    data: BatchMeasurementRequest,
+    db: DBSession,
+    principal = RequirePermission("spool_events:create_measurement"),
+):
+    """Record many readings (stocktake, buffered scale) in one transaction."""
+    for index, item in enumerate(data.items):
+        if not item.rfid_uid and not item.external_id and not item.spool_id:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail={
+                    "code": "validation_error",
+                    "message": f"items[{index}]: rfid_uid, external_id or spool_id required",
+                },
+            )
+
+    service = SpoolService(db)
+    results = await service.record_measurements_batch(
+        [item.model_dump() for item in data.items],
+        principal=principal,
+        source="device",
+        note=data.note,
+    )
+    recorded = sum(1 for r in results if r["status"] == "ok")
+    return BatchMeasurementResponse(recorded=recorded, failed=len(results) - recorded, results=results)
@@ -6,12 +6,15 @@ from typing import Any
 
 from fastapi import APIRouter, HTTPException, UploadFile, File, status
 from fastapi.responses import JSONResponse
-from pydantic import BaseModel
-from sqlalchemy import delete
+from pydantic import BaseModel, Field
+from sqlalchemy import delete, select
 
 from app.api.deps import DBSession, RequirePermission
+from app.core.database import async_session_maker
 from app.models import (
     Color,
+    EventArchiveSegment,
+    EventArchiveSegmentOwner,
     Filament,
     FilamentColor,
     FilamentPrinterProfile,
@@ -24,9 +27,17 @@ from app.models import (
     PrinterSlotAssignment,
     PrinterSlotEvent,
     Spool,
+    SpoolArchiveState,
+    SpoolConsumptionDaily,
     SpoolEvent,
+    SpoolWeightCheckpoint,
 )
+from app.services.consumption_rollup_service import ConsumptionRollupService
+from app.services.event_archive_service import MIN_ARCHIVE_AGE_DAYS, EventArchiveService
+from app.services.event_archive_store import EventArchiveStore
 from app.services.plugin_service import PluginInstallError, PluginInstallService
+from app.services.printer_state_projection import printer_state_projection
+from app.services.remaining_weight_rebuild_service import RebuildJob, rebuild_jobs
 from app.services.spoolman_import_service import SpoolmanImportError, SpoolmanImportService
 
 logger = logging.getLogger(__name__)
@@ -350,6 +361,204 @@ async def spoolman_execute(
         )
 
 
+# ------------------------------------------------------------------ #
+#  Analytics
+# ------------------------------------------------------------------ #
+
+class ConsumptionBackfillResponse(BaseModel):
+    events_scanned: int
+    rows_written: int
+
+
+@router.post(
+    "/analytics/consumption/backfill",
+    response_model=ConsumptionBackfillResponse,
+)
+async def backfill_consumption_rollup(
+    db: DBSession,
+    principal=RequirePermission("admin:plugins_manage"),
+):
+    """Verbrauchs-Rollup (spool_consumption_daily) aus der Event-Historie neu aufbauen."""
+    service = ConsumptionRollupService(db)
+    return await service.backfill()
+
+
+# ------------------------------------------------------------------ #
+#  Restgewicht-Rebuild (Hintergrund-Job)
+# ------------------------------------------------------------------ #
+
+class RebuildRemainingRequest(BaseModel):
+    spool_ids: list[int] | None = None
+    filament_id: int | None = None
+    workers: int = Field(1, ge=1, le=16)
+
+
+class RebuildProgressResponse(BaseModel):
+    total: int
+    scanned: int
+    written: int
+    updated: int
+    blocked: int
+    emptied: int
+    events_replayed: int
+
+
+class RebuildJobResponse(BaseModel):
+    id: str
+    status: str
+    spool_ids: list[int] | None
+    filament_id: int | None
+    workers: int
+    progress: RebuildProgressResponse
+    error: str | None
+    created_at: datetime
+    started_at: datetime | None
+    finished_at: datetime | None
+
+
+def _rebuild_job_response(job: RebuildJob) -> RebuildJobResponse:
+    return RebuildJobResponse(
+        id=job.id,
+        status=job.status,
+        spool_ids=job.spool_ids,
+        filament_id=job.filament_id,
+        workers=job.workers,
+        progress=RebuildProgressResponse(**vars(job.progress)),
+        error=job.error,
+        created_at=job.created_at,
+        started_at=job.started_at,
+        finished_at=job.finished_at,
+    )
+
+
+@router.post(
+    "/rebuild-remaining",
+    response_model=RebuildJobResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+)
+async def start_rebuild_remaining(
+    data: RebuildRemainingRequest,
+    principal=RequirePermission("admin:plugins_manage"),
+):
+    """Restgewicht ausgewaehlter (oder aller) Spulen aus der Event-Historie neu berechnen.
+
+    Laeuft als Hintergrund-Job, Fortschritt ueber GET /rebuild-remaining/{job_id}.
+    """
+    try:
+        job = rebuild_jobs.start(
+            async_session_maker,
+            spool_ids=data.spool_ids,
+            filament_id=data.filament_id,
+            workers=data.workers,
+        )
+    except RuntimeError as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail={"code": "rebuild_running", "message": str(e)},
+        )
+    logger.info(f"Rebuild job {job.id} started by user {principal.user_id}")
+    return _rebuild_job_response(job)
+
+
+@router.get("/rebuild-remaining", response_model=list[RebuildJobResponse])
+async def list_rebuild_jobs(
+    principal=RequirePermission("admin:plugins_manage"),
+):
+    return [_rebuild_job_response(job) for job in rebuild_jobs.list()]
+
+
+@router.get("/rebuild-remaining/{job_id}", response_model=RebuildJobResponse)
+async def get_rebuild_job(
+    job_id: str,
+    principal=RequirePermission("admin:plugins_manage"),
+):
+    job = rebuild_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail={"code": "not_found", "message": "Rebuild job not found"},
+        )
+    return _rebuild_job_response(job)
+
+
+# ------------------------------------------------------------------ #
+#  Event-Archiv (Cold Storage)
+# ------------------------------------------------------------------ #
+
+class ArchiveEventsRequest(BaseModel):
+    older_than_days: int = Field(365, ge=MIN_ARCHIVE_AGE_DAYS)
+
+
+class ArchiveResultResponse(BaseModel):
+    kind: str
+    cutoff_at: datetime
+    segments: int
+    owners: int
+    events_archived: int
+    bytes_written: int
+
+
+@router.post("/archive-events", response_model=list[ArchiveResultResponse])
+async def archive_events(
+    data: ArchiveEventsRequest,
+    db: DBSession,
+    principal=RequirePermission("admin:plugins_manage"),
+):
+    """Spool- und Slot-Events aelter als older_than_days in komprimierte Archiv-Segmente verschieben.
+
+    Die Event-Listen blaettern transparent ins Archiv weiter.
+    """
+    results = await EventArchiveService(db).archive(data.older_than_days)
+    logger.info(f"Event archival run by user {principal.user_id}")
+    return [ArchiveResultResponse(**vars(result)) for result in results]
+
+
+# ------------------------------------------------------------------ #
+#  Drucker-Event-Queues
+# ------------------------------------------------------------------ #
+
+class PrinterEventQueueResponse(BaseModel):
+    printer_id: int
+    depth: int
+    received: int
+    processed: int
+    dropped: int
+    superseded: int
+
+
+class PrinterEventWriterResponse(BaseModel):
+    batches: int
+    events: int
+    failed_batches: int
+    last_batch_size: int
+    last_batch_ms: float
+    avg_batch_ms: float
+    max_batch_ms: float
+
+
+@router.get("/printer-event-queues", response_model=list[PrinterEventQueueResponse])
+async def list_printer_event_queues(
+    principal=RequirePermission("admin:plugins_manage"),
+):
+    """Fuellstand und Zaehler der Event-Queues pro Drucker (verworfene/ersetzte Events)."""
+    from app.plugins.manager import plugin_manager
+
+    return [
+        PrinterEventQueueResponse(printer_id=printer_id, **stats)
+        for printer_id, stats in sorted(plugin_manager.get_event_queue_stats().items())
+    ]
+
+
+@router.get("/printer-event-writer", response_model=PrinterEventWriterResponse)
+async def get_printer_event_writer(
+    principal=RequirePermission("admin:plugins_manage"),
+):
+    """Batch-Statistik des Event-Writers (Batches, Events, Latenz pro Batch in ms)."""
+    from app.plugins.manager import plugin_manager
+
+    return PrinterEventWriterResponse(**vars(plugin_manager.get_event_writer_stats()))
+
+
 # ------------------------------------------------------------------ #
 #  Killswitch – Alle Daten ausser Users/Auth/RBAC loeschen
 # ------------------------------------------------------------------ #
@@ -385,12 +594,17 @@ async def killswitch(
 
     # Reihenfolge beachten: abhaengige Tabellen zuerst loeschen
     tables_in_order: list[tuple[str, type]] = [
+        ("spool_consumption_daily", SpoolConsumptionDaily),
         ("printer_slot_events", PrinterSlotEvent),
+        ("event_archive_segment_owners", EventArchiveSegmentOwner),
+        ("event_archive_segments", EventArchiveSegment),
+        ("spool_archive_states", SpoolArchiveState),
         ("printer_slot_assignments", PrinterSlotAssignment),
         ("printer_slots", PrinterSlot),
         ("printer_ams_units", PrinterAmsUnit),
         ("filament_printer_profiles", FilamentPrinterProfile),
         ("printers", Printer),
+        ("spool_weight_checkpoints", SpoolWeightCheckpoint),
         ("spool_events", SpoolEvent),
         ("spools", Spool),
         ("filament_ratings", FilamentRating),
@@ -401,11 +615,17 @@ async def killswitch(
         ("locations", Location),
     ]
 
+    # Segment files are removed once their rows are gone for good
+    segment_files = (await db.execute(select(EventArchiveSegment.file_name))).scalars().all()
+
     for table_name, model in tables_in_order:
         result = await db.execute(delete(model))
         deleted[table_name] = result.rowcount  # type: ignore[assignment]
 
     await db.commit()
+    EventArchiveStore(db).delete_files(segment_files)
+    # Bulk deletes bypass the ORM listeners
+    printer_state_projection.invalidate()
 
     total = sum(deleted.values())
     logger.warning(
@@ -0,0 +1,95 @@
+"""Command line maintenance tasks.
+
+Usage:
+    python -m app.cli rebuild-remaining [--spool-id ID ...] [--filament-id ID] [--workers N]
+    python -m app.cli archive-events [--older-than-days N]
+"""
+
+import argparse
+import asyncio
+import sys
+
+from app.core.database import async_session_maker, engine
+from app.core.logging_config import setup_logging
+from app.services.event_archive_service import MIN_ARCHIVE_AGE_DAYS, EventArchiveService
+from app.services.remaining_weight_rebuild_service import RebuildProgress, rebuild_remaining_weights
+
+
+async def _rebuild_remaining(args: argparse.Namespace) -> int:
+    progress = RebuildProgress()
+    task = asyncio.create_task(rebuild_remaining_weights(
+        async_session_maker,
+        spool_ids=args.spool_id or None,
+        filament_id=args.filament_id,
+        workers=args.workers,
+        progress=progress,
+    ))
+    while not task.done():
+        await asyncio.wait({task}, timeout=1.0)
+        print(
+            f"\rscanned {progress.scanned}/{progress.total}  written {progress.written}/{progress.total}",
+            end="",
+            file=sys.stderr,
+        )
+    print(file=sys.stderr)
+    await task
+    await engine.dispose()
+
+    print(
+        f"Rebuilt {progress.total} spools: {progress.updated} updated, "
+        f"{progress.emptied} emptied, {progress.blocked} blocked (tara missing), "
+        f"{progress.events_replayed} events replayed"
+    )
+    return 0
+
+
+async def _archive_events(args: argparse.Namespace) -> int:
+    async with async_session_maker() as db:
+        results = await EventArchiveService(db).archive(args.older_than_days)
+    await engine.dispose()
+
+    for result in results:
+        print(
+            f"{result.kind}: {result.events_archived} events of {result.owners} owners "
+            f"before {result.cutoff_at.date()} -> {result.segments} segments, {result.bytes_written} bytes"
+        )
+    return 0
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.cli")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    rebuild = subparsers.add_parser(
+        "rebuild-remaining",
+        help="Recompute remaining weights from the event history",
+    )
+    rebuild.add_argument("--spool-id", type=int, action="append", help="Spool to rebuild (repeatable)")
+    rebuild.add_argument("--filament-id", type=int, help="Only spools of this filament")
+    rebuild.add_argument("--workers", type=int, default=4, help="Parallel workers (ignored on SQLite)")
+
+    archive = subparsers.add_parser(
+        "archive-events",
+        help="Move old spool and printer slot events into compressed archive segments",
+    )
+    archive.add_argument(
+        "--older-than-days",
+        type=int,
+        default=365,
+        help=f"Archive events older than this (at least {MIN_ARCHIVE_AGE_DAYS})",
+    )
+
+    args = parser.parse_args(argv)
+    setup_logging()
+
+    if args.command == "rebuild-remaining":
+        return asyncio.run(_rebuild_remaining(args))
+    if args.command == "archive-events":
+        if args.older_than_days < MIN_ARCHIVE_AGE_DAYS:
+            parser.error(f"--older-than-days must be at least {MIN_ARCHIVE_AGE_DAYS}")
+        return asyncio.run(_archive_events(args))
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
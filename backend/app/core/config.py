@@ -47,5 +47,38 @@ class Settings(BaseSettings):
 
     cors_origins: str = ""
 
+    # Spools projected to run empty within this many days count as low stock
+    runout_horizon_days: int = 14
+
+    # Events older than this many days are moved to compressed archive
+    # segments once a day; 0 disables the scheduled archival
+    event_archive_after_days: int = 0
+    # Directory of the archive segments; empty = "event_archive" next to the SQLite file
+    event_archive_dir: str = ""
+
+    # Scale readings of one device and spool are held this long after the
+    # last reading and then written as one measurement; 0 writes every reading
+    scale_debounce_seconds: float = 2.0
+    # Readings within this tolerance count as the same (settled) weight
+    scale_stable_tolerance_g: float = 2.0
+
+    # Driver events waiting per printer; when full, the oldest event is dropped
+    printer_event_queue_size: int = 256
+    # Driver events of all printers are written in one transaction per
+    # batch: up to this many events, collected for at most this long
+    printer_event_batch_size: int = 50
+    printer_event_batch_delay_ms: int = 50
+    # Messages buffered per push subscriber (SSE) before it has to resync
+    printer_events_buffer_size: int = 100
+    # Drivers started at the same time on startup, and how long validating
+    # and starting one driver may take before it counts as failed
+    printer_start_concurrency: int = 4
+    printer_start_timeout_seconds: float = 20.0
+    # First retry of a failed driver start; doubles per failure up to 10 minutes
+    printer_start_retry_seconds: float = 30.0
+    # Worker processes hosting the printer drivers, so driver load can't
+    # slow down the API; 0 runs the drivers in the API process
+    printer_driver_workers: int = 0
+
 
 settings = Settings()
@@ -1,9 +1,10 @@
+import asyncio
 from contextlib import asynccontextmanager
 import os  # Added import
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, PlainTextResponse
 from sqlalchemy import text
 
 from app.api.auth import router as auth_router
@@ -14,6 +15,10 @@ from app.core.logging_config import setup_logging
 from app.core.middleware import AuthMiddleware, CsrfMiddleware, RequestIdMiddleware
 from app.core.seeds import run_all_seeds
 from app.plugins.manager import plugin_manager
+from app.services.event_archive_service import run_scheduled_archival
+from app.services.printer_state_projection import printer_state_projection
+from app.services.scale_debouncer import scale_debouncer
+from app.services.spool_identifier_index import spool_identifier_index
 
 setup_logging()
 logger = __import__('logging').getLogger(__name__)
@@ -58,10 +63,22 @@ async def lifespan(app: FastAPI):
 
     async with async_session_maker() as db:
         await run_all_seeds(db)
+        await spool_identifier_index.load(db)
+        await printer_state_projection.load(db)
     await plugin_manager.start_all()
+
+    archival_task = None
+    if settings.event_archive_after_days > 0:
+        archival_task = asyncio.create_task(
+            run_scheduled_archival(async_session_maker, settings.event_archive_after_days)
+        )
+
     logger.info("Propus Spool backend started")
     yield
     logger.info("Shutting down Propus Spool backend...")
+    if archival_task is not None:
+        archival_task.cancel()
+    await scale_debouncer.flush_all()
     await plugin_manager.stop_all()
     logger.info("Propus Spool backend stopped")
 
@@ -100,6 +117,15 @@ async def health():
     return {"status": "ok"}
 
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    # Prometheus text exposition format 0.0.4
+    return PlainTextResponse(
+        plugin_manager.render_metrics(),
+        media_type="text/plain; version=0.0.4; charset=utf-8",
+    )
+
+
 @app.get("/health/ready")
 async def health_ready():
     db_ok = False
@@ -117,13 +143,21 @@ async def health_ready():
             plugins_ok = False
             break
 
-    if db_ok and plugins_ok:
-        return {"status": "ok", "db": "ok", "plugins": "ok"}
+    # Drivers start in the background; not ready until every start finished
+    startup = plugin_manager.get_startup_progress()
+    if startup["state"] == "running":
+        plugins = "starting"
+    else:
+        plugins = "ok" if plugins_ok else "fail"
+
+    if db_ok and plugins == "ok":
+        return {"status": "ok", "db": "ok", "plugins": "ok", "startup": startup}
 
     return {
         "status": "not_ready",
         "db": "ok" if db_ok else "fail",
-        "plugins": "ok" if plugins_ok else "fail",
+        "plugins": plugins,
+        "startup": startup,
     }
 
 
@@ -1,9 +1,11 @@
 from app.models.base import Base
+from app.models.consumption import SpoolConsumptionDaily
+from app.models.event_archive import EventArchiveSegment, EventArchiveSegmentOwner, SpoolArchiveState
 from app.models.filament import Color, Filament, FilamentColor, FilamentPrinterProfile, FilamentRating, Manufacturer
 from app.models.location import Location
 from app.models.printer import Printer, PrinterAmsUnit, PrinterSlot, PrinterSlotAssignment, PrinterSlotEvent
 from app.models.rbac import Permission, Role, RolePermission, UserPermission, UserRole
-from app.models.spool import Spool, SpoolEvent, SpoolStatus
+from app.models.spool import Spool, SpoolEvent, SpoolStatus, SpoolWeightCheckpoint
 from app.models.user import OAuthIdentity, User, UserApiKey, UserSession
 from app.models.device import Device
 from app.models.plugin import InstalledPlugin
@@ -30,6 +32,11 @@ __all__ = [
     "Spool",
     "SpoolEvent",
     "SpoolStatus",
+    "SpoolWeightCheckpoint",
+    "SpoolConsumptionDaily",
+    "EventArchiveSegment",
+    "EventArchiveSegmentOwner",
+    "SpoolArchiveState",
     "OAuthIdentity",
     "User",
     "UserApiKey",
@@ -0,0 +1,41 @@
+from datetime import date, datetime
+
+from sqlalchemy import Date, DateTime, Float, ForeignKey, Index, Integer, UniqueConstraint, func
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+
+from app.models.base import Base
+
+# location_id of consumption at no location. NULLs are distinct in unique
+# constraints, so a nullable column would let the rollup key repeat.
+NO_LOCATION = 0
+
+
+class SpoolConsumptionDaily(Base):
+    """Daily consumption rollup per filament and location.
+
+    Maintained incrementally by SpoolService and rebuilt from the event
+    history by ConsumptionRollupService.backfill(). location_id is not a
+    foreign key; rows of a deleted location are folded into NO_LOCATION.
+    """
+
+    __tablename__ = "spool_consumption_daily"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    day: Mapped[date] = mapped_column(Date, nullable=False)
+    filament_id: Mapped[int] = mapped_column(Integer, ForeignKey("filaments.id", ondelete="CASCADE"), nullable=False)
+    location_id: Mapped[int] = mapped_column(Integer, nullable=False, default=NO_LOCATION, server_default="0")
+
+    consumed_g: Mapped[float] = mapped_column(Float, nullable=False, default=0)
+    event_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=func.now(), onupdate=func.now(), nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint("day", "filament_id", "location_id", name="uq_spool_consumption_daily_key"),
+        Index("ix_spool_consumption_daily_filament_day", "filament_id", "day"),
+    )
+
+    filament: Mapped["Filament"] = relationship()
+
+
+from app.models.filament import Filament
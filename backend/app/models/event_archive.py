@@ -0,0 +1,85 @@
+from datetime import datetime
+
+from sqlalchemy import DateTime, Float, ForeignKey, Index, Integer, String, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.base import Base
+
+
+class EventArchiveSegment(Base):
+    """One gzip NDJSON file of archived events.
+
+    Segment files are written once and never changed; the rows listed in a
+    segment are deleted from the live table in the same transaction that
+    inserts the segment row.
+    """
+
+    __tablename__ = "event_archive_segments"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    # "spool_events" or "printer_slot_events"
+    kind: Mapped[str] = mapped_column(String(50), nullable=False)
+    file_name: Mapped[str] = mapped_column(String(255), unique=True, nullable=False)
+    cutoff_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+
+    min_event_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    max_event_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    event_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    byte_size: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=func.now(), nullable=False)
+
+    __table_args__ = (
+        Index("ix_event_archive_segments_kind_cutoff", "kind", "cutoff_at"),
+    )
+
+
+class EventArchiveSegmentOwner(Base):
+    """Events of one spool (or printer, for slot events) within a segment."""
+
+    __tablename__ = "event_archive_segment_owners"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    segment_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("event_archive_segments.id", ondelete="CASCADE"), nullable=False
+    )
+    owner_id: Mapped[int] = mapped_column(Integer, nullable=False)
+
+    event_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    min_event_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    max_event_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+
+    __table_args__ = (
+        Index("ix_event_archive_segment_owners_owner", "owner_id", "segment_id"),
+    )
+
+
+class SpoolArchiveState(Base):
+    """Replay state of a spool after all of its archived events.
+
+    Rebuilds, the rollup backfill and the run-out forecast start from here
+    instead of reading the archive, as long as the tara is unchanged and no
+    live event was backdated before archived_until.
+    """
+
+    __tablename__ = "spool_archive_states"
+
+    spool_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("spools.id", ondelete="CASCADE"), primary_key=True
+    )
+    archived_until: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    last_event_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    last_event_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    event_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    tara_g: Mapped[float | None] = mapped_column(Float, nullable=True)
+
+    # rebuild_remaining_weight semantics
+    remaining_weight_g: Mapped[float | None] = mapped_column(Float, nullable=True)
+    last_plausible_remaining_g: Mapped[float | None] = mapped_column(Float, nullable=True)
+    blocked_event_id: Mapped[int | None] = mapped_column(Integer, nullable=True)
+
+    # Consumption rollup semantics
+    rollup_remaining_g: Mapped[float | None] = mapped_column(Float, nullable=True)
+    location_id: Mapped[int | None] = mapped_column(Integer, nullable=True)
+
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=func.now(), onupdate=func.now(), nullable=False)
@@ -1,7 +1,7 @@
 from datetime import datetime
 from typing import Any
 
-from sqlalchemy import Boolean, DateTime, Float, ForeignKey, Integer, String, Text, UniqueConstraint, func
+from sqlalchemy import Boolean, DateTime, Float, ForeignKey, Index, Integer, String, Text, UniqueConstraint, func
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.models.base import Base, TimestampMixin
@@ -114,6 +114,10 @@ class PrinterSlotEvent(Base):
     slot: Mapped["PrinterSlot"] = relationship(back_populates="events")
     spool: Mapped["Spool"] = relationship(back_populates="slot_events")
 
+    __table_args__ = (
+        Index("ix_printer_slot_events_printer_event_at", "printer_id", "event_at", "id"),
+    )
+
 
 from app.models.location import Location
 from app.models.spool import Spool
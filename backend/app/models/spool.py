@@ -1,7 +1,7 @@
 from datetime import datetime
 from typing import Any
 
-from sqlalchemy import DateTime, Float, ForeignKey, Integer, String, Text, func
+from sqlalchemy import DateTime, Float, ForeignKey, Index, Integer, String, Text, func
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.models.base import Base, TimestampMixin
@@ -97,6 +97,35 @@ class SpoolEvent(Base):
     from_location: Mapped["Location"] = relationship(back_populates="events_from", foreign_keys=[from_location_id])
     to_location: Mapped["Location"] = relationship(back_populates="events_to", foreign_keys=[to_location_id])
 
+    __table_args__ = (
+        Index("ix_spool_events_spool_event_at", "spool_id", "event_at", "id"),
+    )
+
+
+class SpoolWeightCheckpoint(Base):
+    """Replay state of rebuild_remaining_weight after a given event.
+
+    A rebuild resumes after the latest checkpoint whose tara still matches
+    and that no backdated event precedes.
+    """
+
+    __tablename__ = "spool_weight_checkpoints"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    spool_id: Mapped[int] = mapped_column(Integer, ForeignKey("spools.id", ondelete="CASCADE"), nullable=False)
+    event_id: Mapped[int] = mapped_column(Integer, ForeignKey("spool_events.id", ondelete="CASCADE"), nullable=False)
+    event_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+
+    remaining_weight_g: Mapped[float | None] = mapped_column(Float, nullable=True)
+    tara_g: Mapped[float | None] = mapped_column(Float, nullable=True)
+    events_replayed: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=func.now(), nullable=False)
+
+    __table_args__ = (
+        Index("ix_spool_weight_checkpoints_spool_event_at", "spool_id", "event_at"),
+    )
+
 
 from app.models.filament import Filament
 from app.models.user import User
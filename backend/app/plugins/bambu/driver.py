@@ -3,22 +3,77 @@
 import asyncio
 import json
 import logging
+import re
 import ssl
-import threading
+import time
 from typing import Any, Callable
 
 import paho.mqtt.client as mqtt
 
+from app.plugins.bambu.mqtt_manager import MqttConnection, mqtt_manager
+from app.plugins.bambu.state import BambuPrinterState
 from app.plugins.base import BaseDriver
 
 logger = logging.getLogger(__name__)
 
 MQTT_PORT = 8883
 MQTT_USERNAME = "bblp"
+MQTT_KEEPALIVE = 60
 RECONNECT_DELAY = 10
+# Seconds between "pushall" requests that resynchronize the merged state;
+# one is also sent on every connect
+PUSHALL_INTERVAL = 300
 AMS_SLOTS_STANDARD = 4
 AMS_SLOTS_HT = 1
 
+# Print job fields copied from the "print" object of a report
+PRINT_STATE_FIELDS = (
+    "gcode_state",
+    "subtask_name",
+    "gcode_file",
+    "mc_percent",
+    "mc_remaining_time",
+    "nozzle_temper",
+    "nozzle_target_temper",
+    "bed_temper",
+    "bed_target_temper",
+    "layer_num",
+    "total_layer_num",
+    "mc_print_stage",
+)
+# A report mentioning none of these keys is skipped without parsing it
+RELEVANT_KEYS = re.compile(
+    b'"(?:' + b"|".join(re.escape(key.encode()) for key in (*PRINT_STATE_FIELDS, "ams")) + b')"'
+)
+# Tray fields that decide whether the AMS state changed; unit humidity and
+# temperature change all the time and only ride along with real changes
+TRAY_FINGERPRINT_FIELDS = (
+    "id",
+    "tag_uid",
+    "tray_uuid",
+    "tray_type",
+    "tray_sub_brands",
+    "tray_color",
+    "tray_id_name",
+    "remain",
+    "tray_weight",
+    "tray_diameter",
+    "nozzle_temp_min",
+    "nozzle_temp_max",
+    "bed_temp",
+)
+
+
+def ams_fingerprint(ams_units_raw: list[dict]) -> tuple:
+    """The slot-relevant tray fields of an AMS report, comparable with ==."""
+    return tuple(
+        (unit.get("id"), tuple(
+            tuple(tray.get(field) for field in TRAY_FINGERPRINT_FIELDS)
+            for tray in unit.get("tray") or ()
+        ))
+        for unit in ams_units_raw
+    )
+
 
 class Driver(BaseDriver):
     driver_key = "bambu"
@@ -30,11 +85,14 @@ class Driver(BaseDriver):
         emitter: Callable[[dict[str, Any]], None],
     ):
         super().__init__(printer_id, config, emitter)
-        self._thread: threading.Thread | None = None
+        self._connection: MqttConnection | None = None
         self._mqtt_client: mqtt.Client | None = None
         self._loop: asyncio.AbstractEventLoop | None = None
-        self._last_ams_hash: str | None = None
+        self._last_ams_fingerprint: tuple | None = None
+        self.reports_skipped = 0
         self._print_state: dict[str, Any] = {}
+        self._state = BambuPrinterState()
+        self._resync_task: asyncio.Task | None = None
         self._camera_snapshot: bytes | None = None
         self._camera_ts: float = 0
 
@@ -52,19 +110,25 @@ class Driver(BaseDriver):
     async def start(self) -> None:
         self._running = True
         self._loop = asyncio.get_event_loop()
-        self._thread = threading.Thread(target=self._mqtt_loop, daemon=True)
-        self._thread.start()
+        self._connection = mqtt_manager.connect(
+            name=f"printer {self.printer_id}",
+            create_client=self._create_client,
+            host=self.config["host"],
+            port=MQTT_PORT,
+            keepalive=MQTT_KEEPALIVE,
+            reconnect_delay=RECONNECT_DELAY,
+        )
+        self._resync_task = asyncio.create_task(self._resync_loop())
         logger.info(f"Bambu driver started for printer {self.printer_id}")
 
     async def stop(self) -> None:
         self._running = False
-        if self._mqtt_client:
-            try:
-                self._mqtt_client.disconnect()
-            except Exception:
-                pass
-        if self._thread and self._thread.is_alive():
-            self._thread.join(timeout=5)
+        if self._resync_task is not None:
+            self._resync_task.cancel()
+            self._resync_task = None
+        if self._connection is not None:
+            await mqtt_manager.disconnect(self._connection)
+            self._connection = None
         logger.info(f"Bambu driver stopped for printer {self.printer_id}")
 
     def health(self) -> dict[str, Any]:
@@ -76,6 +140,8 @@ class Driver(BaseDriver):
             "printer_id": self.printer_id,
             "running": self._running,
             "mqtt_connected": connected,
+            "reports_skipped": self.reports_skipped,
+            "state_complete": self._state.complete,
             "print_state": dict(self._print_state),
         }
 
@@ -154,61 +220,74 @@ class Driver(BaseDriver):
         return result.rc == 0
 
     # ------------------------------------------------------------------ #
-    #  MQTT thread
+    #  MQTT connection
     # ------------------------------------------------------------------ #
 
-    def _mqtt_loop(self) -> None:
-        host = self.config["host"]
+    def _create_client(self) -> mqtt.Client:
+        """New client per connection attempt; the socket is driven by mqtt_manager."""
         access_code = self.config["access_code"]
         serial = self.config["serial_number"]
         topic = f"device/{serial}/report"
 
-        while self._running:
-            try:
-                client = mqtt.Client(
-                    callback_api_version=mqtt.CallbackAPIVersion.VERSION2,
-                    client_id=f"propus-{self.printer_id}",
-                    protocol=mqtt.MQTTv311,
-                )
-                client.username_pw_set(MQTT_USERNAME, access_code)
-
-                tls_ctx = ssl.create_default_context()
-                tls_ctx.check_hostname = False
-                tls_ctx.verify_mode = ssl.CERT_NONE
-                client.tls_set_context(tls_ctx)
-
-                client.on_connect = lambda c, ud, flags, rc, props=None: self._on_connect(c, topic, rc)
-                client.on_message = lambda c, ud, msg: self._on_message(msg)
-                client.on_disconnect = lambda c, ud, flags, rc=None, props=None: self._on_disconnect(rc)
-
-                self._mqtt_client = client
-                client.connect(host, MQTT_PORT, keepalive=60)
-                client.loop_forever()
-
-            except Exception as e:
-                logger.warning(f"Bambu MQTT error for printer {self.printer_id}: {e}")
-
-            if self._running:
-                logger.info(f"Bambu reconnecting in {RECONNECT_DELAY}s for printer {self.printer_id}")
-                for _ in range(RECONNECT_DELAY * 10):
-                    if not self._running:
-                        return
-                    import time
-                    time.sleep(0.1)
+        client = mqtt.Client(
+            callback_api_version=mqtt.CallbackAPIVersion.VERSION2,
+            client_id=f"propus-{self.printer_id}",
+            protocol=mqtt.MQTTv311,
+        )
+        client.username_pw_set(MQTT_USERNAME, access_code)
+
+        tls_ctx = ssl.create_default_context()
+        tls_ctx.check_hostname = False
+        tls_ctx.verify_mode = ssl.CERT_NONE
+        client.tls_set_context(tls_ctx)
+
+        client.on_connect = lambda c, ud, flags, rc, props=None: self._on_connect(c, topic, rc)
+        client.on_message = lambda c, ud, msg: self._on_message(msg)
+        client.on_disconnect = lambda c, ud, flags, rc=None, props=None: self._on_disconnect(rc)
+
+        self._mqtt_client = client
+        return client
 
     def _on_connect(self, client: mqtt.Client, topic: str, rc: int) -> None:
         if rc == 0:
             logger.info(f"Bambu MQTT connected for printer {self.printer_id}")
+            self.telemetry.record_connect()
             client.subscribe(topic)
+            self._request_pushall(client)
         else:
             logger.warning(f"Bambu MQTT connect failed rc={rc} for printer {self.printer_id}")
 
+    def _request_pushall(self, client: mqtt.Client) -> None:
+        """Ask for a full report, the base the following deltas are merged onto."""
+        serial = self.config["serial_number"]
+        payload = json.dumps({"pushing": {"sequence_id": "0", "command": "pushall"}})
+        client.publish(f"device/{serial}/request", payload)
+
+    async def _resync_loop(self) -> None:
+        while self._running:
+            await asyncio.sleep(PUSHALL_INTERVAL)
+            client = self._mqtt_client
+            if client is not None and client.is_connected():
+                self._request_pushall(client)
+
     def _on_disconnect(self, rc: Any) -> None:
         logger.info(f"Bambu MQTT disconnected (rc={rc}) for printer {self.printer_id}")
 
     def _on_message(self, msg: mqtt.MQTTMessage) -> None:
+        started = time.perf_counter()
         try:
-            payload = json.loads(msg.payload)
+            self._handle_message(msg)
+        finally:
+            self.telemetry.record_message(time.perf_counter() - started)
+
+    def _handle_message(self, msg: mqtt.MQTTMessage) -> None:
+        raw = msg.payload
+        if b'"print"' not in raw or RELEVANT_KEYS.search(raw) is None:
+            self.reports_skipped += 1
+            return
+
+        try:
+            payload = json.loads(raw)
         except (json.JSONDecodeError, UnicodeDecodeError):
             return
 
@@ -216,20 +295,22 @@ class Driver(BaseDriver):
         if not print_data:
             return
 
-        self._update_print_state(print_data)
+        changed = self._state.apply(print_data)
+        if "print" in changed:
+            self._print_state = self._state.print_fields(PRINT_STATE_FIELDS)
 
-        ams_data = print_data.get("ams")
-        if not ams_data:
+        # Deltas before the first full report may lack tray fields
+        if "ams" not in changed or not self._state.complete:
             return
 
-        ams_units_raw = ams_data.get("ams", [])
+        ams_units_raw = self._state.ams_units_raw()
         if not ams_units_raw:
             return
 
-        ams_hash = json.dumps(ams_units_raw, sort_keys=True)
-        if ams_hash == self._last_ams_hash:
+        fingerprint = ams_fingerprint(ams_units_raw)
+        if fingerprint == self._last_ams_fingerprint:
             return
-        self._last_ams_hash = ams_hash
+        self._last_ams_fingerprint = fingerprint
 
         ams_units = self._parse_ams_state(ams_units_raw)
         if not ams_units:
@@ -248,27 +329,6 @@ class Driver(BaseDriver):
         except Exception as e:
             logger.error(f"Failed to emit ams_state for printer {self.printer_id}: {e}")
 
-    def _update_print_state(self, print_data: dict[str, Any]) -> None:
-        """Extract print job status fields from Bambu MQTT payload."""
-        field_map = {
-            "gcode_state": "gcode_state",
-            "subtask_name": "subtask_name",
-            "gcode_file": "gcode_file",
-            "mc_percent": "mc_percent",
-            "mc_remaining_time": "mc_remaining_time",
-            "nozzle_temper": "nozzle_temper",
-            "nozzle_target_temper": "nozzle_target_temper",
-            "bed_temper": "bed_temper",
-            "bed_target_temper": "bed_target_temper",
-            "layer_num": "layer_num",
-            "total_layer_num": "total_layer_num",
-            "mc_print_stage": "mc_print_stage",
-        }
-        for src_key, dst_key in field_map.items():
-            val = print_data.get(src_key)
-            if val is not None:
-                self._print_state[dst_key] = val
-
     # ------------------------------------------------------------------ #
     #  Parse Bambu AMS data into Propus Spool event format
     # ------------------------------------------------------------------ #
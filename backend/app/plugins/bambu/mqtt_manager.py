@@ -0,0 +1,198 @@
+"""Drives the MQTT clients of all Bambu printers from the asyncio loop.
+
+paho's loop_forever() needs a thread per printer. Here each client's
+socket is registered with the event loop instead: readable sockets call
+loop_read(), pending writes call loop_write(), and a single task calls
+loop_misc() (keepalive pings) for every client once a second. A printer
+then costs one socket and no thread; only the blocking connect (TCP and
+TLS handshake) runs in the default executor.
+"""
+
+import asyncio
+import logging
+import threading
+from typing import Callable
+
+import paho.mqtt.client as mqtt
+
+logger = logging.getLogger(__name__)
+
+# Interval of loop_misc() for all clients
+MISC_INTERVAL = 1.0
+
+
+class MqttConnection:
+    """One printer's MQTT connection, reconnected after reconnect_delay seconds."""
+
+    def __init__(
+        self,
+        manager: "MqttConnectionManager",
+        name: str,
+        create_client: Callable[[], mqtt.Client],
+        host: str,
+        port: int,
+        keepalive: int,
+        reconnect_delay: float,
+    ):
+        self.manager = manager
+        self.name = name
+        self.create_client = create_client
+        self.host = host
+        self.port = port
+        self.keepalive = keepalive
+        self.reconnect_delay = reconnect_delay
+        self.client: mqtt.Client | None = None
+        self._loop = manager.loop
+        self._fd: int | None = None
+        self._closed = asyncio.Event()
+        self._running = False
+        self._task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        self._running = True
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        self._running = False
+        client = self.client
+        if client is not None:
+            try:
+                client.disconnect()
+            except Exception:
+                pass
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._detach()
+
+    # paho calls these from connect() in the executor as well, so they are
+    # moved to the loop thread
+
+    def _call_in_loop(self, callback: Callable[..., None], *args) -> None:
+        if threading.get_ident() == self.manager.loop_thread:
+            callback(*args)
+        else:
+            self._loop.call_soon_threadsafe(callback, *args)
+
+    def _on_socket_open(self, client, userdata, sock) -> None:
+        self._call_in_loop(self._attach, client, sock.fileno())
+
+    def _on_socket_close(self, client, userdata, sock) -> None:
+        self._call_in_loop(self._detach)
+
+    def _on_socket_register_write(self, client, userdata, sock) -> None:
+        self._call_in_loop(self._watch_write, client, True)
+
+    def _on_socket_unregister_write(self, client, userdata, sock) -> None:
+        self._call_in_loop(self._watch_write, client, False)
+
+    def _attach(self, client: mqtt.Client, fd: int) -> None:
+        self._fd = fd
+        self._loop.add_reader(fd, self._read, client)
+
+    def _detach(self) -> None:
+        if self._fd is not None:
+            self._loop.remove_reader(self._fd)
+            self._loop.remove_writer(self._fd)
+            self._fd = None
+        self._closed.set()
+
+    def _watch_write(self, client: mqtt.Client, enabled: bool) -> None:
+        if self._fd is None:
+            return
+        if enabled:
+            self._loop.add_writer(self._fd, self._write, client)
+        else:
+            self._loop.remove_writer(self._fd)
+
+    def _read(self, client: mqtt.Client) -> None:
+        if client.loop_read() != mqtt.MQTT_ERR_SUCCESS:
+            self._detach()
+
+    def _write(self, client: mqtt.Client) -> None:
+        if client.loop_write() != mqtt.MQTT_ERR_SUCCESS:
+            self._detach()
+
+    def misc(self) -> None:
+        client = self.client
+        if client is not None and self._fd is not None:
+            if client.loop_misc() != mqtt.MQTT_ERR_SUCCESS:
+                self._detach()
+
+    async def _run(self) -> None:
+        while self._running:
+            client = self.create_client()
+            client.on_socket_open = self._on_socket_open
+            client.on_socket_close = self._on_socket_close
+            client.on_socket_register_write = self._on_socket_register_write
+            client.on_socket_unregister_write = self._on_socket_unregister_write
+            self.client = client
+            self._closed.clear()
+
+            try:
+                await self._loop.run_in_executor(None, client.connect, self.host, self.port, self.keepalive)
+                await self._closed.wait()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Bambu MQTT error for {self.name}: {e}")
+                self._detach()
+
+            if self._running:
+                logger.info(f"Bambu reconnecting in {self.reconnect_delay}s for {self.name}")
+                await asyncio.sleep(self.reconnect_delay)
+
+
+class MqttConnectionManager:
+    """All MQTT connections of the process, on the loop they were opened on."""
+
+    def __init__(self):
+        self.connections: set[MqttConnection] = set()
+        self.loop: asyncio.AbstractEventLoop | None = None
+        self.loop_thread: int | None = None
+        self._misc_task: asyncio.Task | None = None
+
+    def connect(
+        self,
+        name: str,
+        create_client: Callable[[], mqtt.Client],
+        host: str,
+        port: int,
+        keepalive: int,
+        reconnect_delay: float,
+    ) -> MqttConnection:
+        loop = asyncio.get_running_loop()
+        if self.loop is not loop:
+            # First use, or a new loop (tests); connections of an old loop are gone
+            self.loop = loop
+            self.loop_thread = threading.get_ident()
+            self.connections.clear()
+            self._misc_task = None
+        connection = MqttConnection(self, name, create_client, host, port, keepalive, reconnect_delay)
+        self.connections.add(connection)
+        connection.start()
+        if self._misc_task is None or self._misc_task.done():
+            self._misc_task = loop.create_task(self._run_misc())
+        return connection
+
+    async def disconnect(self, connection: MqttConnection) -> None:
+        self.connections.discard(connection)
+        await connection.stop()
+        if not self.connections and self._misc_task is not None:
+            self._misc_task.cancel()
+            self._misc_task = None
+
+    async def _run_misc(self) -> None:
+        while True:
+            await asyncio.sleep(MISC_INTERVAL)
+            for connection in list(self.connections):
+                try:
+                    connection.misc()
+                except Exception as e:
+                    logger.warning(f"Bambu MQTT keepalive error for {connection.name}: {e}")
+
+
+mqtt_manager = MqttConnectionManager()
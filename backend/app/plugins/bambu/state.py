@@ -0,0 +1,121 @@
+"""Merged push_status state of a Bambu printer.
+
+Bambu printers send a full report in reply to "pushall" and afterwards
+mostly deltas: only the fields that changed, including AMS units and
+trays that carry just their id and the changed tray fields. The state
+applies every report on top of the previous one, so the driver always
+reads a complete snapshot.
+"""
+
+from typing import Any
+
+# Bookkeeping of the report itself, not printer state
+REPORT_KEYS = frozenset({"command", "msg", "sequence_id"})
+
+
+class BambuPrinterState:
+    def __init__(self):
+        self.print: dict[str, Any] = {}
+        # AMS unit id -> unit fields; "tray" is tray id -> tray fields
+        self.ams_units: dict[str, dict[str, Any]] = {}
+        # Top-level AMS fields (tray_now, tray_exist_bits, ...)
+        self.ams: dict[str, Any] = {}
+        self.full_reports = 0
+        self.delta_reports = 0
+
+    @property
+    def complete(self) -> bool:
+        """True once a full report was applied; deltas alone may miss fields."""
+        return self.full_reports > 0
+
+    def apply(self, print_data: dict[str, Any]) -> set[str]:
+        """Merge one report's "print" object; returns the changed parts ("print", "ams")."""
+        full = print_data.get("msg") == 0
+        if full:
+            self.full_reports += 1
+        else:
+            self.delta_reports += 1
+
+        changed: set[str] = set()
+        for key, value in print_data.items():
+            if key in REPORT_KEYS:
+                continue
+            if key == "ams":
+                if isinstance(value, dict) and self._apply_ams(value, full):
+                    changed.add("ams")
+            elif self.print.get(key, _MISSING) != value:
+                self.print[key] = value
+                changed.add("print")
+        return changed
+
+    def _apply_ams(self, ams_data: dict[str, Any], full: bool) -> bool:
+        changed = _merge(self.ams, {key: value for key, value in ams_data.items() if key != "ams"})
+        units = ams_data.get("ams")
+        if full and units is not None:
+            # A full report lists every unit, units not in it were removed
+            reported = {str(unit.get("id", "0")) for unit in units}
+            for unit_id in set(self.ams_units) - reported:
+                del self.ams_units[unit_id]
+                changed = True
+        for unit in units or ():
+            changed |= self._apply_unit(unit, full)
+        return changed
+
+    def _apply_unit(self, unit: dict[str, Any], full: bool) -> bool:
+        unit_id = str(unit.get("id", "0"))
+        merged = self.ams_units.get(unit_id)
+        changed = merged is None
+        if merged is None:
+            merged = self.ams_units[unit_id] = {"id": unit_id, "tray": {}}
+        changed |= _merge(merged, {key: value for key, value in unit.items() if key not in ("id", "tray")})
+
+        trays = unit.get("tray")
+        merged_trays = merged["tray"]
+        if full and trays is not None:
+            reported = {str(tray.get("id", "0")) for tray in trays}
+            for tray_id in set(merged_trays) - reported:
+                del merged_trays[tray_id]
+                changed = True
+        for tray in trays or ():
+            tray_id = str(tray.get("id", "0"))
+            current = merged_trays.get(tray_id)
+            # A tray reported with its id only is empty; a full report
+            # replaces the tray, a delta updates the fields it carries
+            if current is None or set(tray) == {"id"} or full:
+                replacement = {**tray, "id": tray_id}
+                if current != replacement:
+                    merged_trays[tray_id] = replacement
+                    changed = True
+            else:
+                changed |= _merge(current, tray)
+        return changed
+
+    def ams_units_raw(self) -> list[dict[str, Any]]:
+        """The merged AMS units in the shape of a full report's "ams" array."""
+        return [
+            {
+                **{key: value for key, value in unit.items() if key != "tray"},
+                "tray": [dict(tray) for _tray_id, tray in sorted(unit["tray"].items(), key=_by_id)],
+            }
+            for _unit_id, unit in sorted(self.ams_units.items(), key=_by_id)
+        ]
+
+    def print_fields(self, fields: tuple[str, ...]) -> dict[str, Any]:
+        return {key: self.print[key] for key in fields if self.print.get(key) is not None}
+
+
+def _merge(target: dict[str, Any], values: dict[str, Any]) -> bool:
+    changed = False
+    for key, value in values.items():
+        if target.get(key, _MISSING) != value:
+            target[key] = value
+            changed = True
+    return changed
+
+
+_MISSING = object()
+
+
+def _by_id(item: tuple[str, Any]) -> tuple[int, str]:
+    key = item[0]
+    return (int(key), key) if key.isdigit() else (1 << 30, key)
@@ -1,6 +1,8 @@
 from abc import ABC, abstractmethod
 from typing import Any, Callable
 
+from app.plugins.telemetry import driver_telemetry
+
 
 class BaseDriver(ABC):
     driver_key: str = ""
@@ -15,6 +17,8 @@ class BaseDriver(ABC):
         self.config = config
         self.emit = emitter
         self._running = False
+        # Drivers record received messages and connects here
+        self.telemetry = driver_telemetry.get(printer_id, self.driver_key)
 
     @abstractmethod
     async def start(self) -> None:
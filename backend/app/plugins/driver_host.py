@@ -0,0 +1,410 @@
+"""Runs printer drivers in worker processes instead of the API process.
+
+A worker process hosts the drivers of several printers on its own event
+loop. The API process talks to it over a multiprocessing pipe, whose
+messages are pickled tuples with a length prefix:
+
+    API -> worker:  ("start", request_id, printer_id, module, class_name, config)
+                    ("stop", request_id, printer_id)
+                    ("command", request_id, printer_id, command)
+                    ("shutdown",)
+    worker -> API:  ("reply", request_id, ok, value)
+                    ("event", printer_id, event)
+                    ("health", printer_id, health)
+                    ("telemetry", printer_id, method, args)
+
+In the API process each hosted driver is a RemoteDriver, so PluginManager
+uses it like any in-process driver. Driver parsing, polling and MQTT
+threads then compete for the worker's GIL and loop, not the API's.
+"""
+
+import asyncio
+import importlib
+import itertools
+import logging
+import multiprocessing
+import threading
+from typing import Any, Callable
+
+from app.plugins.base import BaseDriver
+from app.plugins.telemetry import driver_telemetry
+
+logger = logging.getLogger(__name__)
+
+# Seconds between health pushes of a worker (only changed health is sent)
+HEALTH_INTERVAL = 1.0
+# Seconds the API waits for a stop or command reply of a worker
+REQUEST_TIMEOUT = 10.0
+# Seconds a worker gets to exit after shutdown before it is terminated
+SHUTDOWN_TIMEOUT = 5.0
+
+
+class DriverHostError(RuntimeError):
+    pass
+
+
+# ------------------------------------------------------------------ #
+#  Worker process
+# ------------------------------------------------------------------ #
+
+class _TelemetryProxy:
+    """Stands in for the driver's telemetry and forwards it to the API process."""
+
+    def __init__(self, worker: "_Worker", printer_id: int):
+        self._worker = worker
+        self._printer_id = printer_id
+
+    def record_message(self, parse_seconds: float | None = None) -> None:
+        self._worker.send(("telemetry", self._printer_id, "record_message", (parse_seconds,)))
+
+    def record_connect(self) -> None:
+        self._worker.send(("telemetry", self._printer_id, "record_connect", ()))
+
+
+class _Worker:
+    def __init__(self, conn):
+        self.conn = conn
+        self.drivers: dict[int, BaseDriver] = {}
+        self._sent_health: dict[int, dict[str, Any]] = {}
+        self._starting: set[int] = set()
+        # Stops that arrived while the driver was still starting
+        self._cancelled: set[int] = set()
+        # Drivers send from their own threads (Bambu MQTT) too
+        self._send_lock = threading.Lock()
+
+    def send(self, message: tuple) -> None:
+        with self._send_lock:
+            try:
+                self.conn.send(message)
+            except (OSError, ValueError):
+                pass
+
+    async def run(self) -> None:
+        loop = asyncio.get_running_loop()
+        inbox: asyncio.Queue[tuple] = asyncio.Queue()
+
+        def read() -> None:
+            while True:
+                try:
+                    message = self.conn.recv()
+                except (EOFError, OSError):
+                    message = ("shutdown",)
+                loop.call_soon_threadsafe(inbox.put_nowait, message)
+                if message[0] == "shutdown":
+                    return
+
+        threading.Thread(target=read, name="driver-host-reader", daemon=True).start()
+        health_task = asyncio.create_task(self._push_health())
+        while True:
+            message = await inbox.get()
+            if message[0] == "shutdown":
+                break
+            asyncio.create_task(self._handle(message))
+
+        health_task.cancel()
+        for printer_id in list(self.drivers):
+            await self._stop(printer_id)
+
+    async def _handle(self, message: tuple) -> None:
+        kind, request_id, printer_id, *payload = message
+        try:
+            if kind == "start":
+                value = await self._start(printer_id, *payload)
+            elif kind == "stop":
+                value = await self._stop(printer_id)
+            elif kind == "command":
+                driver = self.drivers.get(printer_id)
+                value = await driver.send_command(payload[0]) if driver else False
+            else:
+                raise DriverHostError(f"Unknown message {kind}")
+        except Exception as e:
+            self.send(("reply", request_id, False, str(e)))
+            return
+        self.send(("reply", request_id, True, value))
+
+    async def _start(self, printer_id: int, module: str, class_name: str, config: dict) -> dict:
+        driver_class = getattr(importlib.import_module(module), class_name)
+        driver = driver_class(
+            printer_id=printer_id,
+            config=config,
+            emitter=lambda event: self.send(("event", printer_id, event)),
+        )
+        driver.telemetry = _TelemetryProxy(self, printer_id)
+        driver.validate_config()
+        self._starting.add(printer_id)
+        try:
+            await driver.start()
+        except Exception:
+            await driver.stop()
+            raise
+        finally:
+            # Cleared on failure as well, or the next start would be torn down
+            self._starting.discard(printer_id)
+            cancelled = printer_id in self._cancelled
+            self._cancelled.discard(printer_id)
+        if cancelled:
+            # The API gave up waiting (startup timeout) and already sent stop
+            await driver.stop()
+            raise DriverHostError("Driver start cancelled")
+        self.drivers[printer_id] = driver
+        health = self._sent_health[printer_id] = driver.health()
+        return health
+
+    async def _stop(self, printer_id: int) -> None:
+        if printer_id in self._starting:
+            self._cancelled.add(printer_id)
+        driver = self.drivers.pop(printer_id, None)
+        self._sent_health.pop(printer_id, None)
+        if driver is not None:
+            await driver.stop()
+
+    async def _push_health(self) -> None:
+        while True:
+            await asyncio.sleep(HEALTH_INTERVAL)
+            for printer_id, driver in list(self.drivers.items()):
+                try:
+                    health = driver.health()
+                except Exception as e:
+                    health = {"status": "error", "message": str(e)}
+                if health != self._sent_health.get(printer_id):
+                    self._sent_health[printer_id] = health
+                    self.send(("health", printer_id, health))
+
+
+def run_worker(conn) -> None:
+    """Entry point of a worker process."""
+    from app.core.logging_config import setup_logging
+
+    setup_logging()
+    try:
+        asyncio.run(_Worker(conn).run())
+    except KeyboardInterrupt:
+        pass
+
+
+# ------------------------------------------------------------------ #
+#  API process
+# ------------------------------------------------------------------ #
+
+class WorkerProcess:
+    """A worker process and the pipe to it, seen from the API process."""
+
+    def __init__(self, index: int, on_exit: Callable[["WorkerProcess"], None]):
+        self.index = index
+        self.drivers: dict[int, "RemoteDriver"] = {}
+        self._on_exit = on_exit
+        self._pending: dict[int, asyncio.Future] = {}
+        self._request_ids = itertools.count(1)
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self.exited = False
+        self._closing = False
+
+        # spawn: the API process runs threads and an event loop, fork would copy them
+        context = multiprocessing.get_context("spawn")
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(
+            target=run_worker,
+            args=(child_conn,),
+            name=f"propus-driver-host-{index}",
+            daemon=True,
+        )
+        self._child_conn = child_conn
+
+    def start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self.process.start()
+        self._child_conn.close()
+        threading.Thread(target=self._read, name=f"driver-host-{self.index}-reader", daemon=True).start()
+        logger.info(f"Started driver host process {self.index} (pid {self.process.pid})")
+
+    def _read(self) -> None:
+        while True:
+            try:
+                message = self.conn.recv()
+            except (EOFError, OSError):
+                self._loop.call_soon_threadsafe(self._exited)
+                return
+            self._loop.call_soon_threadsafe(self._dispatch, message)
+
+    def _dispatch(self, message: tuple) -> None:
+        kind = message[0]
+        if kind == "reply":
+            _, request_id, ok, value = message
+            future = self._pending.pop(request_id, None)
+            if future is not None and not future.done():
+                if ok:
+                    future.set_result(value)
+                else:
+                    future.set_exception(DriverHostError(value))
+            return
+
+        printer_id = message[1]
+        driver = self.drivers.get(printer_id)
+        if kind == "event":
+            if driver is not None:
+                driver.emit(message[2])
+        elif kind == "health":
+            if driver is not None:
+                driver.remote_health = message[2]
+        elif kind == "telemetry":
+            _, _, method, args = message
+            getattr(driver_telemetry.get(printer_id), method)(*args)
+
+    def _exited(self) -> None:
+        if self.exited:
+            return
+        self.exited = True
+        for future in self._pending.values():
+            if not future.done():
+                future.set_exception(DriverHostError("Driver host process exited"))
+        self._pending.clear()
+        if self._closing:
+            return
+        logger.warning(
+            f"Driver host process {self.index} exited "
+            f"(exit code {self.process.exitcode}), printers {sorted(self.drivers)}"
+        )
+        self._on_exit(self)
+
+    async def request(self, kind: str, printer_id: int, *payload: Any, timeout: float | None = REQUEST_TIMEOUT) -> Any:
+        if self.exited:
+            raise DriverHostError("Driver host process exited")
+        request_id = next(self._request_ids)
+        future = self._loop.create_future()
+        self._pending[request_id] = future
+        try:
+            self.conn.send((kind, request_id, printer_id, *payload))
+            return await asyncio.wait_for(future, timeout)
+        finally:
+            self._pending.pop(request_id, None)
+
+    async def close(self) -> None:
+        self._closing = True
+        if not self.exited:
+            try:
+                self.conn.send(("shutdown",))
+            except (OSError, ValueError):
+                pass
+        await asyncio.get_running_loop().run_in_executor(None, self.process.join, SHUTDOWN_TIMEOUT)
+        if self.process.is_alive():
+            logger.warning(f"Driver host process {self.index} did not exit, terminating")
+            self.process.terminate()
+        self.conn.close()
+
+
+class RemoteDriver(BaseDriver):
+    """Proxy of a driver running in a worker process.
+
+    Config validation and camera config only depend on driver_config, so
+    they run on a local, never started instance of the driver class.
+    Health is the last state pushed by the worker.
+    """
+
+    def __init__(
+        self,
+        printer_id: int,
+        config: dict[str, Any],
+        emitter: Callable[[dict[str, Any]], None],
+        driver_class: type[BaseDriver],
+        host: "DriverHost",
+    ):
+        self.driver_key = driver_class.driver_key
+        super().__init__(printer_id, config, emitter)
+        self.driver_class = driver_class
+        self.host = host
+        self.worker: WorkerProcess | None = None
+        self.remote_health: dict[str, Any] = {}
+        self._local = driver_class(printer_id=printer_id, config=config, emitter=emitter)
+
+    def validate_config(self) -> None:
+        self._local.validate_config()
+
+    def get_camera_config(self) -> dict[str, str] | None:
+        if hasattr(self._local, "get_camera_config"):
+            return self._local.get_camera_config()
+        return None
+
+    async def start(self) -> None:
+        self.worker = self.host.assign(self)
+        try:
+            self.remote_health = await self.worker.request(
+                "start",
+                self.printer_id,
+                self.driver_class.__module__,
+                self.driver_class.__qualname__,
+                self.config,
+                timeout=None,
+            )
+        except BaseException:
+            self.host.release(self)
+            raise
+        self._running = True
+
+    async def stop(self) -> None:
+        self._running = False
+        worker = self.worker
+        if worker is None:
+            return
+        try:
+            if not worker.exited:
+                await worker.request("stop", self.printer_id)
+        finally:
+            # Released after the stop, so events sent while stopping arrive
+            self.host.release(self)
+
+    async def send_command(self, command: dict[str, Any]) -> bool:
+        if self.worker is None:
+            return False
+        return await self.worker.request("command", self.printer_id, command)
+
+    def health(self) -> dict[str, Any]:
+        if self.worker is not None and self.worker.exited:
+            return {
+                "driver_key": self.driver_key,
+                "printer_id": self.printer_id,
+                "running": False,
+                "status": "error",
+                "message": "Driver host process exited",
+            }
+        health = {
+            "driver_key": self.driver_key,
+            "printer_id": self.printer_id,
+            "running": self._running,
+            **self.remote_health,
+        }
+        if self.worker is not None:
+            health["host_process"] = self.worker.index
+        return health
+
+
+class DriverHost:
+    """Pool of worker processes; each printer goes to the least loaded one."""
+
+    def __init__(self, workers: int, on_exit: Callable[[list[int]], None] | None = None):
+        self.size = max(workers, 1)
+        self.workers: list[WorkerProcess | None] = [None] * self.size
+        self._on_exit = on_exit
+
+    def assign(self, driver: RemoteDriver) -> WorkerProcess:
+        for index, worker in enumerate(self.workers):
+            if worker is None or worker.exited:
+                self.workers[index] = worker = WorkerProcess(index, self._worker_exited)
+                worker.start()
+        worker = min(self.workers, key=lambda w: len(w.drivers))
+        worker.drivers[driver.printer_id] = driver
+        return worker
+
+    def release(self, driver: RemoteDriver) -> None:
+        if driver.worker is not None:
+            driver.worker.drivers.pop(driver.printer_id, None)
+
+    def _worker_exited(self, worker: WorkerProcess) -> None:
+        printer_ids = sorted(worker.drivers)
+        if self._on_exit is not None and printer_ids:
+            self._on_exit(printer_ids)
+
+    async def close(self) -> None:
+        for index, worker in enumerate(self.workers):
+            if worker is not None:
+                await worker.close()
+                self.workers[index] = None
@@ -32,6 +32,7 @@ class Driver(BaseDriver):
         self._initial_state_sent = False
         self._last_slot_spools: dict[int, int | None] = {}
         self._print_state: dict[str, Any] = {}
+        self._reachable = False
 
     def validate_config(self) -> None:
         host = self.config.get("host")
@@ -112,6 +113,14 @@ class Driver(BaseDriver):
                     info = await self._get_printer_info(client, host)
                     if info:
                         self._printer_state = info.get("state", "unknown")
+                        # Each poll counts as a message; Moonraker answers are
+                        # parsed by httpx, so there is no parse time to record
+                        self.telemetry.record_message()
+                        if not self._reachable:
+                            self._reachable = True
+                            self.telemetry.record_connect()
+                    else:
+                        self._reachable = False
 
                     await self._poll_print_status(client, host)
 
@@ -129,6 +138,7 @@ class Driver(BaseDriver):
             except httpx.RequestError as e:
                 logger.debug(f"Klipper poll error for printer {self.printer_id}: {e}")
                 self._printer_state = "unreachable"
+                self._reachable = False
             except Exception as e:
                 logger.warning(f"Klipper poll error for printer {self.printer_id}: {e}")
 
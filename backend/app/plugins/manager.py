@@ -1,111 +1,388 @@
+import asyncio
 import importlib
 import logging
 import time
+from collections import deque
 from datetime import datetime
+from dataclasses import asdict, dataclass
 from typing import Any, Callable
 
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.config import settings
 from app.core.database import async_session_maker
 from app.models import Printer
 from app.plugins.base import BaseDriver
+from app.plugins.driver_host import DriverHost, RemoteDriver
+from app.plugins.telemetry import driver_telemetry, render_prometheus
 from app.services.ams_slots_service import AmsSlotsService
+from app.services.printer_event_bus import printer_event_bus
 
 logger = logging.getLogger(__name__)
 
 MANUAL_RESEND_COOLDOWN = 60
+# Seconds stop_printer waits for queued events before cancelling the worker
+EVENT_DRAIN_TIMEOUT = 5.0
+# Seconds between print_state diffs pushed to subscribers
+PRINT_STATE_PUBLISH_INTERVAL = 2.0
+# Upper bound of the retry delay of a failed driver start
+PRINTER_START_RETRY_MAX = 600.0
+
+
+class PrinterEventQueue:
+    """Bounded FIFO of driver events for one printer.
+
+    Events are handled strictly in order by the event writer. An ams_state is a
+    full snapshot, so a new one replaces an ams_state still waiting. When
+    the queue is full the oldest event is dropped.
+
+    asyncio.Queue cannot remove queued items, hence the deque.
+    """
+
+    def __init__(self, printer_id: int, maxsize: int, wakeup: asyncio.Event):
+        self.printer_id = printer_id
+        self.maxsize = maxsize
+        self._events: deque[dict[str, Any]] = deque()
+        self._wakeup = wakeup
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self.received = 0
+        self.processed = 0
+        self.dropped = 0
+        self.superseded = 0
+
+    def __len__(self) -> int:
+        return len(self._events)
+
+    def put(self, event: dict[str, Any]) -> None:
+        self.received += 1
+        if event.get("event_type") == "ams_state":
+            for queued in self._events:
+                if queued.get("event_type") == "ams_state":
+                    self._events.remove(queued)
+                    self.superseded += 1
+                    break
+        if len(self._events) >= self.maxsize:
+            dropped = self._events.popleft()
+            self.dropped += 1
+            logger.warning(
+                f"Event queue of printer {self.printer_id} full, "
+                f"dropped {dropped.get('event_type')} event"
+            )
+        self._events.append(event)
+        self._idle.clear()
+        self._wakeup.set()
+
+    def pop(self) -> dict[str, Any] | None:
+        return self._events.popleft() if self._events else None
+
+    def task_done(self) -> None:
+        self.processed += 1
+        if not self._events:
+            self._idle.set()
+
+    async def join(self) -> None:
+        """Wait until every queued event has been handled."""
+        await self._idle.wait()
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "depth": len(self._events),
+            "received": self.received,
+            "processed": self.processed,
+            "dropped": self.dropped,
+            "superseded": self.superseded,
+        }
 
 
 class EventEmitter:
     def __init__(self, printer_id: int, handler: Callable[[dict], None]):
         self.printer_id = printer_id
         self.handler = handler
+        self.telemetry = driver_telemetry.get(printer_id)
 
     def emit(self, event_dict: dict[str, Any]) -> None:
         event_dict["printer_id"] = self.printer_id
         if "event_at" not in event_dict:
             event_dict["event_at"] = datetime.utcnow().isoformat()
+        # Monotonic emit time, for the emit-to-persist latency
+        event_dict["_emitted_at"] = time.monotonic()
+        self.telemetry.record_emit()
         try:
             self.handler(event_dict)
         except Exception as e:
             logger.error(f"Error handling event for printer {self.printer_id}: {e}")
 
 
+@dataclass
+class EventWriterStats:
+    """Per-batch figures of the event writer, to tune batch size against latency."""
+
+    batches: int = 0
+    events: int = 0
+    failed_batches: int = 0
+    last_batch_size: int = 0
+    last_batch_ms: float = 0.0
+    avg_batch_ms: float = 0.0
+    max_batch_ms: float = 0.0
+
+    def record(self, size: int, duration_ms: float, failed: bool) -> None:
+        self.batches += 1
+        self.events += size
+        if failed:
+            self.failed_batches += 1
+        self.last_batch_size = size
+        self.last_batch_ms = duration_ms
+        self.avg_batch_ms += (duration_ms - self.avg_batch_ms) / self.batches
+        self.max_batch_ms = max(self.max_batch_ms, duration_ms)
+
+
+@dataclass
+class StartupProgress:
+    """Driver starts of start_all, reported by /health/ready."""
+
+    state: str = "pending"
+    total: int = 0
+    started: int = 0
+    failed: int = 0
+
+    @property
+    def pending(self) -> int:
+        return self.total - self.started - self.failed
+
+    def as_dict(self) -> dict[str, Any]:
+        return {**asdict(self), "pending": self.pending}
+
+
 class PluginManager:
     def __init__(self):
         self.drivers: dict[int, BaseDriver] = {}
         self.health_status: dict[int, dict[str, Any]] = {}
         self._manual_resend_timestamps: dict[str, float] = {}
+        self.event_queues: dict[int, PrinterEventQueue] = {}
+        self.writer_stats = EventWriterStats()
+        self._events_pending = asyncio.Event()
+        self._event_writer: asyncio.Task | None = None
+        self._print_state_publisher: asyncio.Task | None = None
+        self._published_print_state: dict[int, dict[str, Any]] = {}
+        self.startup = StartupProgress()
+        self._startup_task: asyncio.Task | None = None
+        self._retry_tasks: dict[int, asyncio.Task] = {}
+        self._retry_attempts: dict[int, int] = {}
+        self.driver_host: DriverHost | None = None
+        if settings.printer_driver_workers > 0:
+            self.driver_host = DriverHost(settings.printer_driver_workers, self._on_driver_host_exit)
 
     def _create_event_handler(self, printer_id: int) -> Callable[[dict], None]:
         def handler(event: dict) -> None:
-            import asyncio
-
-            asyncio.create_task(self._handle_event(printer_id, event))
+            self._enqueue_event(printer_id, event)
 
         return handler
 
+    def _enqueue_event(self, printer_id: int, event: dict) -> None:
+        queue = self.event_queues.get(printer_id)
+        if queue is None:
+            queue = self.event_queues[printer_id] = PrinterEventQueue(
+                printer_id, settings.printer_event_queue_size, self._events_pending
+            )
+        if self._event_writer is None or self._event_writer.done():
+            self._event_writer = asyncio.create_task(self._run_event_writer())
+        queue.put(event)
+
+    def _take_events(self, batch: list[tuple[PrinterEventQueue, dict]], limit: int) -> None:
+        """Take queued events round-robin over the printers, in order per printer."""
+        while len(batch) < limit:
+            taken = False
+            for queue in list(self.event_queues.values()):
+                event = queue.pop()
+                if event is None:
+                    continue
+                batch.append((queue, event))
+                taken = True
+                if len(batch) >= limit:
+                    return
+            if not taken:
+                return
+
+    async def _next_event_batch(self) -> list[tuple[PrinterEventQueue, dict]]:
+        batch_size = max(1, settings.printer_event_batch_size)
+        max_delay = settings.printer_event_batch_delay_ms / 1000
+        batch: list[tuple[PrinterEventQueue, dict]] = []
+
+        while not batch:
+            await self._events_pending.wait()
+            self._events_pending.clear()
+            self._take_events(batch, batch_size)
+
+        deadline = time.monotonic() + max_delay
+        while len(batch) < batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                await asyncio.wait_for(self._events_pending.wait(), remaining)
+            except asyncio.TimeoutError:
+                break
+            self._events_pending.clear()
+            self._take_events(batch, batch_size)
+
+        # Events left behind by a full batch start the next one right away
+        if any(len(queue) for queue in self.event_queues.values()):
+            self._events_pending.set()
+        return batch
+
+    async def _run_event_writer(self) -> None:
+        """Write the events of all printers in micro-batches, one transaction each."""
+        while True:
+            batch = await self._next_event_batch()
+            started = time.monotonic()
+            failed = False
+            try:
+                failed = not await self._write_event_batch(batch)
+            finally:
+                duration_ms = (time.monotonic() - started) * 1000
+                self.writer_stats.record(len(batch), duration_ms, failed)
+                logger.debug(f"Wrote event batch of {len(batch)} in {duration_ms:.1f} ms")
+                persisted_at = time.monotonic()
+                for queue, event in batch:
+                    queue.task_done()
+                    self._record_persisted(queue.printer_id, event, persisted_at)
+
+    def _record_persisted(self, printer_id: int, event: dict, persisted_at: float) -> None:
+        emitted_at = event.get("_emitted_at")
+        if emitted_at is not None:
+            driver_telemetry.get(printer_id).record_persisted(persisted_at - emitted_at)
+
+    async def _write_event_batch(self, batch: list[tuple[PrinterEventQueue, dict]]) -> bool:
+        """Apply a batch in one transaction.
+
+        If any event fails, the batch is rolled back and every event is
+        applied on its own, so one bad event costs only itself.
+        """
+        manual_conflicts: list[dict[str, Any]] = []
+        try:
+            async with async_session_maker() as db:
+                service = AmsSlotsService(db, autocommit=False)
+                for queue, event in batch:
+                    manual_conflicts.extend(await self._apply_event(service, queue.printer_id, event))
+                await db.commit()
+        except Exception as e:
+            logger.warning(f"Event batch of {len(batch)} failed ({e}), applying events one by one")
+            for queue, event in batch:
+                await self._handle_event(queue.printer_id, event)
+            return False
+
+        for conflict in manual_conflicts:
+            await self._resend_manual_filament(conflict)
+        return True
+
+    async def _drain_events(self, printer_id: int) -> None:
+        queue = self.event_queues.get(printer_id)
+        if queue is None:
+            return
+        try:
+            await asyncio.wait_for(queue.join(), EVENT_DRAIN_TIMEOUT)
+        except asyncio.TimeoutError:
+            logger.warning(
+                f"{len(queue)} queued events of printer {printer_id} not written on stop"
+            )
+
     async def _handle_event(self, printer_id: int, event: dict) -> None:
+        """Apply a single event in its own session and transaction."""
+        async with async_session_maker() as db:
+            try:
+                manual_conflicts = await self._apply_event(AmsSlotsService(db), printer_id, event)
+            except Exception as e:
+                logger.error(f"Error persisting event for printer {printer_id}: {e}")
+                return
+
+        for conflict in manual_conflicts:
+            await self._resend_manual_filament(conflict)
+
+    async def _apply_event(
+        self,
+        service: AmsSlotsService,
+        printer_id: int,
+        event: dict,
+    ) -> list[dict[str, Any]]:
+        """Apply a driver event; returns manual slot conflicts to re-send."""
         event_type = event.get("event_type")
         event_at_str = event.get("event_at")
         event_at = datetime.fromisoformat(event_at_str) if event_at_str else datetime.utcnow()
+        manual_conflicts: list[dict[str, Any]] = []
+
+        if event_type == "spool_inserted":
+            slot = event.get("slot", {})
+            identifiers = event.get("identifiers", {})
+            await service.apply_spool_inserted(
+                printer_id=printer_id,
+                slot_no=slot.get("slot_no", 1),
+                event_at=event_at,
+                rfid_uid=identifiers.get("rfid_uid"),
+                external_id=identifiers.get("external_id"),
+                ams_unit_no=slot.get("ams_unit_no"),
+                meta=event.get("meta"),
+            )
 
-        async with async_session_maker() as db:
-            try:
-                service = AmsSlotsService(db)
-
-                if event_type == "spool_inserted":
-                    slot = event.get("slot", {})
-                    identifiers = event.get("identifiers", {})
-                    await service.apply_spool_inserted(
-                        printer_id=printer_id,
-                        slot_no=slot.get("slot_no", 1),
-                        event_at=event_at,
-                        rfid_uid=identifiers.get("rfid_uid"),
-                        external_id=identifiers.get("external_id"),
-                        ams_unit_no=slot.get("ams_unit_no"),
-                        meta=event.get("meta"),
-                    )
-
-                elif event_type == "spool_removed":
-                    slot = event.get("slot", {})
-                    await service.apply_spool_removed(
-                        printer_id=printer_id,
-                        slot_no=slot.get("slot_no", 1),
-                        event_at=event_at,
-                        ams_unit_no=slot.get("ams_unit_no"),
-                        meta=event.get("meta"),
-                    )
-
-                elif event_type == "unknown_spool_detected":
-                    slot = event.get("slot", {})
-                    identifiers = event.get("identifiers", {})
-                    await service.apply_unknown_spool_detected(
-                        printer_id=printer_id,
-                        slot_no=slot.get("slot_no", 1),
-                        event_at=event_at,
-                        rfid_uid=identifiers.get("rfid_uid"),
-                        external_id=identifiers.get("external_id"),
-                        ams_unit_no=slot.get("ams_unit_no"),
-                        meta=event.get("meta"),
-                    )
-
-                elif event_type == "ams_state":
-                    ams_units = event.get("ams_units", [])
-                    _events, manual_conflicts = await service.apply_ams_state(
-                        printer_id=printer_id,
-                        state=ams_units,
-                        event_at=event_at,
-                    )
-
-                    for conflict in manual_conflicts:
-                        await self._resend_manual_filament(conflict)
-
-                logger.info(f"Handled event {event_type} for printer {printer_id}")
+        elif event_type == "spool_removed":
+            slot = event.get("slot", {})
+            await service.apply_spool_removed(
+                printer_id=printer_id,
+                slot_no=slot.get("slot_no", 1),
+                event_at=event_at,
+                ams_unit_no=slot.get("ams_unit_no"),
+                meta=event.get("meta"),
+            )
+
+        elif event_type == "unknown_spool_detected":
+            slot = event.get("slot", {})
+            identifiers = event.get("identifiers", {})
+            await service.apply_unknown_spool_detected(
+                printer_id=printer_id,
+                slot_no=slot.get("slot_no", 1),
+                event_at=event_at,
+                rfid_uid=identifiers.get("rfid_uid"),
+                external_id=identifiers.get("external_id"),
+                ams_unit_no=slot.get("ams_unit_no"),
+                meta=event.get("meta"),
+            )
+
+        elif event_type == "ams_state":
+            ams_units = event.get("ams_units", [])
+            _events, manual_conflicts = await service.apply_ams_state(
+                printer_id=printer_id,
+                state=ams_units,
+                event_at=event_at,
+            )
 
+        logger.info(f"Handled event {event_type} for printer {printer_id}")
+        return manual_conflicts
+
+    def publish_print_state_changes(self) -> None:
+        """Push the print_state fields that changed since the last call."""
+        for printer_id, state in self.get_all_printer_status().items():
+            previous = self._published_print_state.get(printer_id, {})
+            changes = {key: value for key, value in state.items() if previous.get(key) != value}
+            self._published_print_state[printer_id] = dict(state)
+            if changes:
+                printer_event_bus.publish({
+                    "type": "print_state",
+                    "printer_id": printer_id,
+                    "changes": changes,
+                })
+
+    async def _run_print_state_publisher(self) -> None:
+        while True:
+            await asyncio.sleep(PRINT_STATE_PUBLISH_INTERVAL)
+            if not printer_event_bus.subscriber_count:
+                # Nobody listens: the next subscriber starts from a full state
+                self._published_print_state.clear()
+                continue
+            try:
+                self.publish_print_state_changes()
             except Exception as e:
-                logger.error(f"Error persisting event for printer {printer_id}: {e}")
+                logger.error(f"Error publishing print state: {e}")
 
     def load_driver(self, driver_key: str) -> type[BaseDriver] | None:
         try:
@@ -118,6 +395,13 @@ class PluginManager:
         return None
 
     async def start_printer(self, printer: Printer) -> bool:
+        """Validate and start the driver of a printer.
+
+        A start that fails or takes longer than the startup timeout is
+        retried in the background; an invalid driver_config is not, it
+        needs a printer update, which starts the driver again.
+        """
+        self._cancel_retry(printer.id)
         if printer.id in self.drivers:
             return True
 
@@ -134,26 +418,96 @@ class PluginManager:
         config = printer.driver_config or {}
 
         try:
-            driver = driver_class(
-                printer_id=printer.id,
-                config=config,
-                emitter=emitter.emit,
-            )
+            if self.driver_host is not None:
+                driver = RemoteDriver(
+                    printer_id=printer.id,
+                    config=config,
+                    emitter=emitter.emit,
+                    driver_class=driver_class,
+                    host=self.driver_host,
+                )
+            else:
+                driver = driver_class(
+                    printer_id=printer.id,
+                    config=config,
+                    emitter=emitter.emit,
+                )
             driver.validate_config()
-            await driver.start()
-            self.drivers[printer.id] = driver
-            self.health_status[printer.id] = driver.health()
-            logger.info(f"Started driver {printer.driver_key} for printer {printer.id}")
-            return True
         except Exception as e:
-            logger.error(f"Error starting driver for printer {printer.id}: {e}")
+            logger.error(f"Invalid driver config for printer {printer.id}: {e}")
             self.health_status[printer.id] = {
                 "status": "error",
                 "message": str(e),
             }
             return False
 
+        timeout = settings.printer_start_timeout_seconds
+        try:
+            await asyncio.wait_for(driver.start(), timeout)
+        except Exception as e:
+            if isinstance(e, asyncio.TimeoutError):
+                message = f"Driver start timed out after {timeout:g}s"
+            else:
+                message = str(e)
+            logger.error(f"Error starting driver for printer {printer.id}: {message}")
+            await self._stop_driver(printer.id, driver)
+            self.health_status[printer.id] = {
+                "status": "error",
+                "message": message,
+            }
+            self._schedule_retry(printer.id)
+            return False
+
+        self.drivers[printer.id] = driver
+        self.health_status[printer.id] = driver.health()
+        self._retry_attempts.pop(printer.id, None)
+        logger.info(f"Started driver {printer.driver_key} for printer {printer.id}")
+        return True
+
+    async def _stop_driver(self, printer_id: int, driver: BaseDriver) -> None:
+        # Releases what a timed out or failed start already set up
+        try:
+            await asyncio.wait_for(driver.stop(), settings.printer_start_timeout_seconds)
+        except Exception as e:
+            logger.warning(f"Error stopping failed driver of printer {printer_id}: {e}")
+
+    def _schedule_retry(self, printer_id: int) -> None:
+        attempts = self._retry_attempts.get(printer_id, 0)
+        self._retry_attempts[printer_id] = attempts + 1
+        delay = min(settings.printer_start_retry_seconds * 2 ** attempts, PRINTER_START_RETRY_MAX)
+        self.health_status[printer_id]["retry_in_s"] = delay
+        self._retry_tasks[printer_id] = asyncio.create_task(self._retry_start(printer_id, delay))
+
+    def _cancel_retry(self, printer_id: int) -> None:
+        task = self._retry_tasks.pop(printer_id, None)
+        if task is not None and task is not asyncio.current_task():
+            task.cancel()
+
+    async def _retry_start(self, printer_id: int, delay: float) -> None:
+        await asyncio.sleep(delay)
+        async with async_session_maker() as db:
+            printer = await db.get(Printer, printer_id)
+        if printer is None or not printer.is_active or printer.deleted_at is not None:
+            self._retry_tasks.pop(printer_id, None)
+            self._retry_attempts.pop(printer_id, None)
+            self.health_status.pop(printer_id, None)
+            return
+        logger.info(f"Retrying driver start for printer {printer_id}")
+        await self.start_printer(printer)
+
+    def _on_driver_host_exit(self, printer_ids: list[int]) -> None:
+        """A driver host process died: restart its printers like failed starts."""
+        for printer_id in printer_ids:
+            self.drivers.pop(printer_id, None)
+            self.health_status[printer_id] = {
+                "status": "error",
+                "message": "Driver host process exited",
+            }
+            self._schedule_retry(printer_id)
+
     async def stop_printer(self, printer_id: int) -> None:
+        self._cancel_retry(printer_id)
+        self._retry_attempts.pop(printer_id, None)
         driver = self.drivers.pop(printer_id, None)
         if driver:
             try:
@@ -161,8 +515,16 @@ class PluginManager:
                 logger.info(f"Stopped driver for printer {printer_id}")
             except Exception as e:
                 logger.error(f"Error stopping driver for printer {printer_id}: {e}")
+        await self._drain_events(printer_id)
+        driver_telemetry.discard(printer_id)
 
     async def start_all(self) -> None:
+        """Start the drivers of all active printers in the background.
+
+        Up to printer_start_concurrency drivers start at once, so a slow
+        printer neither holds back the others nor the app startup; the
+        progress is in self.startup.
+        """
         async with async_session_maker() as db:
             result = await db.execute(
                 select(Printer).where(
@@ -172,12 +534,51 @@ class PluginManager:
             )
             printers = result.scalars().all()
 
-            for printer in printers:
-                await self.start_printer(printer)
+        self.startup = StartupProgress(state="running", total=len(printers))
+        for printer in printers:
+            self.health_status.setdefault(printer.id, {"status": "starting"})
+        self._startup_task = asyncio.create_task(self._start_printers(printers))
+
+        if self._print_state_publisher is None:
+            self._print_state_publisher = asyncio.create_task(self._run_print_state_publisher())
+
+    async def _start_printers(self, printers: list[Printer]) -> None:
+        semaphore = asyncio.Semaphore(max(settings.printer_start_concurrency, 1))
+
+        async def start(printer: Printer) -> None:
+            async with semaphore:
+                if await self.start_printer(printer):
+                    self.startup.started += 1
+                else:
+                    self.startup.failed += 1
+
+        await asyncio.gather(*(start(printer) for printer in printers))
+        self.startup.state = "done"
+        logger.info(
+            f"Driver startup done: {self.startup.started} started, {self.startup.failed} failed"
+        )
+
+    async def wait_started(self) -> None:
+        """Wait until the driver starts of start_all have finished."""
+        if self._startup_task is not None:
+            await self._startup_task
 
     async def stop_all(self) -> None:
+        if self._startup_task is not None:
+            self._startup_task.cancel()
+            self._startup_task = None
+        for printer_id in list(self._retry_tasks):
+            self._cancel_retry(printer_id)
         for printer_id in list(self.drivers.keys()):
             await self.stop_printer(printer_id)
+        if self.driver_host is not None:
+            await self.driver_host.close()
+        if self._event_writer is not None:
+            self._event_writer.cancel()
+            self._event_writer = None
+        if self._print_state_publisher is not None:
+            self._print_state_publisher.cancel()
+            self._print_state_publisher = None
 
     async def _resend_manual_filament(self, conflict: dict[str, Any]) -> None:
         """Re-send set_filament for a manually assigned slot that the driver tried to overwrite."""
@@ -231,8 +632,26 @@ class PluginManager:
     def get_health(self) -> dict[int, dict[str, Any]]:
         for printer_id, driver in self.drivers.items():
             self.health_status[printer_id] = driver.health()
+            queue = self.event_queues.get(printer_id)
+            if queue is not None:
+                self.health_status[printer_id]["event_queue"] = queue.stats()
+            self.health_status[printer_id]["telemetry"] = driver_telemetry.get(printer_id).snapshot()
         return self.health_status
 
+    def render_metrics(self) -> str:
+        """Driver telemetry and queue depths in Prometheus text format."""
+        queue_depths = {printer_id: len(queue) for printer_id, queue in self.event_queues.items()}
+        return render_prometheus(driver_telemetry.snapshot(), queue_depths)
+
+    def get_startup_progress(self) -> dict[str, Any]:
+        return self.startup.as_dict()
+
+    def get_event_queue_stats(self) -> dict[int, dict[str, int]]:
+        return {printer_id: queue.stats() for printer_id, queue in self.event_queues.items()}
+
+    def get_event_writer_stats(self) -> EventWriterStats:
+        return self.writer_stats
+
     def get_printer_status(self, printer_id: int) -> dict[str, Any]:
         driver = self.drivers.get(printer_id)
         if not driver:
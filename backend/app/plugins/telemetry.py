@@ -0,0 +1,198 @@
+"""Per-printer driver telemetry, kept in fixed-size ring buffers.
+
+Drivers record received messages, their parse time and (re)connects; the
+EventEmitter and the event writer record emitted events and how long they
+took to be persisted. Bambu drivers record from their MQTT thread, hence
+the lock per printer.
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Any
+
+# Samples kept per printer and figure; memory stays constant per printer
+SAMPLE_SIZE = 256
+# Window of the message rate
+RATE_WINDOW_SECONDS = 60.0
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+def _quantile(samples: list[float], q: float) -> float:
+    """Nearest-rank quantile of sorted samples."""
+    index = min(len(samples) - 1, max(0, round(q * len(samples)) - 1))
+    return samples[index]
+
+
+class _Samples:
+    """Last SAMPLE_SIZE values plus running count and sum of all values."""
+
+    def __init__(self):
+        self.values: deque[float] = deque(maxlen=SAMPLE_SIZE)
+        self.count = 0
+        self.total = 0.0
+
+    def add(self, value: float) -> None:
+        self.values.append(value)
+        self.count += 1
+        self.total += value
+
+    def summary(self) -> dict[str, Any]:
+        values = sorted(self.values)
+        result: dict[str, Any] = {"count": self.count, "sum": self.total}
+        for q in QUANTILES:
+            result[f"p{round(q * 100)}"] = _quantile(values, q) if values else None
+        return result
+
+
+class DriverTelemetry:
+    def __init__(self, printer_id: int, driver_key: str | None = None):
+        self.printer_id = printer_id
+        self.driver_key = driver_key
+        self.messages = 0
+        self.emitted = 0
+        self.persisted = 0
+        self.connects = 0
+        self.last_message_at: float | None = None
+        self._message_times: deque[float] = deque(maxlen=SAMPLE_SIZE)
+        self._parse_seconds = _Samples()
+        self._persist_seconds = _Samples()
+        self._lock = threading.Lock()
+
+    @property
+    def reconnects(self) -> int:
+        return max(self.connects - 1, 0)
+
+    def record_message(self, parse_seconds: float | None = None) -> None:
+        """A message (MQTT report, poll response) arrived from the printer."""
+        now = time.monotonic()
+        with self._lock:
+            self.messages += 1
+            self.last_message_at = now
+            self._message_times.append(now)
+            if parse_seconds is not None:
+                self._parse_seconds.add(parse_seconds)
+
+    def record_connect(self) -> None:
+        with self._lock:
+            self.connects += 1
+
+    def record_emit(self) -> None:
+        with self._lock:
+            self.emitted += 1
+
+    def record_persisted(self, latency_seconds: float) -> None:
+        with self._lock:
+            self.persisted += 1
+            self._persist_seconds.add(latency_seconds)
+
+    def message_rate(self, now: float | None = None) -> float:
+        """Messages per second over the last RATE_WINDOW_SECONDS."""
+        now = now if now is not None else time.monotonic()
+        with self._lock:
+            recent = sum(1 for at in self._message_times if now - at <= RATE_WINDOW_SECONDS)
+            if not recent:
+                return 0.0
+            # A full buffer may cover less than the window
+            window = RATE_WINDOW_SECONDS
+            if len(self._message_times) == SAMPLE_SIZE:
+                window = min(window, max(now - self._message_times[0], 1e-3))
+        return recent / window
+
+    def snapshot(self) -> dict[str, Any]:
+        now = time.monotonic()
+        rate = self.message_rate(now)
+        with self._lock:
+            return {
+                "driver_key": self.driver_key,
+                "messages": self.messages,
+                "message_rate": round(rate, 3),
+                "last_message_age_s": (
+                    round(now - self.last_message_at, 3) if self.last_message_at is not None else None
+                ),
+                "reconnects": self.reconnects,
+                "emitted": self.emitted,
+                "persisted": self.persisted,
+                "parse_seconds": self._parse_seconds.summary(),
+                "persist_latency_seconds": self._persist_seconds.summary(),
+            }
+
+
+class TelemetryRegistry:
+    def __init__(self):
+        self._printers: dict[int, DriverTelemetry] = {}
+
+    def get(self, printer_id: int, driver_key: str | None = None) -> DriverTelemetry:
+        telemetry = self._printers.get(printer_id)
+        if telemetry is None:
+            telemetry = self._printers[printer_id] = DriverTelemetry(printer_id, driver_key)
+        elif driver_key is not None:
+            telemetry.driver_key = driver_key
+        return telemetry
+
+    def discard(self, printer_id: int) -> None:
+        self._printers.pop(printer_id, None)
+
+    def snapshot(self) -> dict[int, dict[str, Any]]:
+        return {printer_id: telemetry.snapshot() for printer_id, telemetry in self._printers.items()}
+
+
+driver_telemetry = TelemetryRegistry()
+
+
+# ------------------------------------------------------------------ #
+#  Prometheus text format
+# ------------------------------------------------------------------ #
+
+def _labels(printer_id: int, driver_key: str | None, **extra: str) -> str:
+    labels = {"printer_id": str(printer_id), "driver": driver_key or "", **extra}
+    return ",".join(f'{key}="{value}"' for key, value in labels.items())
+
+
+def render_prometheus(
+    snapshots: dict[int, dict[str, Any]],
+    queue_depths: dict[int, int],
+) -> str:
+    """Driver telemetry and event queue depths in Prometheus text format."""
+    lines: list[str] = []
+
+    def metric(name: str, kind: str, help_text: str, samples: list[tuple[str, Any]]) -> None:
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for labels, value in samples:
+            if value is not None:
+                lines.append(f"{name}{{{labels}}} {value}")
+
+    printers = sorted(snapshots.items())
+
+    def per_printer(key: str) -> list[tuple[str, Any]]:
+        return [(_labels(pid, snap["driver_key"]), snap[key]) for pid, snap in printers]
+
+    metric("propus_driver_messages_total", "counter", "Messages received from the printer.", per_printer("messages"))
+    metric("propus_driver_message_rate", "gauge", "Messages per second over the last minute.", per_printer("message_rate"))
+    metric("propus_driver_last_message_age_seconds", "gauge", "Seconds since the last message.", per_printer("last_message_age_s"))
+    metric("propus_driver_reconnects_total", "counter", "Reconnects to the printer.", per_printer("reconnects"))
+    metric("propus_driver_events_emitted_total", "counter", "Events emitted by the driver.", per_printer("emitted"))
+    metric("propus_driver_events_persisted_total", "counter", "Emitted events written to the database.", per_printer("persisted"))
+
+    for name, key, help_text in (
+        ("propus_driver_parse_seconds", "parse_seconds", "Time to parse a printer message."),
+        ("propus_driver_persist_latency_seconds", "persist_latency_seconds", "Time from emit until the event is persisted."),
+    ):
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} summary")
+        for pid, snap in printers:
+            summary = snap[key]
+            for q in QUANTILES:
+                value = summary[f"p{round(q * 100)}"]
+                if value is not None:
+                    lines.append(f"{name}{{{_labels(pid, snap['driver_key'], quantile=str(q))}}} {value}")
+            lines.append(f"{name}_sum{{{_labels(pid, snap['driver_key'])}}} {summary['sum']}")
+            lines.append(f"{name}_count{{{_labels(pid, snap['driver_key'])}}} {summary['count']}")
+
+    metric(
+        "propus_printer_event_queue_depth", "gauge", "Driver events waiting to be written.",
+        [(f'printer_id="{pid}"', depth) for pid, depth in sorted(queue_depths.items())],
+    )
+    return "\n".join(lines) + "\n"
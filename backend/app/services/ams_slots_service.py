@@ -1,3 +1,4 @@
+from dataclasses import dataclass, field
 from datetime import datetime
 from typing import Any
 
@@ -7,11 +8,49 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
 from app.models import Filament, FilamentColor, Color, Printer, PrinterAmsUnit, PrinterSlot, PrinterSlotAssignment, PrinterSlotEvent, Spool
+from app.services.spool_identifier_index import spool_identifier_index
+
+# (ams_unit_id, slot_no, is_ams_slot)
+SlotKey = tuple[int | None, int, bool]
+
+
+@dataclass
+class PrinterTopology:
+    """AMS units, slots and slot assignments of one printer, loaded up front.
+
+    Slot lookups while handling an event are dict lookups; units and slots
+    created through get_or_create_* are added as they are flushed.
+    """
+
+    printer_id: int
+    units: dict[int, PrinterAmsUnit] = field(default_factory=dict)
+    slots: dict[SlotKey, PrinterSlot] = field(default_factory=dict)
+    assignments: dict[int, PrinterSlotAssignment] = field(default_factory=dict)
+
+    def add_slot(self, slot: PrinterSlot, assignment: PrinterSlotAssignment | None) -> None:
+        self.slots[(slot.ams_unit_id, slot.slot_no, slot.is_ams_slot)] = slot
+        if assignment is not None:
+            self.assignments[slot.id] = assignment
+
+    def find_slot(self, slot_no: int, ams_unit_no: int | None = None) -> PrinterSlot | None:
+        if ams_unit_no is None:
+            return self.slots.get((None, slot_no, False))
+        unit = self.units.get(ams_unit_no)
+        return self.slots.get((unit.id if unit else None, slot_no, True))
 
 
 class AmsSlotsService:
-    def __init__(self, db: AsyncSession):
+    def __init__(self, db: AsyncSession, autocommit: bool = True):
+        # autocommit=False leaves the commit to the caller, e.g. to write a
+        # batch of driver events in one transaction
         self.db = db
+        self.autocommit = autocommit
+
+    async def _commit(self) -> None:
+        if self.autocommit:
+            await self.db.commit()
+        else:
+            await self.db.flush()
 
     async def get_printer(self, printer_id: int) -> Printer | None:
         result = await self.db.execute(select(Printer).where(Printer.id == printer_id))
@@ -23,14 +62,18 @@ class AmsSlotsService:
         ams_unit_no: int,
         slots_total: int = 4,
         name: str | None = None,
+        topology: PrinterTopology | None = None,
     ) -> PrinterAmsUnit:
-        result = await self.db.execute(
-            select(PrinterAmsUnit).where(
-                PrinterAmsUnit.printer_id == printer_id,
-                PrinterAmsUnit.ams_unit_no == ams_unit_no,
+        if topology is not None:
+            unit = topology.units.get(ams_unit_no)
+        else:
+            result = await self.db.execute(
+                select(PrinterAmsUnit).where(
+                    PrinterAmsUnit.printer_id == printer_id,
+                    PrinterAmsUnit.ams_unit_no == ams_unit_no,
+                )
             )
-        )
-        unit = result.scalar_one_or_none()
+            unit = result.scalar_one_or_none()
 
         if unit:
             if unit.slots_total != slots_total:
@@ -47,6 +90,8 @@ class AmsSlotsService:
         )
         self.db.add(unit)
         await self.db.flush()
+        if topology is not None:
+            topology.units[ams_unit_no] = unit
         return unit
 
     async def get_or_create_slot(
@@ -56,21 +101,25 @@ class AmsSlotsService:
         is_ams_slot: bool = True,
         ams_unit_id: int | None = None,
         name: str | None = None,
+        topology: PrinterTopology | None = None,
     ) -> PrinterSlot:
-        conditions = [
-            PrinterSlot.printer_id == printer_id,
-            PrinterSlot.slot_no == slot_no,
-        ]
-        if ams_unit_id is not None:
-            conditions.append(PrinterSlot.ams_unit_id == ams_unit_id)
+        if topology is not None:
+            slot = topology.slots.get((ams_unit_id, slot_no, is_ams_slot))
         else:
-            conditions.append(PrinterSlot.ams_unit_id.is_(None))
-        conditions.append(PrinterSlot.is_ams_slot == is_ams_slot)
+            conditions = [
+                PrinterSlot.printer_id == printer_id,
+                PrinterSlot.slot_no == slot_no,
+            ]
+            if ams_unit_id is not None:
+                conditions.append(PrinterSlot.ams_unit_id == ams_unit_id)
+            else:
+                conditions.append(PrinterSlot.ams_unit_id.is_(None))
+            conditions.append(PrinterSlot.is_ams_slot == is_ams_slot)
 
-        result = await self.db.execute(
-            select(PrinterSlot).where(*conditions)
-        )
-        slot = result.scalar_one_or_none()
+            result = await self.db.execute(
+                select(PrinterSlot).where(*conditions)
+            )
+            slot = result.scalar_one_or_none()
 
         if slot:
             if name:
@@ -84,37 +133,53 @@ class AmsSlotsService:
             slot_no=slot_no,
             name=name,
         )
+        slot.assignment = PrinterSlotAssignment(present=False)
         self.db.add(slot)
         await self.db.flush()
-
-        assignment = PrinterSlotAssignment(slot_id=slot.id, present=False)
-        self.db.add(assignment)
-        await self.db.flush()
+        if topology is not None:
+            topology.add_slot(slot, slot.assignment)
 
         return slot
 
+    async def load_topology(self, printer_id: int) -> PrinterTopology:
+        """Load all AMS units, slots and assignments of a printer."""
+        topology = PrinterTopology(printer_id=printer_id)
+
+        result = await self.db.execute(
+            select(PrinterAmsUnit).where(PrinterAmsUnit.printer_id == printer_id)
+        )
+        for unit in result.scalars():
+            topology.units[unit.ams_unit_no] = unit
+
+        result = await self.db.execute(
+            select(PrinterSlot, PrinterSlotAssignment)
+            .outerjoin(PrinterSlotAssignment, PrinterSlotAssignment.slot_id == PrinterSlot.id)
+            .where(PrinterSlot.printer_id == printer_id)
+        )
+        for slot, assignment in result.all():
+            topology.add_slot(slot, assignment)
+
+        return topology
+
+    def _ensure_assignment(self, topology: PrinterTopology, slot: PrinterSlot) -> PrinterSlotAssignment:
+        assignment = topology.assignments.get(slot.id)
+        if assignment is None:
+            assignment = PrinterSlotAssignment(slot_id=slot.id)
+            self.db.add(assignment)
+            topology.assignments[slot.id] = assignment
+        return assignment
+
     async def _find_spool_by_identifier(
         self,
         rfid_uid: str | None,
         external_id: str | None,
     ) -> Spool | None:
-        load_opts = selectinload(Spool.filament).selectinload(Filament.filament_colors).selectinload(FilamentColor.color)
-
-        if rfid_uid:
-            result = await self.db.execute(
-                select(Spool).where(Spool.rfid_uid == rfid_uid, Spool.deleted_at.is_(None)).options(load_opts)
-            )
-            spool = result.scalar_one_or_none()
-            if spool:
-                return spool
-
-        if external_id:
-            result = await self.db.execute(
-                select(Spool).where(Spool.external_id == external_id, Spool.deleted_at.is_(None)).options(load_opts)
-            )
-            return result.scalar_one_or_none()
-
-        return None
+        return await spool_identifier_index.resolve(
+            self.db,
+            rfid_uid,
+            external_id,
+            selectinload(Spool.filament).selectinload(Filament.filament_colors).selectinload(FilamentColor.color),
+        )
 
     def _build_spool_meta(self, spool: Spool, source: str = "klipper_poll") -> dict[str, Any]:
         """Build meta dict with filament info from a Spool object."""
@@ -162,8 +227,8 @@ class AmsSlotsService:
             external_id=external_id,
             meta=meta,
         )
+        # No flush: nothing references the event id, it is written with the commit
         self.db.add(event)
-        await self.db.flush()
         return event
 
     async def apply_spool_inserted(
@@ -178,9 +243,10 @@ class AmsSlotsService:
     ) -> tuple[PrinterSlot, PrinterSlotEvent]:
         is_ams_slot = ams_unit_no is not None
         ams_unit_id = None
+        topology = await self.load_topology(printer_id)
 
         if is_ams_slot:
-            ams_unit = await self.get_or_create_ams_unit(printer_id, ams_unit_no)
+            ams_unit = await self.get_or_create_ams_unit(printer_id, ams_unit_no, topology=topology)
             ams_unit_id = ams_unit.id
 
         slot = await self.get_or_create_slot(
@@ -188,18 +254,30 @@ class AmsSlotsService:
             slot_no=slot_no,
             is_ams_slot=is_ams_slot,
             ams_unit_id=ams_unit_id,
+            topology=topology,
         )
 
-        spool = await self._find_spool_by_identifier(rfid_uid, external_id)
+        assignment = self._ensure_assignment(topology, slot)
 
-        assignment = await self.db.execute(
-            select(PrinterSlotAssignment).where(PrinterSlotAssignment.slot_id == slot.id)
+        event = await self._insert_into_slot(
+            printer_id, slot.id, assignment, event_at, rfid_uid, external_id, meta
         )
-        assignment = assignment.scalar_one_or_none()
 
-        if not assignment:
-            assignment = PrinterSlotAssignment(slot_id=slot.id)
-            self.db.add(assignment)
+        await self._commit()
+        return slot, event
+
+    async def _insert_into_slot(
+        self,
+        printer_id: int,
+        slot_id: int,
+        assignment: PrinterSlotAssignment,
+        event_at: datetime,
+        rfid_uid: str | None,
+        external_id: str | None,
+        meta: dict[str, Any] | None,
+    ) -> PrinterSlotEvent:
+        """Update the assignment for an inserted spool, without committing."""
+        spool = await self._find_spool_by_identifier(rfid_uid, external_id)
 
         is_manual = assignment.meta and assignment.meta.get("source") == "manual"
         event_source = (meta or {}).get("source", "")
@@ -230,9 +308,9 @@ class AmsSlotsService:
             assignment.updated_at = event_at
             assignment.meta = meta
 
-        event = await self._create_slot_event(
+        return await self._create_slot_event(
             printer_id=printer_id,
-            slot_id=slot.id,
+            slot_id=slot_id,
             event_type="spool_inserted",
             event_at=event_at,
             spool_id=assignment.spool_id,
@@ -241,9 +319,6 @@ class AmsSlotsService:
             meta=meta,
         )
 
-        await self.db.commit()
-        return slot, event
-
     async def apply_spool_removed(
         self,
         printer_id: int,
@@ -252,38 +327,28 @@ class AmsSlotsService:
         ams_unit_no: int | None = None,
         meta: dict[str, Any] | None = None,
     ) -> tuple[PrinterSlot, PrinterSlotEvent] | None:
-        is_ams_slot = ams_unit_no is not None
-        ams_unit_id = None
-
-        if is_ams_slot:
-            result = await self.db.execute(
-                select(PrinterAmsUnit).where(
-                    PrinterAmsUnit.printer_id == printer_id,
-                    PrinterAmsUnit.ams_unit_no == ams_unit_no,
-                )
-            )
-            unit = result.scalar_one_or_none()
-            if unit:
-                ams_unit_id = unit.id
-
-        result = await self.db.execute(
-            select(PrinterSlot).where(
-                PrinterSlot.printer_id == printer_id,
-                PrinterSlot.is_ams_slot == is_ams_slot,
-                PrinterSlot.ams_unit_id == ams_unit_id,
-                PrinterSlot.slot_no == slot_no,
-            )
-        )
-        slot = result.scalar_one_or_none()
+        topology = await self.load_topology(printer_id)
+        slot = topology.find_slot(slot_no, ams_unit_no)
 
         if not slot:
             return None
 
-        result = await self.db.execute(
-            select(PrinterSlotAssignment).where(PrinterSlotAssignment.slot_id == slot.id)
-        )
-        assignment = result.scalar_one_or_none()
+        assignment = topology.assignments.get(slot.id)
+
+        event = await self._remove_from_slot(printer_id, slot.id, assignment, event_at, meta)
 
+        await self._commit()
+        return slot, event
+
+    async def _remove_from_slot(
+        self,
+        printer_id: int,
+        slot_id: int,
+        assignment: PrinterSlotAssignment | None,
+        event_at: datetime,
+        meta: dict[str, Any] | None,
+    ) -> PrinterSlotEvent:
+        """Clear the assignment for a removed spool, without committing."""
         if assignment:
             is_manual = assignment.meta and assignment.meta.get("source") == "manual"
             event_source = (meta or {}).get("source", "")
@@ -297,17 +362,14 @@ class AmsSlotsService:
                 assignment.updated_at = event_at
                 assignment.meta = None
 
-        event = await self._create_slot_event(
+        return await self._create_slot_event(
             printer_id=printer_id,
-            slot_id=slot.id,
+            slot_id=slot_id,
             event_type="spool_removed",
             event_at=event_at,
             meta=meta,
         )
 
-        await self.db.commit()
-        return slot, event
-
     async def apply_unknown_spool_detected(
         self,
         printer_id: int,
@@ -320,9 +382,10 @@ class AmsSlotsService:
     ) -> tuple[PrinterSlot, PrinterSlotEvent]:
         is_ams_slot = ams_unit_no is not None
         ams_unit_id = None
+        topology = await self.load_topology(printer_id)
 
         if is_ams_slot:
-            ams_unit = await self.get_or_create_ams_unit(printer_id, ams_unit_no)
+            ams_unit = await self.get_or_create_ams_unit(printer_id, ams_unit_no, topology=topology)
             ams_unit_id = ams_unit.id
 
         slot = await self.get_or_create_slot(
@@ -330,16 +393,10 @@ class AmsSlotsService:
             slot_no=slot_no,
             is_ams_slot=is_ams_slot,
             ams_unit_id=ams_unit_id,
+            topology=topology,
         )
 
-        result = await self.db.execute(
-            select(PrinterSlotAssignment).where(PrinterSlotAssignment.slot_id == slot.id)
-        )
-        assignment = result.scalar_one_or_none()
-
-        if not assignment:
-            assignment = PrinterSlotAssignment(slot_id=slot.id)
-            self.db.add(assignment)
+        assignment = self._ensure_assignment(topology, slot)
 
         assignment.present = True
         assignment.spool_id = None
@@ -358,25 +415,53 @@ class AmsSlotsService:
             meta=meta,
         )
 
-        await self.db.commit()
+        await self._commit()
         return slot, event
 
+    async def _slot_unchanged(
+        self,
+        assignment: PrinterSlotAssignment | None,
+        rfid_uid: str | None,
+        external_id: str | None,
+    ) -> bool:
+        """True if a present tray still holds what the assignment records.
+
+        Presence and identifiers must match, and the identifiers must still
+        resolve to the assigned spool. Manual assignments without a matching
+        spool are kept by apply_spool_inserted, so they count as unchanged.
+        """
+        if assignment is None or not assignment.present:
+            return False
+        if (rfid_uid or None) != assignment.rfid_uid or (external_id or None) != assignment.external_id:
+            return False
+        match = await spool_identifier_index.lookup(self.db, rfid_uid, external_id)
+        spool_id = match[0] if match else None
+        if spool_id == assignment.spool_id:
+            return True
+        is_manual = assignment.meta and assignment.meta.get("source") == "manual"
+        return bool(is_manual) and spool_id is None
+
     async def apply_ams_state(
         self,
         printer_id: int,
         state: list[dict[str, Any]],
         event_at: datetime,
     ) -> tuple[list[PrinterSlotEvent], list[dict[str, Any]]]:
+        """Apply a full AMS report, writing only slots that actually changed.
+
+        Unchanged trays produce no slot event; if only their meta (remain,
+        humidity, ...) differs, the assignment meta is updated in place.
+        The whole report is applied in one transaction.
+        """
         events = []
         manual_conflicts: list[dict[str, Any]] = []
 
+        topology = await self.load_topology(printer_id)
+
         for unit_data in state:
             ams_unit_no = unit_data.get("ams_unit_no")
-            slots_total = unit_data.get("slots_total", 4)
-            slots = unit_data.get("slots", [])
-
             ams_unit = await self.get_or_create_ams_unit(
-                printer_id, ams_unit_no, slots_total=slots_total
+                printer_id, ams_unit_no, slots_total=unit_data.get("slots_total", 4), topology=topology
             )
             for i in range(ams_unit.slots_total):
                 await self.get_or_create_slot(
@@ -384,50 +469,53 @@ class AmsSlotsService:
                     slot_no=i + 1,
                     is_ams_slot=True,
                     ams_unit_id=ams_unit.id,
+                    topology=topology,
                 )
 
-            for slot_data in slots:
+            for slot_data in unit_data.get("slots", []):
                 slot_no = slot_data.get("slot_no")
                 rfid_uid = slot_data.get("rfid_uid")
                 external_id = slot_data.get("external_id")
                 present = slot_data.get("present", False)
                 slot_meta = slot_data.get("meta") or {}
                 slot_meta["source"] = "ams_state"
-
-                if present:
-                    slot, event = await self.apply_spool_inserted(
-                        printer_id=printer_id,
-                        slot_no=slot_no,
-                        event_at=event_at,
-                        rfid_uid=rfid_uid,
-                        external_id=external_id,
-                        ams_unit_no=ams_unit_no,
-                        meta=slot_meta,
-                    )
-                    events.append(event)
-
-                    assignment_result = await self.db.execute(
-                        select(PrinterSlotAssignment).where(
-                            PrinterSlotAssignment.slot_id == slot.id
+                slot = topology.find_slot(slot_no, ams_unit_no)
+                assignment = topology.assignments.get(slot.id) if slot else None
+
+                if present and await self._slot_unchanged(assignment, rfid_uid, external_id):
+                    is_manual = assignment.meta and assignment.meta.get("source") == "manual"
+                    if not is_manual and assignment.meta != slot_meta:
+                        assignment.meta = slot_meta
+                        assignment.updated_at = event_at
+                elif present:
+                    if slot is None:
+                        # Tray beyond the unit's slots_total
+                        slot = await self.get_or_create_slot(
+                            printer_id=printer_id,
+                            slot_no=slot_no,
+                            is_ams_slot=True,
+                            ams_unit_id=ams_unit.id,
+                            topology=topology,
                         )
-                    )
-                    assignment = assignment_result.scalar_one_or_none()
-                    if assignment and assignment.meta and assignment.meta.get("source") == "manual":
-                        manual_conflicts.append({
-                            "printer_id": printer_id,
-                            "ams_unit_no": ams_unit_no,
-                            "slot_no": slot_no,
-                            "assignment": assignment,
-                        })
+                    assignment = self._ensure_assignment(topology, slot)
+                    events.append(await self._insert_into_slot(
+                        printer_id, slot.id, assignment, event_at, rfid_uid, external_id, slot_meta
+                    ))
+                elif assignment is not None and assignment.present:
+                    events.append(await self._remove_from_slot(
+                        printer_id, assignment.slot_id, assignment, event_at, {"source": "ams_state"}
+                    ))
+                    continue
                 else:
-                    result = await self.apply_spool_removed(
-                        printer_id=printer_id,
-                        slot_no=slot_no,
-                        event_at=event_at,
-                        ams_unit_no=ams_unit_no,
-                        meta={"source": "ams_state"},
-                    )
-                    if result:
-                        events.append(result[1])
+                    continue
+
+                if assignment.meta and assignment.meta.get("source") == "manual":
+                    manual_conflicts.append({
+                        "printer_id": printer_id,
+                        "ams_unit_no": ams_unit_no,
+                        "slot_no": slot_no,
+                        "assignment": assignment,
+                    })
 
+        await self._commit()
         return events, manual_conflicts
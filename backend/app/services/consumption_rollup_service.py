@@ -0,0 +1,319 @@
+"""Daily consumption rollup (day, filament, location) for analytics queries."""
+
+import heapq
+import logging
+from collections import defaultdict
+from datetime import date
+from typing import Any, Iterable, Iterator
+
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import Filament, Spool, SpoolArchiveState, SpoolConsumptionDaily, SpoolEvent
+from app.models.consumption import NO_LOCATION
+from app.services.event_archive_store import SPOOL_EVENTS, EventArchiveStore
+
+logger = logging.getLogger(__name__)
+
+# Event types that influence the remaining weight or the location of a spool
+REPLAY_EVENT_TYPES = ("measurement", "manual_adjust", "print_consumption", "move_location")
+
+BACKFILL_INSERT_CHUNK = 500
+
+RollupKey = tuple[date, int, int | None]
+# (filament_id, location_id, tara, initial remaining weight)
+SpoolInfo = tuple[int, int | None, float | None, float | None]
+
+
+class ConsumptionRollupService:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def add(
+        self,
+        day: date,
+        filament_id: int,
+        location_id: int | None,
+        consumed_g: float,
+        event_count: int = 1,
+    ) -> None:
+        """Add consumption to the rollup row for (day, filament, location).
+
+        A single upsert where the dialect has one, so concurrent bookings
+        for the same key never race between the update and the insert.
+        """
+        if consumed_g <= 0:
+            return
+
+        table = SpoolConsumptionDaily
+        values = {
+            "day": day,
+            "filament_id": filament_id,
+            "location_id": location_id if location_id is not None else NO_LOCATION,
+            "consumed_g": consumed_g,
+            "event_count": event_count,
+        }
+        dialect = self.db.get_bind().dialect.name
+        if dialect in ("postgresql", "sqlite"):
+            dialect_insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+            stmt = dialect_insert(table).values(**values)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[table.day, table.filament_id, table.location_id],
+                set_={
+                    "consumed_g": table.consumed_g + stmt.excluded.consumed_g,
+                    "event_count": table.event_count + stmt.excluded.event_count,
+                    "updated_at": func.now(),
+                },
+            )
+        elif dialect in ("mysql", "mariadb"):
+            stmt = mysql.insert(table).values(**values)
+            stmt = stmt.on_duplicate_key_update(
+                consumed_g=table.consumed_g + stmt.inserted.consumed_g,
+                event_count=table.event_count + stmt.inserted.event_count,
+                updated_at=func.now(),
+            )
+        else:
+            result = await self.db.execute(
+                update(table)
+                .where(
+                    table.day == day,
+                    table.filament_id == filament_id,
+                    table.location_id == values["location_id"],
+                )
+                .values(
+                    consumed_g=table.consumed_g + consumed_g,
+                    event_count=table.event_count + event_count,
+                )
+                .execution_options(synchronize_session=False)
+            )
+            if result.rowcount:
+                return
+            stmt = insert(table).values(**values)
+        await self.db.execute(stmt)
+
+    async def fold_location(self, location_id: int) -> None:
+        """Move the rows of a location that is being deleted to NO_LOCATION."""
+        result = await self.db.execute(
+            select(
+                SpoolConsumptionDaily.day,
+                SpoolConsumptionDaily.filament_id,
+                SpoolConsumptionDaily.consumed_g,
+                SpoolConsumptionDaily.event_count,
+            ).where(SpoolConsumptionDaily.location_id == location_id)
+        )
+        rows = result.all()
+        if not rows:
+            return
+        await self.db.execute(
+            delete(SpoolConsumptionDaily).where(SpoolConsumptionDaily.location_id == location_id)
+        )
+        for day, filament_id, consumed_g, event_count in rows:
+            await self.add(day, filament_id, NO_LOCATION, consumed_g, event_count)
+
+    async def backfill(self) -> dict[str, int]:
+        """Rebuild the rollup table from the spool event history.
+
+        Events are streamed ordered by spool, so only the events of one spool
+        are held in memory at a time. Days before the latest archival cutoff
+        are kept as they are; spools with archived events continue from
+        their archive state.
+        """
+        spool_rows = await self.db.execute(
+            select(
+                Spool.id,
+                Spool.filament_id,
+                Spool.location_id,
+                Spool.initial_total_weight_g,
+                Spool.empty_spool_weight_g,
+                Filament.default_spool_weight_g,
+            ).join(Filament, Spool.filament_id == Filament.id)
+        )
+        spools: dict[int, SpoolInfo] = {}
+        for spool_id, filament_id, location_id, initial, empty_weight, default_weight in spool_rows.all():
+            tara = empty_weight if empty_weight is not None else default_weight
+            start = max(0.0, initial - tara) if initial is not None and tara is not None else None
+            spools[spool_id] = (filament_id, location_id, tara, start)
+
+        archive = EventArchiveStore(self.db)
+        cutoff = await archive.latest_cutoff(SPOOL_EVENTS)
+        since = cutoff.date() if cutoff is not None else None
+        states = await archive.get_states()
+        backdated = await archive.backdated_spool_ids(event_types=REPLAY_EVENT_TYPES)
+
+        totals: dict[RollupKey, list[float]] = defaultdict(lambda: [0.0, 0])
+        events_scanned = 0
+
+        # Spools whose archive state no longer applies (tara changed,
+        # backdated events) are skipped in the scan and replayed one by one
+        # with their archived events merged in, after the stream is closed
+        merged = {
+            spool_id
+            for spool_id, state in states.items()
+            if spool_id in spools and (state.tara_g != spools[spool_id][2] or spool_id in backdated)
+        }
+
+        def replay(spool_id: int, events: list[Any]) -> None:
+            spool_info = spools.get(spool_id)
+            if spool_info is None or not events or spool_id in merged:
+                return
+            self._replay_spool(spool_info, events, totals, states.get(spool_id), since)
+
+        stmt = (
+            select(
+                SpoolEvent.id,
+                SpoolEvent.spool_id,
+                SpoolEvent.event_type,
+                SpoolEvent.event_at,
+                SpoolEvent.delta_weight_g,
+                SpoolEvent.measured_weight_g,
+                SpoolEvent.from_location_id,
+                SpoolEvent.to_location_id,
+                SpoolEvent.meta,
+            )
+            .where(SpoolEvent.event_type.in_(REPLAY_EVENT_TYPES))
+            .order_by(SpoolEvent.spool_id, SpoolEvent.event_at, SpoolEvent.id)
+        )
+
+        current_spool: int | None = None
+        buffered: list[Any] = []
+        stream = await self.db.stream(stmt)
+        try:
+            async for row in stream:
+                events_scanned += 1
+                if row.spool_id != current_spool:
+                    if current_spool is not None:
+                        replay(current_spool, buffered)
+                    current_spool = row.spool_id
+                    buffered = []
+                buffered.append(row)
+        finally:
+            await stream.close()
+        if current_spool is not None:
+            replay(current_spool, buffered)
+
+        for spool_id in sorted(merged):
+            archived = await archive.load_events(SPOOL_EVENTS, spool_id, REPLAY_EVENT_TYPES)
+            live = (await self.db.execute(stmt.where(SpoolEvent.spool_id == spool_id))).all()
+            events = list(heapq.merge(archived, live, key=lambda e: (e.event_at, e.id)))
+            if events:
+                self._replay_spool(spools[spool_id], events, totals, None, since)
+
+        stmt = delete(SpoolConsumptionDaily)
+        if since is not None:
+            stmt = stmt.where(SpoolConsumptionDaily.day >= since)
+        await self.db.execute(stmt)
+        rows = [
+            {
+                "day": day,
+                "filament_id": filament_id,
+                "location_id": location_id if location_id is not None else NO_LOCATION,
+                "consumed_g": consumed,
+                "event_count": int(count),
+            }
+            for (day, filament_id, location_id), (consumed, count) in totals.items()
+        ]
+        for i in range(0, len(rows), BACKFILL_INSERT_CHUNK):
+            await self.db.execute(insert(SpoolConsumptionDaily), rows[i:i + BACKFILL_INSERT_CHUNK])
+        await self.db.commit()
+
+        logger.info(f"Consumption rollup backfilled: {len(rows)} rows from {events_scanned} events")
+        return {"events_scanned": events_scanned, "rows_written": len(rows)}
+
+    @staticmethod
+    def _replay_spool(
+        spool_info: SpoolInfo,
+        events: list[Any],
+        totals: dict[RollupKey, list[float]],
+        state: SpoolArchiveState | None = None,
+        since: date | None = None,
+    ) -> None:
+        filament_id, location_id, tara, remaining = spool_info
+
+        if state is not None:
+            remaining = state.rollup_remaining_g
+            location_id = state.location_id
+        else:
+            moves = [e for e in events if e.event_type == "move_location"]
+            if moves:
+                location_id = moves[0].from_location_id
+
+        for event, consumed, event_location_id in replay_consumption(events, tara, remaining, location_id):
+            day = event.event_at.date()
+            if since is not None and day < since:
+                continue
+            entry = totals[(day, filament_id, event_location_id)]
+            entry[0] += consumed
+            entry[1] += 1
+
+
+class ConsumptionReplay:
+    """Replay state of one spool under the rollup rules.
+
+    Mirrors the incremental rules in SpoolService: print consumption counts
+    with the amount actually removed from the remaining weight, measurements
+    count when they are lower than the previous remaining weight, manual
+    adjustments only reset the baseline.
+    """
+
+    def __init__(self, tara: float | None, remaining: float | None, location_id: int | None = None):
+        self.tara = tara
+        self.remaining = remaining
+        self.location_id = location_id
+
+    def apply(self, event: Any) -> float:
+        """Apply one event and return the grams it consumed."""
+        tara = self.tara
+        remaining = self.remaining
+        consumed = 0.0
+
+        if event.event_type == "move_location":
+            self.location_id = event.to_location_id
+            return 0.0
+
+        if event.event_type == "measurement":
+            if tara is None or event.measured_weight_g is None:
+                self.remaining = None
+                return 0.0
+            new_remaining = max(0.0, event.measured_weight_g - tara)
+            if remaining is not None and new_remaining < remaining:
+                consumed = remaining - new_remaining
+            self.remaining = new_remaining
+
+        elif event.event_type == "manual_adjust":
+            adj_type = event.meta.get("adjustment_type") if event.meta else None
+            if adj_type == "absolute":
+                if tara is None or event.measured_weight_g is None:
+                    self.remaining = None
+                else:
+                    self.remaining = max(0.0, event.measured_weight_g - tara)
+            elif adj_type == "relative" and remaining is not None and event.delta_weight_g is not None:
+                self.remaining = max(0.0, remaining + event.delta_weight_g)
+
+        elif event.event_type == "print_consumption" and event.delta_weight_g is not None:
+            delta = -abs(event.delta_weight_g)
+            if remaining is None:
+                consumed = -delta
+            else:
+                new_remaining = max(0.0, remaining + delta)
+                consumed = remaining - new_remaining
+                self.remaining = new_remaining
+
+        return consumed
+
+
+def replay_consumption(
+    events: Iterable[Any],
+    tara: float | None,
+    remaining: float | None,
+    location_id: int | None = None,
+) -> Iterator[tuple[Any, float, int | None]]:
+    """Replay one spool's events and yield (event, consumed_g, location_id).
+
+    Only events that consumed filament are yielded, see ConsumptionReplay.
+    """
+    replay = ConsumptionReplay(tara, remaining, location_id)
+    for event in events:
+        consumed = replay.apply(event)
+        if consumed > 0:
+            yield event, consumed, replay.location_id
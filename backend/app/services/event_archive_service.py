@@ -0,0 +1,379 @@
+"""Cold-storage archival of old spool and printer slot events."""
+
+import asyncio
+import heapq
+import logging
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, time, timedelta
+from pathlib import Path
+from typing import Any
+
+from sqlalchemy import delete, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.models import (
+    EventArchiveSegment,
+    EventArchiveSegmentOwner,
+    Filament,
+    PrinterSlotEvent,
+    Spool,
+    SpoolArchiveState,
+    SpoolEvent,
+    SpoolWeightCheckpoint,
+)
+from app.services.consumption_rollup_service import ConsumptionReplay
+from app.services.event_archive_store import (
+    PRINTER_SLOT_EVENTS,
+    SPOOL_EVENTS,
+    EventArchiveStore,
+    SegmentWriter,
+)
+from app.services.spool_service import WEIGHT_EVENT_TYPES, replay_weight_event
+
+logger = logging.getLogger(__name__)
+
+# The run-out forecast replays the last 30 days; keep well clear of that
+MIN_ARCHIVE_AGE_DAYS = 60
+# Owners (spools/printers) per segment
+OWNER_CHUNK = 500
+DELETE_CHUNK = 500
+STREAM_BATCH_SIZE = 1000
+SCHEDULE_INTERVAL = timedelta(days=1)
+
+SPOOL_EVENT_FIELDS = (
+    "id", "spool_id", "event_type", "event_at", "user_id", "device_id", "source",
+    "delta_weight_g", "measured_weight_g", "from_status_id", "to_status_id",
+    "from_location_id", "to_location_id", "note", "meta", "created_at",
+)
+SLOT_EVENT_FIELDS = (
+    "id", "printer_id", "slot_id", "event_type", "event_at", "spool_id",
+    "rfid_uid", "external_id", "meta", "created_at",
+)
+
+
+@dataclass
+class ArchiveResult:
+    kind: str
+    cutoff_at: datetime
+    segments: int = 0
+    owners: int = 0
+    events_archived: int = 0
+    bytes_written: int = 0
+
+
+def archive_cutoff(older_than_days: int, now: datetime | None = None) -> datetime:
+    """Midnight (UTC) before which events are archived."""
+    if older_than_days < MIN_ARCHIVE_AGE_DAYS:
+        raise ValueError(f"Only events older than {MIN_ARCHIVE_AGE_DAYS} days can be archived")
+    now = now or datetime.utcnow()
+    return datetime.combine(now.date() - timedelta(days=older_than_days), time.min)
+
+
+def replay_archive_state(
+    events: list[Any],
+    tara: float | None,
+    start_remaining: float | None,
+    seed: SpoolArchiveState | None = None,
+) -> dict[str, Any]:
+    """Replay state of a spool after the given (ordered) events.
+
+    Continues from seed if given. location_id is None and location_known
+    False when neither the seed nor the events determine the location.
+    """
+    if seed is not None:
+        remaining = seed.remaining_weight_g
+        last_plausible = seed.last_plausible_remaining_g
+        blocked_event_id = seed.blocked_event_id
+        rollup = ConsumptionReplay(tara, seed.rollup_remaining_g, seed.location_id)
+    else:
+        remaining = None
+        last_plausible = None
+        blocked_event_id = None
+        rollup = ConsumptionReplay(tara, start_remaining)
+    location_known = seed is not None
+
+    for event in events:
+        if event.event_type in WEIGHT_EVENT_TYPES and blocked_event_id is None:
+            remaining, blocked = replay_weight_event(remaining, event, tara)
+            if blocked:
+                blocked_event_id = event.id
+                remaining = None
+            elif remaining is not None:
+                last_plausible = remaining
+        if event.event_type == "move_location":
+            location_known = True
+        rollup.apply(event)
+
+    return {
+        "tara_g": tara,
+        "remaining_weight_g": remaining,
+        "last_plausible_remaining_g": last_plausible,
+        "blocked_event_id": blocked_event_id,
+        "rollup_remaining_g": rollup.remaining,
+        "location_id": rollup.location_id,
+        "location_known": location_known,
+    }
+
+
+class EventArchiveService:
+    """Moves events older than a cutoff into gzip NDJSON segment files.
+
+    Owners are processed in chunks of OWNER_CHUNK; each chunk becomes one
+    segment. The segment row, its owner index and the spool archive states
+    are written and the archived rows deleted in one transaction per chunk.
+    """
+
+    def __init__(self, db: AsyncSession, directory: Path | None = None):
+        self.db = db
+        self.store = EventArchiveStore(db, directory)
+
+    async def archive(self, older_than_days: int, now: datetime | None = None) -> list[ArchiveResult]:
+        cutoff = archive_cutoff(older_than_days, now)
+        return [
+            await self.archive_spool_events(cutoff),
+            await self.archive_printer_slot_events(cutoff),
+        ]
+
+    async def archive_spool_events(self, cutoff: datetime) -> ArchiveResult:
+        result = ArchiveResult(kind=SPOOL_EVENTS, cutoff_at=cutoff)
+        owner_ids = await self._owner_ids(SpoolEvent.spool_id, SpoolEvent.event_at, cutoff)
+        for i in range(0, len(owner_ids), OWNER_CHUNK):
+            await self._archive_chunk(
+                SPOOL_EVENTS, SpoolEvent, SpoolEvent.spool_id, SPOOL_EVENT_FIELDS,
+                owner_ids[i:i + OWNER_CHUNK], cutoff, result,
+            )
+        logger.info(
+            f"Archived {result.events_archived} spool events of {result.owners} spools "
+            f"before {cutoff.date()} into {result.segments} segments"
+        )
+        return result
+
+    async def archive_printer_slot_events(self, cutoff: datetime) -> ArchiveResult:
+        result = ArchiveResult(kind=PRINTER_SLOT_EVENTS, cutoff_at=cutoff)
+        owner_ids = await self._owner_ids(PrinterSlotEvent.printer_id, PrinterSlotEvent.event_at, cutoff)
+        for i in range(0, len(owner_ids), OWNER_CHUNK):
+            await self._archive_chunk(
+                PRINTER_SLOT_EVENTS, PrinterSlotEvent, PrinterSlotEvent.printer_id, SLOT_EVENT_FIELDS,
+                owner_ids[i:i + OWNER_CHUNK], cutoff, result,
+            )
+        logger.info(
+            f"Archived {result.events_archived} printer slot events of {result.owners} printers "
+            f"before {cutoff.date()} into {result.segments} segments"
+        )
+        return result
+
+    async def _owner_ids(self, owner_col, event_at_col, cutoff: datetime) -> list[int]:
+        rows = await self.db.execute(
+            select(owner_col).where(event_at_col < cutoff).distinct().order_by(owner_col)
+        )
+        return list(rows.scalars().all())
+
+    async def _archive_chunk(
+        self,
+        kind: str,
+        model: Any,
+        owner_col: Any,
+        fields: tuple[str, ...],
+        owner_ids: list[int],
+        cutoff: datetime,
+        result: ArchiveResult,
+    ) -> None:
+        file_name = f"{kind}-{cutoff:%Y%m%d}-{uuid.uuid4().hex[:12]}.ndjson.gz"
+        writer = SegmentWriter(self.store.directory / file_name, fields)
+        committed = False
+
+        event_ids: list[int] = []
+        owners: dict[int, dict[str, Any]] = {}
+        # Archived events per spool of this chunk, for the archive states
+        spool_events: dict[int, list[Any]] = {}
+
+        try:
+            stream = await self.db.stream(
+                select(*(getattr(model, name) for name in fields))
+                .where(owner_col.in_(owner_ids), model.event_at < cutoff)
+                .order_by(owner_col, model.event_at, model.id)
+                .execution_options(yield_per=STREAM_BATCH_SIZE)
+            )
+            try:
+                async for row in stream:
+                    writer.write(row)
+                    event_ids.append(row.id)
+                    owner_id = getattr(row, owner_col.key)
+                    owner = owners.get(owner_id)
+                    if owner is None:
+                        owner = owners[owner_id] = {
+                            "owner_id": owner_id,
+                            "event_count": 0,
+                            "min_event_at": row.event_at,
+                            "max_event_at": row.event_at,
+                            "last_event_id": row.id,
+                        }
+                    owner["event_count"] += 1
+                    owner["max_event_at"] = row.event_at
+                    owner["last_event_id"] = row.id
+                    if kind == SPOOL_EVENTS:
+                        spool_events.setdefault(owner_id, []).append(row)
+            finally:
+                await stream.close()
+
+            if not event_ids:
+                writer.abort()
+                return
+
+            state_rows: list[dict[str, Any]] = []
+            if kind == SPOOL_EVENTS:
+                state_rows = await self._spool_states(spool_events, owners, cutoff)
+
+            byte_size = writer.commit()
+            committed = True
+
+            segment = EventArchiveSegment(
+                kind=kind,
+                file_name=file_name,
+                cutoff_at=cutoff,
+                min_event_at=min(o["min_event_at"] for o in owners.values()),
+                max_event_at=max(o["max_event_at"] for o in owners.values()),
+                event_count=len(event_ids),
+                byte_size=byte_size,
+            )
+            self.db.add(segment)
+            await self.db.flush()
+
+            await self.db.execute(insert(EventArchiveSegmentOwner), [
+                {
+                    "segment_id": segment.id,
+                    "owner_id": o["owner_id"],
+                    "event_count": o["event_count"],
+                    "min_event_at": o["min_event_at"],
+                    "max_event_at": o["max_event_at"],
+                }
+                for o in owners.values()
+            ])
+
+            if kind == SPOOL_EVENTS:
+                spool_ids = list(owners)
+                await self.db.execute(
+                    delete(SpoolArchiveState).where(SpoolArchiveState.spool_id.in_(spool_ids))
+                )
+                await self.db.execute(insert(SpoolArchiveState), state_rows)
+                # Checkpoints of archived events would dangle; the archive state replaces them
+                await self.db.execute(
+                    delete(SpoolWeightCheckpoint).where(
+                        SpoolWeightCheckpoint.spool_id.in_(spool_ids),
+                        SpoolWeightCheckpoint.event_at < cutoff,
+                    )
+                )
+
+            for i in range(0, len(event_ids), DELETE_CHUNK):
+                await self.db.execute(
+                    delete(model)
+                    .where(model.id.in_(event_ids[i:i + DELETE_CHUNK]))
+                    .execution_options(synchronize_session=False)
+                )
+            await self.db.commit()
+        except Exception:
+            await self.db.rollback()
+            if committed:
+                writer.path.unlink(missing_ok=True)
+            else:
+                writer.abort()
+            raise
+
+        result.segments += 1
+        result.owners += len(owners)
+        result.events_archived += len(event_ids)
+        result.bytes_written += byte_size
+
+    async def _spool_states(
+        self,
+        events_by_spool: dict[int, list[Any]],
+        owners: dict[int, dict[str, Any]],
+        cutoff: datetime,
+    ) -> list[dict[str, Any]]:
+        """Archive states after this chunk, continuing from the previous ones."""
+        spool_ids = list(events_by_spool)
+        spool_rows = await self.db.execute(
+            select(
+                Spool.id,
+                Spool.location_id,
+                Spool.initial_total_weight_g,
+                Spool.empty_spool_weight_g,
+                Filament.default_spool_weight_g,
+            )
+            .join(Filament, Spool.filament_id == Filament.id)
+            .where(Spool.id.in_(spool_ids))
+        )
+        spools = {row[0]: row for row in spool_rows.all()}
+        previous = await self.store.get_states(spool_ids)
+
+        states: dict[int, dict[str, Any]] = {}
+        for spool_id, events in events_by_spool.items():
+            _, _, initial, empty_weight, default_weight = spools[spool_id]
+            tara = empty_weight if empty_weight is not None else default_weight
+            start = max(0.0, initial - tara) if initial is not None and tara is not None else None
+
+            seed = previous.get(spool_id)
+            if seed is not None and (seed.tara_g != tara or events[0].event_at < seed.archived_until):
+                # Tara changed or events were backdated into the archived range:
+                # replay the spool's whole archived history
+                archived = await self.store.load_events(SPOOL_EVENTS, spool_id)
+                events = list(heapq.merge(archived, events, key=lambda e: (e.event_at, e.id)))
+                seed = None
+
+            states[spool_id] = replay_archive_state(events, tara, start, seed)
+
+        # Without any move the rollup location is where the spool was before
+        # its first (live) move, or its current location
+        unknown = [spool_id for spool_id, state in states.items() if not state["location_known"]]
+        if unknown:
+            first_moves: dict[int, int | None] = {}
+            move_rows = await self.db.execute(
+                select(SpoolEvent.spool_id, SpoolEvent.from_location_id)
+                .where(
+                    SpoolEvent.spool_id.in_(unknown),
+                    SpoolEvent.event_type == "move_location",
+                    SpoolEvent.event_at >= cutoff,
+                )
+                .order_by(SpoolEvent.spool_id, SpoolEvent.event_at, SpoolEvent.id)
+            )
+            for spool_id, from_location_id in move_rows.all():
+                first_moves.setdefault(spool_id, from_location_id)
+            for spool_id in unknown:
+                states[spool_id]["location_id"] = first_moves.get(spool_id, spools[spool_id][1])
+
+        rows = []
+        for spool_id, state in states.items():
+            state.pop("location_known")
+            owner = owners[spool_id]
+            last = (owner["max_event_at"], owner["last_event_id"])
+            event_count = owner["event_count"]
+            seed = previous.get(spool_id)
+            if seed is not None:
+                last = max(last, (seed.last_event_at, seed.last_event_id))
+                event_count += seed.event_count
+            rows.append({
+                "spool_id": spool_id,
+                "archived_until": cutoff,
+                "last_event_at": last[0],
+                "last_event_id": last[1],
+                "event_count": event_count,
+                **state,
+            })
+        return rows
+
+
+async def run_scheduled_archival(
+    session_maker: async_sessionmaker[AsyncSession],
+    older_than_days: int,
+) -> None:
+    """Archive old events once a day until cancelled."""
+    while True:
+        try:
+            async with session_maker() as db:
+                await EventArchiveService(db).archive(older_than_days)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Scheduled event archival failed")
+        await asyncio.sleep(SCHEDULE_INTERVAL.total_seconds())
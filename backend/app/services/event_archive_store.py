@@ -0,0 +1,244 @@
+"""Read/write access to archived events (gzip NDJSON segment files)."""
+
+import gzip
+import heapq
+import json
+import os
+from itertools import islice
+from datetime import datetime
+from pathlib import Path
+from typing import Any, AsyncIterator, Iterable, Iterator
+
+from sqlalchemy import and_, select
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import PROJECT_ROOT, settings
+from app.models import EventArchiveSegment, EventArchiveSegmentOwner, SpoolArchiveState, SpoolEvent
+
+SPOOL_EVENTS = "spool_events"
+PRINTER_SLOT_EVENTS = "printer_slot_events"
+
+# Column that assigns an archived event to its owner, per kind
+OWNER_FIELDS = {
+    SPOOL_EVENTS: "spool_id",
+    PRINTER_SLOT_EVENTS: "printer_id",
+}
+DATETIME_FIELDS = ("event_at", "created_at")
+
+
+def archive_dir() -> Path:
+    """Configured archive directory, by default next to the SQLite database file."""
+    if settings.event_archive_dir:
+        return Path(settings.event_archive_dir)
+    url = make_url(settings.database_url)
+    if url.get_backend_name() == "sqlite" and url.database and url.database != ":memory:":
+        return Path(url.database).resolve().parent / "event_archive"
+    return PROJECT_ROOT / "event_archive"
+
+
+class ArchivedEvent:
+    """An event read back from a segment; attribute access like an ORM row."""
+
+    archived = True
+
+    def __init__(self, fields: dict[str, Any]):
+        self.__dict__.update(fields)
+
+    @property
+    def sort_key(self) -> tuple[datetime, int]:
+        return self.event_at, self.id
+
+
+class SegmentWriter:
+    """Streams events into a new segment file.
+
+    Writes go to a temporary file that is renamed on commit(), so a segment
+    file is either complete or absent.
+    """
+
+    def __init__(self, path: Path, fields: Iterable[str]):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.fields = tuple(fields)
+        self.count = 0
+        self._tmp_path = path.with_name(path.name + ".tmp")
+        self._file = gzip.open(self._tmp_path, "wb")
+
+    def write(self, row: Any) -> None:
+        data = {}
+        for name in self.fields:
+            value = getattr(row, name)
+            data[name] = value.isoformat() if isinstance(value, datetime) else value
+        self._file.write(json.dumps(data, separators=(",", ":")).encode() + b"\n")
+        self.count += 1
+
+    def commit(self) -> int:
+        """Finish the file and return its size in bytes."""
+        self._file.close()
+        os.replace(self._tmp_path, self.path)
+        return self.path.stat().st_size
+
+    def abort(self) -> None:
+        self._file.close()
+        self._tmp_path.unlink(missing_ok=True)
+
+
+def read_segment(
+    path: Path,
+    owner_field: str,
+    owner_id: int | None = None,
+    event_types: Iterable[str] | None = None,
+) -> Iterator[ArchivedEvent]:
+    """Events of one segment, in file order (owner, event_at, id)."""
+    types = set(event_types) if event_types is not None else None
+    with gzip.open(path, "rb") as f:
+        for line in f:
+            data = json.loads(line)
+            if owner_id is not None and data[owner_field] != owner_id:
+                continue
+            if types is not None and data["event_type"] not in types:
+                continue
+            for name in DATETIME_FIELDS:
+                if data.get(name) is not None:
+                    data[name] = datetime.fromisoformat(data[name])
+            yield ArchivedEvent(data)
+
+
+async def merge_event_streams(archived: list[Any], live: AsyncIterator[Any]) -> AsyncIterator[Any]:
+    """Merge archived events into an ordered live stream by (event_at, id)."""
+    i = 0
+    async for event in live:
+        while i < len(archived) and archived[i].sort_key < (event.event_at, event.id):
+            yield archived[i]
+            i += 1
+        yield event
+    for event in archived[i:]:
+        yield event
+
+
+class EventArchiveStore:
+    def __init__(self, db: AsyncSession, directory: Path | None = None):
+        self.db = db
+        self.directory = directory or archive_dir()
+
+    async def _owner_segments(self, kind: str, owner_id: int) -> list[tuple[EventArchiveSegmentOwner, str]]:
+        """Segments holding events of an owner, newest first."""
+        result = await self.db.execute(
+            select(EventArchiveSegmentOwner, EventArchiveSegment.file_name)
+            .join(EventArchiveSegment, EventArchiveSegmentOwner.segment_id == EventArchiveSegment.id)
+            .where(
+                EventArchiveSegment.kind == kind,
+                EventArchiveSegmentOwner.owner_id == owner_id,
+            )
+            .order_by(EventArchiveSegmentOwner.max_event_at.desc(), EventArchiveSegment.id.desc())
+        )
+        return [(row[0], row[1]) for row in result.all()]
+
+    async def count_events(self, kind: str, owner_id: int) -> int:
+        return sum(owner.event_count for owner, _ in await self._owner_segments(kind, owner_id))
+
+    async def load_events(
+        self,
+        kind: str,
+        owner_id: int,
+        event_types: Iterable[str] | None = None,
+    ) -> list[ArchivedEvent]:
+        """All archived events of an owner, ascending by (event_at, id)."""
+        owner_field = OWNER_FIELDS[kind]
+        types = list(event_types) if event_types is not None else None
+        segments = [
+            read_segment(self.directory / file_name, owner_field, owner_id, types)
+            for _, file_name in await self._owner_segments(kind, owner_id)
+        ]
+        # Segments are sorted internally but may overlap (backdated events)
+        return list(heapq.merge(*segments, key=lambda e: e.sort_key))
+
+    async def page_events(self, kind: str, owner_id: int, offset: int, limit: int) -> list[ArchivedEvent]:
+        """Archived events of an owner, newest first.
+
+        Segments whose time ranges overlap (backdated events archived in a
+        later run) are merged like in load_events. Whole groups before the
+        offset are skipped by their owner counts and never read.
+        """
+        owner_field = OWNER_FIELDS[kind]
+        groups: list[list[tuple[EventArchiveSegmentOwner, str]]] = []
+        group_start: datetime | None = None
+        for owner, file_name in await self._owner_segments(kind, owner_id):
+            if groups and owner.max_event_at >= group_start:
+                groups[-1].append((owner, file_name))
+                group_start = min(group_start, owner.min_event_at)
+            else:
+                groups.append([(owner, file_name)])
+                group_start = owner.min_event_at
+
+        items: list[ArchivedEvent] = []
+        for group in groups:
+            if len(items) >= limit:
+                break
+            count = sum(owner.event_count for owner, _ in group)
+            if offset >= count:
+                offset -= count
+                continue
+            segments = [
+                sorted(
+                    read_segment(self.directory / file_name, owner_field, owner_id),
+                    key=lambda e: e.sort_key,
+                    reverse=True,
+                )
+                for _, file_name in group
+            ]
+            events = heapq.merge(*segments, key=lambda e: e.sort_key, reverse=True)
+            items.extend(islice(events, offset, offset + limit - len(items)))
+            offset = 0
+        return items
+
+    def delete_files(self, file_names: Iterable[str]) -> None:
+        """Remove segment files whose rows were deleted."""
+        for file_name in file_names:
+            (self.directory / file_name).unlink(missing_ok=True)
+
+    async def get_states(self, spool_ids: Iterable[int] | None = None) -> dict[int, SpoolArchiveState]:
+        stmt = select(SpoolArchiveState)
+        if spool_ids is not None:
+            stmt = stmt.where(SpoolArchiveState.spool_id.in_(list(spool_ids)))
+        result = await self.db.execute(stmt)
+        return {state.spool_id: state for state in result.scalars().all()}
+
+    async def backdated_spool_ids(
+        self,
+        spool_ids: Iterable[int] | None = None,
+        event_types: Iterable[str] | None = None,
+    ) -> set[int]:
+        """Spools with a live event older than their archived range.
+
+        Such an event was inserted after archival, so the archive state no
+        longer describes the history before it.
+        """
+        stmt = (
+            select(SpoolEvent.spool_id)
+            .join(
+                SpoolArchiveState,
+                and_(
+                    SpoolArchiveState.spool_id == SpoolEvent.spool_id,
+                    SpoolEvent.event_at < SpoolArchiveState.archived_until,
+                ),
+            )
+            .distinct()
+        )
+        if spool_ids is not None:
+            stmt = stmt.where(SpoolEvent.spool_id.in_(list(spool_ids)))
+        if event_types is not None:
+            stmt = stmt.where(SpoolEvent.event_type.in_(list(event_types)))
+        result = await self.db.execute(stmt)
+        return set(result.scalars().all())
+
+    async def latest_cutoff(self, kind: str) -> datetime | None:
+        """Cutoff of the newest archival run of a kind."""
+        result = await self.db.execute(
+            select(EventArchiveSegment.cutoff_at)
+            .where(EventArchiveSegment.kind == kind)
+            .order_by(EventArchiveSegment.cutoff_at.desc())
+            .limit(1)
+        )
+        return result.scalar_one_or_none()
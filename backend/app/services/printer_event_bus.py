@@ -0,0 +1,108 @@
+"""Fan-out of printer, slot and spool changes to push subscribers (SSE)."""
+
+import asyncio
+import logging
+from typing import Any
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.util import identity_key
+
+from app.core.config import settings
+from app.models import Spool, SpoolEvent
+
+logger = logging.getLogger(__name__)
+
+# Sent instead of the dropped messages when a subscriber fell behind; the
+# client then reloads /printers/status
+RESYNC = {"type": "resync"}
+
+_CHANGES_KEY = "printer_event_bus_spools"
+
+
+class Subscription:
+    """Bounded buffer of one subscriber.
+
+    A subscriber that lets the buffer fill up loses the buffered messages
+    and gets a single resync message instead, so a slow dashboard never
+    holds back the others or grows memory.
+    """
+
+    def __init__(self, maxsize: int):
+        self.queue: asyncio.Queue[dict[str, Any]] = asyncio.Queue(maxsize)
+        self.resyncs = 0
+
+    def push(self, message: dict[str, Any]) -> None:
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(RESYNC)
+            self.resyncs += 1
+
+    async def next(self, timeout: float) -> dict[str, Any] | None:
+        """Next message, or None if nothing arrived within timeout."""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class PrinterEventBus:
+    def __init__(self, buffer_size: int):
+        self.buffer_size = buffer_size
+        self._subscribers: set[Subscription] = set()
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def subscribe(self) -> Subscription:
+        subscription = Subscription(self.buffer_size)
+        self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        self._subscribers.discard(subscription)
+
+    def publish(self, message: dict[str, Any]) -> None:
+        for subscription in self._subscribers:
+            subscription.push(message)
+
+
+printer_event_bus = PrinterEventBus(settings.printer_events_buffer_size)
+
+
+# Spool weight changes: every change writes a SpoolEvent. They are
+# collected per flush and published on commit.
+
+@event.listens_for(Session, "after_flush")
+def _collect_spool_changes(session, flush_context) -> None:
+    if not printer_event_bus.subscriber_count:
+        return
+    changes = None
+    for obj in session.new:
+        if isinstance(obj, SpoolEvent):
+            if changes is None:
+                changes = session.info.setdefault(_CHANGES_KEY, {})
+            spool = session.identity_map.get(identity_key(Spool, obj.spool_id))
+            changes[obj.spool_id] = {
+                "type": "spool",
+                "spool_id": obj.spool_id,
+                "event_type": obj.event_type,
+                "remaining_weight_g": spool.remaining_weight_g if spool is not None else None,
+            }
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_spool_changes(session) -> None:
+    changes = session.info.pop(_CHANGES_KEY, None)
+    if changes:
+        for message in changes.values():
+            printer_event_bus.publish(message)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_spool_changes(session) -> None:
+    session.info.pop(_CHANGES_KEY, None)
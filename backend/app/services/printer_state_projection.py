@@ -0,0 +1,304 @@
+"""Process-wide projection of printers, AMS units, slots and slot assignments."""
+
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any
+
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.orm import Session
+
+from app.core.database import async_session_maker
+from app.models import Printer, PrinterAmsUnit, PrinterSlot, PrinterSlotAssignment
+from app.services.printer_event_bus import printer_event_bus
+
+logger = logging.getLogger(__name__)
+
+# Picks up changes made outside this process (CLI, other workers) and bulk
+# statements that bypass the ORM
+REFRESH_INTERVAL = timedelta(minutes=10)
+
+_CHANGES_KEY = "printer_state_changes"
+
+
+@dataclass
+class AssignmentState:
+    present: bool = False
+    spool_id: int | None = None
+    meta: dict[str, Any] | None = None
+
+
+@dataclass
+class SlotState:
+    id: int
+    printer_id: int
+    ams_unit_id: int | None
+    slot_no: int
+    assignment: AssignmentState | None = None
+
+
+@dataclass
+class AmsUnitState:
+    id: int
+    printer_id: int
+    ams_unit_no: int
+    name: str | None
+    slots_total: int
+
+
+@dataclass
+class PrinterState:
+    id: int
+    name: str
+    model: str | None
+    driver_key: str
+    is_active: bool
+    deleted: bool
+    driver_config: dict[str, Any] | None
+    units: dict[int, AmsUnitState] = field(default_factory=dict)
+    slots_by_id: dict[int, SlotState] = field(default_factory=dict)
+
+    # Same shape as the ORM relationships, for the status response
+    @property
+    def ams_units(self) -> list[AmsUnitState]:
+        return list(self.units.values())
+
+    @property
+    def slots(self) -> list[SlotState]:
+        return list(self.slots_by_id.values())
+
+
+def _printer_values(printer: Printer) -> dict[str, Any]:
+    return {
+        "id": printer.id,
+        "name": printer.name,
+        "model": printer.model,
+        "driver_key": printer.driver_key,
+        "is_active": printer.is_active,
+        "deleted": printer.deleted_at is not None,
+        "driver_config": dict(printer.driver_config) if printer.driver_config else None,
+    }
+
+
+def _unit_values(unit: PrinterAmsUnit) -> dict[str, Any]:
+    return {
+        "id": unit.id,
+        "printer_id": unit.printer_id,
+        "ams_unit_no": unit.ams_unit_no,
+        "name": unit.name,
+        "slots_total": unit.slots_total,
+    }
+
+
+def _slot_values(slot: PrinterSlot) -> dict[str, Any]:
+    return {
+        "id": slot.id,
+        "printer_id": slot.printer_id,
+        "ams_unit_id": slot.ams_unit_id,
+        "slot_no": slot.slot_no,
+    }
+
+
+def _assignment_values(assignment: PrinterSlotAssignment) -> dict[str, Any]:
+    return {
+        "present": bool(assignment.present),
+        "spool_id": assignment.spool_id,
+        "meta": dict(assignment.meta) if assignment.meta else None,
+    }
+
+
+class PrinterStateProjection:
+    """Slot and assignment state of all printers, served without DB access.
+
+    Seeded at startup and kept current by committed ORM changes of
+    printers, AMS units, slots and assignments (see the session listeners
+    below), i.e. by AmsSlotsService and the manual assign endpoint.
+    """
+
+    def __init__(self, session_maker: async_sessionmaker[AsyncSession]):
+        self.session_maker = session_maker
+        self._printers: dict[int, PrinterState] = {}
+        # slot_id -> printer_id, assignments only carry the slot id
+        self._slot_printers: dict[int, int] = {}
+        self._loaded_at: datetime | None = None
+        self._lock = asyncio.Lock()
+
+    def invalidate(self) -> None:
+        self._loaded_at = None
+
+    async def load(self, db: AsyncSession) -> None:
+        with db.no_autoflush:
+            printers = (await db.execute(select(Printer))).scalars().all()
+            units = (await db.execute(select(PrinterAmsUnit))).scalars().all()
+            slots = (await db.execute(
+                select(PrinterSlot, PrinterSlotAssignment)
+                .outerjoin(PrinterSlotAssignment, PrinterSlotAssignment.slot_id == PrinterSlot.id)
+            )).all()
+
+        self._printers = {}
+        self._slot_printers = {}
+        for printer in printers:
+            self.put_printer(_printer_values(printer))
+        for unit in units:
+            self.put_unit(_unit_values(unit))
+        for slot, assignment in slots:
+            self.put_slot(_slot_values(slot))
+            if assignment is not None:
+                self.put_assignment(slot.id, _assignment_values(assignment))
+        self._loaded_at = datetime.utcnow()
+        logger.debug(f"Printer state projection loaded: {len(self._printers)} printers")
+
+    async def ensure_loaded(self) -> None:
+        if self._loaded_at is not None and datetime.utcnow() - self._loaded_at < REFRESH_INTERVAL:
+            return
+        async with self._lock:
+            if self._loaded_at is not None and datetime.utcnow() - self._loaded_at < REFRESH_INTERVAL:
+                return
+            async with self.session_maker() as db:
+                await self.load(db)
+
+    async def active_printers(self) -> list[PrinterState]:
+        """Active, non-deleted printers in id order."""
+        await self.ensure_loaded()
+        return [
+            printer for _, printer in sorted(self._printers.items())
+            if printer.is_active and not printer.deleted
+        ]
+
+    def get_printer(self, printer_id: int) -> PrinterState | None:
+        return self._printers.get(printer_id)
+
+    def put_printer(self, values: dict[str, Any]) -> None:
+        printer = self._printers.get(values["id"])
+        if printer is None:
+            self._printers[values["id"]] = PrinterState(**values)
+            return
+        for key, value in values.items():
+            setattr(printer, key, value)
+
+    def discard_printer(self, printer_id: int) -> None:
+        printer = self._printers.pop(printer_id, None)
+        if printer is not None:
+            for slot_id in printer.slots_by_id:
+                self._slot_printers.pop(slot_id, None)
+
+    def put_unit(self, values: dict[str, Any]) -> None:
+        self.discard_unit(values["id"])
+        printer = self._printers.get(values["printer_id"])
+        if printer is not None:
+            printer.units[values["id"]] = AmsUnitState(**values)
+
+    def discard_unit(self, unit_id: int) -> None:
+        for printer in self._printers.values():
+            if printer.units.pop(unit_id, None) is not None:
+                return
+
+    def put_slot(self, values: dict[str, Any]) -> None:
+        printer = self._printers.get(values["printer_id"])
+        if printer is None:
+            return
+        slot = printer.slots_by_id.get(values["id"])
+        if slot is None:
+            printer.slots_by_id[values["id"]] = SlotState(**values)
+            self._slot_printers[values["id"]] = printer.id
+            return
+        slot.ams_unit_id = values["ams_unit_id"]
+        slot.slot_no = values["slot_no"]
+
+    def discard_slot(self, slot_id: int) -> None:
+        printer_id = self._slot_printers.pop(slot_id, None)
+        printer = self._printers.get(printer_id) if printer_id is not None else None
+        if printer is not None:
+            printer.slots_by_id.pop(slot_id, None)
+
+    def put_assignment(self, slot_id: int, values: dict[str, Any] | None) -> None:
+        printer_id = self._slot_printers.get(slot_id)
+        printer = self._printers.get(printer_id) if printer_id is not None else None
+        if printer is None or slot_id not in printer.slots_by_id:
+            return
+        printer.slots_by_id[slot_id].assignment = AssignmentState(**values) if values is not None else None
+
+    def slot_message(self, slot_id: int) -> dict[str, Any] | None:
+        """Push message with the current state of a slot."""
+        printer_id = self._slot_printers.get(slot_id)
+        printer = self._printers.get(printer_id) if printer_id is not None else None
+        slot = printer.slots_by_id.get(slot_id) if printer is not None else None
+        if slot is None:
+            return None
+        unit = printer.units.get(slot.ams_unit_id) if slot.ams_unit_id is not None else None
+        assignment = slot.assignment or AssignmentState()
+        return {
+            "type": "slot",
+            "printer_id": printer.id,
+            "slot_id": slot.id,
+            "ams_unit_no": unit.ams_unit_no if unit else None,
+            "slot_no": slot.slot_no,
+            "present": assignment.present,
+            "spool_id": assignment.spool_id,
+            "meta": assignment.meta,
+        }
+
+    def apply(self, changes: dict[str, dict[int, dict[str, Any] | None]]) -> None:
+        # Parents first, so children of new printers/units find their parent
+        for printer_id, values in changes.get("printers", {}).items():
+            if values is None:
+                self.discard_printer(printer_id)
+            else:
+                self.put_printer(values)
+        for unit_id, values in changes.get("units", {}).items():
+            if values is None:
+                self.discard_unit(unit_id)
+            else:
+                self.put_unit(values)
+        for slot_id, values in changes.get("slots", {}).items():
+            if values is None:
+                self.discard_slot(slot_id)
+            else:
+                self.put_slot(values)
+        for slot_id, values in changes.get("assignments", {}).items():
+            self.put_assignment(slot_id, values)
+
+
+printer_state_projection = PrinterStateProjection(async_session_maker)
+
+
+# Changes are collected per flush and applied on commit, so rolled back
+# changes never reach the projection.
+
+_TRACKED = (
+    (Printer, "printers", _printer_values, lambda obj: obj.id),
+    (PrinterAmsUnit, "units", _unit_values, lambda obj: obj.id),
+    (PrinterSlot, "slots", _slot_values, lambda obj: obj.id),
+    (PrinterSlotAssignment, "assignments", _assignment_values, lambda obj: obj.slot_id),
+)
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_printer_state_changes(session, flush_context) -> None:
+    changes = None
+    for obj in session.new | session.dirty | session.deleted:
+        for model, kind, values, key in _TRACKED:
+            if isinstance(obj, model):
+                if changes is None:
+                    changes = session.info.setdefault(_CHANGES_KEY, {})
+                deleted = obj in session.deleted
+                changes.setdefault(kind, {})[key(obj)] = None if deleted else values(obj)
+                break
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_printer_state_changes(session) -> None:
+    changes = session.info.pop(_CHANGES_KEY, None)
+    if changes:
+        printer_state_projection.apply(changes)
+        for slot_id in changes.get("assignments", {}):
+            message = printer_state_projection.slot_message(slot_id)
+            if message is not None:
+                printer_event_bus.publish(message)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_printer_state_changes(session) -> None:
+    session.info.pop(_CHANGES_KEY, None)
@@ -0,0 +1,386 @@
+"""Fleet-wide rebuild of remaining_weight_g, run as a background job or from the CLI."""
+
+import asyncio
+import logging
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any
+
+from sqlalchemy import insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.models import Filament, Spool, SpoolEvent
+from app.services.event_archive_store import SPOOL_EVENTS, EventArchiveStore, merge_event_streams
+from app.services.spool_service import WEIGHT_EVENT_TYPES, replay_weight_event
+from app.services.status_registry import status_registry
+
+logger = logging.getLogger(__name__)
+
+SPOOL_SELECT_CHUNK = 500
+WRITE_BATCH_SIZE = 500
+STREAM_BATCH_SIZE = 1000
+JOBS_KEPT = 20
+
+
+@dataclass
+class RebuildProgress:
+    total: int = 0
+    scanned: int = 0
+    written: int = 0
+    updated: int = 0
+    blocked: int = 0
+    emptied: int = 0
+    events_replayed: int = 0
+
+
+@dataclass
+class _SpoolTarget:
+    spool_id: int
+    remaining: float | None
+    status_id: int
+    tara: float | None
+
+
+@dataclass
+class _SpoolResult:
+    target: _SpoolTarget
+    remaining: float | None = None
+    last_plausible: float | None = None
+    blocked_event_id: int | None = None
+
+
+async def _load_targets(
+    db: AsyncSession,
+    spool_ids: list[int] | None,
+    filament_id: int | None,
+) -> list[_SpoolTarget]:
+    base = (
+        select(
+            Spool.id,
+            Spool.remaining_weight_g,
+            Spool.status_id,
+            Spool.empty_spool_weight_g,
+            Filament.default_spool_weight_g,
+        )
+        .join(Filament, Spool.filament_id == Filament.id)
+        .where(Spool.deleted_at.is_(None))
+    )
+    if filament_id is not None:
+        base = base.where(Spool.filament_id == filament_id)
+
+    if spool_ids is None:
+        statements = [base]
+    else:
+        unique_ids = list(dict.fromkeys(spool_ids))
+        statements = [
+            base.where(Spool.id.in_(unique_ids[i:i + SPOOL_SELECT_CHUNK]))
+            for i in range(0, len(unique_ids), SPOOL_SELECT_CHUNK)
+        ]
+
+    targets: list[_SpoolTarget] = []
+    for stmt in statements:
+        result = await db.execute(stmt)
+        for spool_id, remaining, status_id, empty_weight, default_weight in result.all():
+            targets.append(_SpoolTarget(
+                spool_id=spool_id,
+                remaining=remaining,
+                status_id=status_id,
+                tara=empty_weight if empty_weight is not None else default_weight,
+            ))
+    targets.sort(key=lambda t: t.spool_id)
+    return targets
+
+
+async def _replay_partition(
+    db: AsyncSession,
+    targets: list[_SpoolTarget],
+    progress: RebuildProgress,
+    selected: bool = False,
+) -> list[_SpoolResult]:
+    """Replay the weight events of a partition in ordered scans.
+
+    The whole fleet is scanned as one id range. A selection (spool ids,
+    filament) can be sparse, a range would read every spool in between, so
+    it is scanned by id lists of SPOOL_SELECT_CHUNK instead.
+
+    Spools with archived events start from their archive state. Spools whose
+    state no longer applies (tara changed, backdated events) are skipped in
+    the scan and replayed one by one with their archived events merged in.
+    """
+    results = {
+        t.spool_id: _SpoolResult(target=t, last_plausible=t.remaining)
+        for t in targets
+    }
+
+    archive = EventArchiveStore(db)
+    backdated = await archive.backdated_spool_ids(event_types=WEIGHT_EVENT_TYPES)
+    merged: list[_SpoolResult] = []
+    for spool_id, state in (await archive.get_states()).items():
+        result = results.get(spool_id)
+        if result is None:
+            continue
+        if state.tara_g != result.target.tara or spool_id in backdated:
+            merged.append(result)
+            continue
+        result.remaining = state.remaining_weight_g
+        if state.last_plausible_remaining_g is not None:
+            result.last_plausible = state.last_plausible_remaining_g
+        result.blocked_event_id = state.blocked_event_id
+    skipped = {result.target.spool_id for result in merged}
+
+    stmt = (
+        select(
+            SpoolEvent.id,
+            SpoolEvent.spool_id,
+            SpoolEvent.event_type,
+            SpoolEvent.event_at,
+            SpoolEvent.measured_weight_g,
+            SpoolEvent.delta_weight_g,
+            SpoolEvent.meta,
+        )
+        .where(SpoolEvent.event_type.in_(WEIGHT_EVENT_TYPES))
+        .order_by(SpoolEvent.spool_id, SpoolEvent.event_at, SpoolEvent.id)
+        .execution_options(yield_per=STREAM_BATCH_SIZE)
+    )
+
+    if selected:
+        scanned_ids = [t.spool_id for t in targets if t.spool_id not in skipped]
+        conditions = [
+            SpoolEvent.spool_id.in_(scanned_ids[i:i + SPOOL_SELECT_CHUNK])
+            for i in range(0, len(scanned_ids), SPOOL_SELECT_CHUNK)
+        ]
+    else:
+        conditions = [SpoolEvent.spool_id.between(targets[0].spool_id, targets[-1].spool_id)]
+
+    current: _SpoolResult | None = None
+    for condition in conditions:
+        stream = await db.stream(stmt.where(condition))
+        try:
+            async for event in stream:
+                if current is None or current.target.spool_id != event.spool_id:
+                    current = results.get(event.spool_id)
+                if current is None or event.spool_id in skipped:
+                    continue
+                _replay_event(current, event, progress)
+        finally:
+            await stream.close()
+
+    for result in merged:
+        spool_id = result.target.spool_id
+        archived = await archive.load_events(SPOOL_EVENTS, spool_id, WEIGHT_EVENT_TYPES)
+        stream = await db.stream(stmt.where(SpoolEvent.spool_id == spool_id))
+        try:
+            async for event in merge_event_streams(archived, stream):
+                _replay_event(result, event, progress)
+        finally:
+            await stream.close()
+
+    progress.scanned += len(targets)
+    return list(results.values())
+
+
+def _replay_event(result: _SpoolResult, event: Any, progress: RebuildProgress) -> None:
+    if result.blocked_event_id is not None:
+        return
+    remaining, blocked = replay_weight_event(result.remaining, event, result.target.tara)
+    progress.events_replayed += 1
+    if blocked:
+        result.blocked_event_id = event.id
+        result.remaining = None
+        return
+    result.remaining = remaining
+    if remaining is not None:
+        result.last_plausible = remaining
+
+
+async def _write_results(
+    db: AsyncSession,
+    results: list[_SpoolResult],
+    progress: RebuildProgress,
+) -> None:
+    """Write rebuilt weights back in batches, mirroring rebuild_remaining_weight."""
+    empty_status_id = await status_registry.get_id(db, "empty")
+    now = datetime.utcnow()
+
+    for i in range(0, len(results), WRITE_BATCH_SIZE):
+        batch = results[i:i + WRITE_BATCH_SIZE]
+        weight_rows: list[dict[str, Any]] = []
+        status_rows: list[dict[str, Any]] = []
+        event_rows: list[dict[str, Any]] = []
+
+        for result in batch:
+            target = result.target
+            if result.blocked_event_id is not None:
+                progress.blocked += 1
+                event_rows.append({
+                    "spool_id": target.spool_id,
+                    "event_type": "manual_adjust",
+                    "event_at": now,
+                    "source": "system",
+                    "meta": {
+                        "source": "rebuild",
+                        "warning": "tara_missing",
+                        "last_plausible_remaining_g": result.last_plausible,
+                        "affected_event_id": result.blocked_event_id,
+                    },
+                    "note": "Rebuild blocked: tara missing, remaining set to NULL",
+                })
+            elif (
+                result.remaining == 0
+                and empty_status_id
+                and await status_registry.get_key(db, target.status_id) != "empty"
+            ):
+                progress.emptied += 1
+                status_rows.append({"id": target.spool_id, "status_id": empty_status_id})
+                event_rows.append({
+                    "spool_id": target.spool_id,
+                    "event_type": "empty",
+                    "event_at": now,
+                    "source": "system",
+                    "to_status_id": empty_status_id,
+                    "meta": {
+                        "auto": True,
+                        "source": "rebuild",
+                        "reason": "remaining_rebuilt_to_zero",
+                    },
+                })
+
+            if result.remaining != target.remaining:
+                progress.updated += 1
+                weight_rows.append({"id": target.spool_id, "remaining_weight_g": result.remaining})
+
+        if weight_rows:
+            await db.execute(update(Spool), weight_rows)
+        if status_rows:
+            await db.execute(update(Spool), status_rows)
+        if event_rows:
+            await db.execute(insert(SpoolEvent), event_rows)
+        await db.commit()
+        progress.written += len(batch)
+
+
+async def rebuild_remaining_weights(
+    session_maker: async_sessionmaker[AsyncSession],
+    spool_ids: list[int] | None = None,
+    filament_id: int | None = None,
+    workers: int = 1,
+    progress: RebuildProgress | None = None,
+) -> RebuildProgress:
+    """Rebuild remaining_weight_g of selected (or all) spools.
+
+    Target spools are split into contiguous id ranges; each worker replays
+    its range with ordered event scans and writes the results back in
+    batches of WRITE_BATCH_SIZE. Same rules as
+    SpoolService.rebuild_remaining_weight, but ignores checkpoints (archive
+    states are still used).
+    """
+    progress = progress or RebuildProgress()
+
+    async with session_maker() as db:
+        targets = await _load_targets(db, spool_ids, filament_id)
+        # SQLite serializes writers, parallel workers would only contend for the lock
+        if db.get_bind().dialect.name == "sqlite":
+            workers = 1
+    progress.total = len(targets)
+    if not targets:
+        return progress
+    selected = spool_ids is not None or filament_id is not None
+
+    workers = max(1, min(workers, len(targets)))
+    size = -(-len(targets) // workers)
+    partitions = [targets[i:i + size] for i in range(0, len(targets), size)]
+
+    async def run(partition: list[_SpoolTarget]) -> None:
+        async with session_maker() as db:
+            results = await _replay_partition(db, partition, progress, selected)
+            await _write_results(db, results, progress)
+
+    await asyncio.gather(*(run(p) for p in partitions))
+
+    logger.info(
+        f"Remaining weight rebuild finished: {progress.total} spools, "
+        f"{progress.updated} updated, {progress.emptied} emptied, {progress.blocked} blocked"
+    )
+    return progress
+
+
+@dataclass
+class RebuildJob:
+    id: str
+    spool_ids: list[int] | None
+    filament_id: int | None
+    workers: int
+    status: str = "pending"
+    progress: RebuildProgress = field(default_factory=RebuildProgress)
+    error: str | None = None
+    created_at: datetime = field(default_factory=datetime.utcnow)
+    started_at: datetime | None = None
+    finished_at: datetime | None = None
+
+
+class RebuildJobManager:
+    """In-memory registry of rebuild jobs; one job runs at a time."""
+
+    def __init__(self):
+        self._jobs: dict[str, RebuildJob] = {}
+        self._tasks: dict[str, asyncio.Task] = {}
+
+    def is_running(self) -> bool:
+        return any(job.status in ("pending", "running") for job in self._jobs.values())
+
+    def start(
+        self,
+        session_maker: async_sessionmaker[AsyncSession],
+        spool_ids: list[int] | None = None,
+        filament_id: int | None = None,
+        workers: int = 1,
+    ) -> RebuildJob:
+        if self.is_running():
+            raise RuntimeError("A rebuild job is already running")
+
+        job = RebuildJob(
+            id=uuid.uuid4().hex,
+            spool_ids=spool_ids,
+            filament_id=filament_id,
+            workers=workers,
+        )
+        self._jobs[job.id] = job
+        self._prune()
+        self._tasks[job.id] = asyncio.create_task(self._run(job, session_maker))
+        return job
+
+    async def _run(self, job: RebuildJob, session_maker: async_sessionmaker[AsyncSession]) -> None:
+        job.status = "running"
+        job.started_at = datetime.utcnow()
+        try:
+            await rebuild_remaining_weights(
+                session_maker,
+                spool_ids=job.spool_ids,
+                filament_id=job.filament_id,
+                workers=job.workers,
+                progress=job.progress,
+            )
+            job.status = "completed"
+        except Exception as e:
+            logger.exception(f"Rebuild job {job.id} failed")
+            job.status = "failed"
+            job.error = str(e)
+        finally:
+            job.finished_at = datetime.utcnow()
+            self._tasks.pop(job.id, None)
+
+    def _prune(self) -> None:
+        finished = [j for j in self._jobs.values() if j.status in ("completed", "failed")]
+        finished.sort(key=lambda j: j.created_at)
+        for job in finished[:max(0, len(self._jobs) - JOBS_KEPT)]:
+            del self._jobs[job.id]
+
+    def get(self, job_id: str) -> RebuildJob | None:
+        return self._jobs.get(job_id)
+
+    def list(self) -> list[RebuildJob]:
+        return sorted(self._jobs.values(), key=lambda j: j.created_at, reverse=True)
+
+
+rebuild_jobs = RebuildJobManager()
@@ -0,0 +1,289 @@
+"""Run-out forecasting: consumption rates and days-to-empty per spool and filament."""
+
+import asyncio
+import heapq
+import logging
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import Any, Iterable
+
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+from sqlalchemy.orm import Session
+
+from app.models import Filament, Spool, SpoolEvent, SpoolStatus
+from app.services.consumption_rollup_service import REPLAY_EVENT_TYPES, replay_consumption
+from app.services.event_archive_store import SPOOL_EVENTS, EventArchiveStore
+
+logger = logging.getLogger(__name__)
+
+SHORT_WINDOW_DAYS = 7
+LONG_WINDOW_DAYS = 30
+# The short window reacts to new projects, the long one smooths out idle weeks
+SHORT_WINDOW_WEIGHT = 0.5
+
+REFRESH_INTERVAL = timedelta(hours=1)
+
+_CHANGES_KEY = "runout_forecast_changes"
+
+
+@dataclass
+class SpoolForecast:
+    spool_id: int
+    filament_id: int
+    remaining_weight_g: float
+    daily_rate_g: float
+    days_to_empty: float | None
+
+
+@dataclass
+class FilamentForecast:
+    filament_id: int
+    spool_count: int
+    remaining_weight_g: float
+    daily_rate_g: float
+    days_to_empty: float | None
+
+
+def days_to_empty(remaining_g: float, daily_rate_g: float) -> float | None:
+    if daily_rate_g <= 0:
+        return None
+    return max(0.0, remaining_g) / daily_rate_g
+
+
+class RunoutForecaster:
+    """Cached per-spool daily consumption over the last LONG_WINDOW_DAYS.
+
+    The cache is built by one streamed pass over the event history of all
+    active spools and kept current by record(), applied on commit for every
+    consumption SpoolService books (see queue_consumption() below). A full
+    rebuild happens every REFRESH_INTERVAL to pick up changes made outside
+    SpoolService (imports, rebuilds, deletes); it runs in a background task
+    while readers keep getting the previous snapshot. Days-to-empty is
+    derived at read time from the current remaining weight.
+    """
+
+    def __init__(self):
+        self._daily: dict[int, dict[date, float]] = {}
+        self._loaded_at: datetime | None = None
+        self._lock = asyncio.Lock()
+        self._refresh_task: asyncio.Task | None = None
+
+    def invalidate(self) -> None:
+        self._loaded_at = None
+
+    def _is_fresh(self) -> bool:
+        return self._loaded_at is not None and datetime.utcnow() - self._loaded_at < REFRESH_INTERVAL
+
+    async def ensure_loaded(self, db: AsyncSession) -> None:
+        """Only the first load is awaited; a due refresh runs in the background."""
+        if self._is_fresh():
+            return
+        if self._loaded_at is not None:
+            if self._refresh_task is None or self._refresh_task.done():
+                self._refresh_task = asyncio.create_task(self._refresh_in_background(db.bind))
+            return
+        async with self._lock:
+            if self._loaded_at is None:
+                await self.refresh(db)
+
+    async def _refresh_in_background(self, bind: AsyncEngine) -> None:
+        try:
+            async with self._lock:
+                if self._is_fresh():
+                    return
+                async with AsyncSession(bind, expire_on_commit=False) as db:
+                    await self.refresh(db)
+        except Exception as e:
+            logger.error(f"Run-out forecast refresh failed: {e}")
+
+    async def refresh(self, db: AsyncSession, today: date | None = None) -> None:
+        today = today or datetime.utcnow().date()
+        window_start = today - timedelta(days=LONG_WINDOW_DAYS - 1)
+
+        spool_rows = await db.execute(
+            select(
+                Spool.id,
+                Spool.initial_total_weight_g,
+                Spool.empty_spool_weight_g,
+                Filament.default_spool_weight_g,
+            )
+            .join(Filament, Spool.filament_id == Filament.id)
+            .join(SpoolStatus, Spool.status_id == SpoolStatus.id)
+            .where(Spool.deleted_at.is_(None))
+            .where(SpoolStatus.key != "archived")
+        )
+        spools: dict[int, tuple[float | None, float | None]] = {}
+        for spool_id, initial, empty_weight, default_weight in spool_rows.all():
+            tara = empty_weight if empty_weight is not None else default_weight
+            start = max(0.0, initial - tara) if initial is not None and tara is not None else None
+            spools[spool_id] = (tara, start)
+
+        archive = EventArchiveStore(db)
+        states = await archive.get_states()
+        backdated = await archive.backdated_spool_ids(event_types=REPLAY_EVENT_TYPES)
+
+        daily: dict[int, dict[date, float]] = defaultdict(lambda: defaultdict(float))
+
+        # Spools whose archive state no longer applies (tara changed,
+        # backdated events) are skipped in the scan and replayed one by one
+        # with their archived events merged in, after the stream is closed
+        merged = {
+            spool_id
+            for spool_id, state in states.items()
+            if spool_id in spools and (state.tara_g != spools[spool_id][0] or spool_id in backdated)
+        }
+
+        def replay(spool_id: int, events: list[Any], start: float | None) -> None:
+            tara = spools[spool_id][0]
+            for event, consumed, _ in replay_consumption(events, tara, start):
+                day = event.event_at.date()
+                if window_start <= day <= today:
+                    daily[spool_id][day] += consumed
+
+        def flush(spool_id: int | None, events: list[Any]) -> None:
+            if spool_id not in spools or spool_id in merged or not events:
+                return
+            state = states.get(spool_id)
+            start = state.rollup_remaining_g if state is not None else spools[spool_id][1]
+            replay(spool_id, events, start)
+
+        # Measurements only carry absolute weights, so the baseline before the
+        # window is needed: replay the full history, keep only in-window days.
+        # Archived history is covered by the archive state where it applies.
+        stmt = (
+            select(
+                SpoolEvent.id,
+                SpoolEvent.spool_id,
+                SpoolEvent.event_type,
+                SpoolEvent.event_at,
+                SpoolEvent.delta_weight_g,
+                SpoolEvent.measured_weight_g,
+                SpoolEvent.from_location_id,
+                SpoolEvent.to_location_id,
+                SpoolEvent.meta,
+            )
+            .where(SpoolEvent.event_type.in_(REPLAY_EVENT_TYPES))
+            .order_by(SpoolEvent.spool_id, SpoolEvent.event_at, SpoolEvent.id)
+        )
+
+        current_spool: int | None = None
+        buffered: list[Any] = []
+        stream = await db.stream(stmt)
+        try:
+            async for row in stream:
+                if row.spool_id != current_spool:
+                    flush(current_spool, buffered)
+                    current_spool = row.spool_id
+                    buffered = []
+                buffered.append(row)
+        finally:
+            await stream.close()
+        flush(current_spool, buffered)
+
+        for spool_id in sorted(merged):
+            archived = await archive.load_events(SPOOL_EVENTS, spool_id, REPLAY_EVENT_TYPES)
+            live = (await db.execute(stmt.where(SpoolEvent.spool_id == spool_id))).all()
+            events = list(heapq.merge(archived, live, key=lambda e: (e.event_at, e.id)))
+            replay(spool_id, events, spools[spool_id][1])
+
+        self._daily = {spool_id: dict(days) for spool_id, days in daily.items()}
+        self._loaded_at = datetime.utcnow()
+        logger.info(f"Run-out forecast refreshed: {len(self._daily)} spools with recent consumption")
+
+    def record(self, spool_id: int, day: date, consumed_g: float) -> None:
+        """Add a freshly booked consumption to the cached window."""
+        if self._loaded_at is None or consumed_g <= 0:
+            return
+        per_day = self._daily.setdefault(spool_id, {})
+        per_day[day] = per_day.get(day, 0.0) + consumed_g
+
+    def daily_rate(self, spool_id: int, today: date | None = None) -> float:
+        """Blended g/day of the short and long window."""
+        per_day = self._daily.get(spool_id)
+        if not per_day:
+            return 0.0
+        today = today or datetime.utcnow().date()
+        short_start = today - timedelta(days=SHORT_WINDOW_DAYS - 1)
+        long_start = today - timedelta(days=LONG_WINDOW_DAYS - 1)
+
+        short_sum = 0.0
+        long_sum = 0.0
+        for day, consumed in per_day.items():
+            if day < long_start or day > today:
+                continue
+            long_sum += consumed
+            if day >= short_start:
+                short_sum += consumed
+
+        return (
+            SHORT_WINDOW_WEIGHT * short_sum / SHORT_WINDOW_DAYS
+            + (1 - SHORT_WINDOW_WEIGHT) * long_sum / LONG_WINDOW_DAYS
+        )
+
+    def forecast_spools(
+        self,
+        spools: Iterable[tuple[int, int, float]],
+        today: date | None = None,
+    ) -> list[SpoolForecast]:
+        """Forecast for (spool_id, filament_id, remaining_weight_g) tuples."""
+        forecasts = []
+        for spool_id, filament_id, remaining in spools:
+            rate = self.daily_rate(spool_id, today)
+            forecasts.append(SpoolForecast(
+                spool_id=spool_id,
+                filament_id=filament_id,
+                remaining_weight_g=remaining,
+                daily_rate_g=rate,
+                days_to_empty=days_to_empty(remaining, rate),
+            ))
+        return forecasts
+
+    @staticmethod
+    def forecast_filaments(spool_forecasts: Iterable[SpoolForecast]) -> list[FilamentForecast]:
+        """Aggregate spool forecasts: total stock divided by total consumption rate."""
+        totals: dict[int, list[float]] = defaultdict(lambda: [0, 0.0, 0.0])
+        for forecast in spool_forecasts:
+            entry = totals[forecast.filament_id]
+            entry[0] += 1
+            entry[1] += max(0.0, forecast.remaining_weight_g)
+            entry[2] += forecast.daily_rate_g
+
+        return [
+            FilamentForecast(
+                filament_id=filament_id,
+                spool_count=int(count),
+                remaining_weight_g=remaining,
+                daily_rate_g=rate,
+                days_to_empty=days_to_empty(remaining, rate),
+            )
+            for filament_id, (count, remaining, rate) in totals.items()
+        ]
+
+
+runout_forecaster = RunoutForecaster()
+
+
+def queue_consumption(db: AsyncSession, spool_id: int, day: date, consumed_g: float) -> None:
+    """Queue a booked consumption; it reaches the cache when db commits."""
+    if consumed_g <= 0:
+        return
+    db.info.setdefault(_CHANGES_KEY, []).append((spool_id, day, consumed_g))
+
+
+# Collected per session and applied on commit, so rolled back consumption
+# never reaches the cache.
+
+@event.listens_for(Session, "after_commit")
+def _apply_runout_forecast_changes(session) -> None:
+    changes = session.info.pop(_CHANGES_KEY, None)
+    if not changes:
+        return
+    for spool_id, day, consumed_g in changes:
+        runout_forecaster.record(spool_id, day, consumed_g)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_runout_forecast_changes(session) -> None:
+    session.info.pop(_CHANGES_KEY, None)
@@ -0,0 +1,172 @@
+"""Coalesces settling scale readings into one measurement event."""
+
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.config import settings
+from app.core.database import async_session_maker
+from app.core.security import Principal
+from app.services.spool_service import SpoolService
+
+logger = logging.getLogger(__name__)
+
+# Consecutive readings within the tolerance that count as settled
+STABLE_READINGS = 3
+# Readings that never settle are written after this many quiet windows
+MAX_HOLD_WINDOWS = 5
+
+ReadingKey = tuple[int, int]
+
+
+@dataclass
+class _PendingReading:
+    device_id: int
+    spool_id: int
+    principal: Principal
+    note: str | None
+    measured_weight_g: float
+    event_at: datetime
+    first_at: datetime
+    stable_count: int = 1
+    timer: asyncio.Task | None = field(default=None, repr=False)
+
+
+class ScaleDebouncer:
+    """Holds scale readings per (device, spool) until the weight settles.
+
+    A reading is written once STABLE_READINGS consecutive readings agree
+    within the tolerance, or when no further reading arrives within the
+    quiet window. Only the last reading becomes a measurement event.
+    Writes of one key are serialized so they land in order; different
+    keys are written concurrently.
+    """
+
+    def __init__(
+        self,
+        session_maker: async_sessionmaker[AsyncSession],
+        window_seconds: float,
+        tolerance_g: float,
+    ):
+        self.session_maker = session_maker
+        self.window_seconds = window_seconds
+        self.tolerance_g = tolerance_g
+        self._pending: dict[ReadingKey, _PendingReading] = {}
+        # Per key while a write is running or waiting, with its user count
+        self._locks: dict[ReadingKey, tuple[asyncio.Lock, int]] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return self.window_seconds > 0
+
+    def pending_count(self) -> int:
+        return len(self._pending)
+
+    async def submit(
+        self,
+        device_id: int,
+        spool_id: int,
+        measured_weight_g: float,
+        principal: Principal,
+        note: str | None = None,
+        event_at: datetime | None = None,
+    ) -> None:
+        event_at = event_at or datetime.utcnow()
+        key = (device_id, spool_id)
+
+        pending = self._pending.get(key)
+        if pending is None:
+            pending = self._pending[key] = _PendingReading(
+                device_id=device_id,
+                spool_id=spool_id,
+                principal=principal,
+                note=note,
+                measured_weight_g=measured_weight_g,
+                event_at=event_at,
+                first_at=event_at,
+            )
+        else:
+            if abs(measured_weight_g - pending.measured_weight_g) <= self.tolerance_g:
+                pending.stable_count += 1
+            else:
+                pending.stable_count = 1
+            pending.measured_weight_g = measured_weight_g
+            pending.event_at = event_at
+
+        held = (event_at - pending.first_at).total_seconds()
+        if pending.stable_count >= STABLE_READINGS or held >= self.window_seconds * MAX_HOLD_WINDOWS:
+            await self.flush(key)
+            return
+
+        if pending.timer is not None:
+            pending.timer.cancel()
+        pending.timer = asyncio.create_task(self._flush_later(key))
+
+    async def _flush_later(self, key: ReadingKey) -> None:
+        await asyncio.sleep(self.window_seconds)
+        pending = self._pending.get(key)
+        if pending is not None:
+            # Flushing ourselves, don't cancel the running task
+            pending.timer = None
+        await self.flush(key)
+
+    async def flush(self, key: ReadingKey) -> None:
+        pending = self._pending.pop(key, None)
+        if pending is None:
+            return
+        if pending.timer is not None:
+            pending.timer.cancel()
+
+        lock, users = self._locks.get(key, (None, 0))
+        if lock is None:
+            lock = asyncio.Lock()
+        self._locks[key] = (lock, users + 1)
+        try:
+            async with lock:
+                await self._write(pending)
+        finally:
+            lock, users = self._locks[key]
+            if users == 1:
+                del self._locks[key]
+            else:
+                self._locks[key] = (lock, users - 1)
+
+    async def _write(self, pending: _PendingReading) -> None:
+        try:
+            async with self.session_maker() as db:
+                service = SpoolService(db)
+                spool = await service.get_spool(pending.spool_id)
+                if spool is None:
+                    return
+                await service.record_measurement(
+                    spool=spool,
+                    measured_weight_g=pending.measured_weight_g,
+                    event_at=pending.event_at,
+                    principal=pending.principal,
+                    source="device",
+                    note=pending.note,
+                )
+        except Exception:
+            logger.exception(
+                f"Failed to record settled reading of device {pending.device_id} "
+                f"for spool {pending.spool_id}"
+            )
+
+    async def flush_all(self) -> None:
+        """Write all held readings, e.g. on shutdown."""
+        for key in list(self._pending):
+            await self.flush(key)
+        # Wait for writes started by timers
+        for lock, _users in list(self._locks.values()):
+            async with lock:
+                pass
+
+
+scale_debouncer = ScaleDebouncer(
+    async_session_maker,
+    window_seconds=settings.scale_debounce_seconds,
+    tolerance_g=settings.scale_stable_tolerance_g,
+)
@@ -0,0 +1,198 @@
+"""Process-wide index of spool identifiers (rfid_uid/external_id -> spool id)."""
+
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Any
+
+from sqlalchemy import event, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.models import Spool
+
+logger = logging.getLogger(__name__)
+
+# Picks up changes made outside this process (CLI, other workers)
+REFRESH_INTERVAL = timedelta(minutes=10)
+
+_CHANGES_KEY = "spool_identifier_changes"
+
+
+class SpoolIdentifierIndex:
+    """rfid_uid and external_id of all non-deleted spools, in both directions.
+
+    Warmed at startup and kept current by committed ORM changes of Spool
+    rows (see the session listeners below). Resolving an identifier costs a
+    dict lookup plus the primary-key fetch of the spool; the fetched row is
+    checked against the identifier, and a mismatch falls back to one query.
+    A miss also falls back to one query, and a hit is added to the index,
+    so spools written outside this process resolve before the next refresh.
+    """
+
+    def __init__(self):
+        self._by_rfid: dict[str, int] = {}
+        self._by_external_id: dict[str, int] = {}
+        self._by_spool: dict[int, tuple[str | None, str | None]] = {}
+        self._loaded_at: datetime | None = None
+        self._lock = asyncio.Lock()
+
+    def invalidate(self) -> None:
+        self._loaded_at = None
+
+    async def load(self, db: AsyncSession) -> None:
+        with db.no_autoflush:
+            result = await db.execute(
+                select(Spool.id, Spool.rfid_uid, Spool.external_id)
+                .where(Spool.deleted_at.is_(None))
+                .where(or_(Spool.rfid_uid.isnot(None), Spool.external_id.isnot(None)))
+            )
+        self._by_rfid = {}
+        self._by_external_id = {}
+        self._by_spool = {}
+        for spool_id, rfid_uid, external_id in result.all():
+            self.put(spool_id, rfid_uid, external_id)
+        self._loaded_at = datetime.utcnow()
+        logger.debug(f"Spool identifier index loaded: {len(self._by_spool)} spools")
+
+    async def ensure_loaded(self, db: AsyncSession) -> None:
+        if self._loaded_at is not None and datetime.utcnow() - self._loaded_at < REFRESH_INTERVAL:
+            return
+        async with self._lock:
+            if self._loaded_at is not None and datetime.utcnow() - self._loaded_at < REFRESH_INTERVAL:
+                return
+            await self.load(db)
+
+    def put(self, spool_id: int, rfid_uid: str | None, external_id: str | None) -> None:
+        self.discard(spool_id)
+        if not rfid_uid and not external_id:
+            return
+        self._by_spool[spool_id] = (rfid_uid, external_id)
+        if rfid_uid:
+            self._by_rfid[rfid_uid] = spool_id
+        if external_id:
+            self._by_external_id[external_id] = spool_id
+
+    def discard(self, spool_id: int) -> None:
+        old = self._by_spool.pop(spool_id, None)
+        if old is None:
+            return
+        rfid_uid, external_id = old
+        if rfid_uid and self._by_rfid.get(rfid_uid) == spool_id:
+            del self._by_rfid[rfid_uid]
+        if external_id and self._by_external_id.get(external_id) == spool_id:
+            del self._by_external_id[external_id]
+
+    def _match(self, rfid_uid: str | None, external_id: str | None) -> tuple[int, str, str] | None:
+        if rfid_uid and rfid_uid in self._by_rfid:
+            return self._by_rfid[rfid_uid], "rfid_uid", rfid_uid
+        if external_id and external_id in self._by_external_id:
+            return self._by_external_id[external_id], "external_id", external_id
+        return None
+
+    async def _query(
+        self,
+        db: AsyncSession,
+        rfid_uid: str | None,
+        external_id: str | None,
+        *options: Any,
+    ) -> Spool | None:
+        """Resolve with one indexed query and add the hits to the index."""
+        conditions = []
+        if rfid_uid:
+            conditions.append(Spool.rfid_uid == rfid_uid)
+        if external_id:
+            conditions.append(Spool.external_id == external_id)
+        with db.no_autoflush:
+            result = await db.execute(
+                select(Spool).where(or_(*conditions), Spool.deleted_at.is_(None)).options(*options)
+            )
+        spools = result.scalars().all()
+        for spool in spools:
+            # Pending changes of this session reach the index on commit
+            if not db.is_modified(spool):
+                self.put(spool.id, spool.rfid_uid, spool.external_id)
+        for spool in spools:
+            if rfid_uid and spool.rfid_uid == rfid_uid:
+                return spool
+        return spools[0] if spools else None
+
+    async def lookup(
+        self,
+        db: AsyncSession,
+        rfid_uid: str | None,
+        external_id: str | None,
+    ) -> tuple[int, str, str] | None:
+        """(spool_id, column, value) of the match by rfid_uid, else by external_id."""
+        if not rfid_uid and not external_id:
+            return None
+        await self.ensure_loaded(db)
+        match = self._match(rfid_uid, external_id)
+        if match is None and await self._query(db, rfid_uid, external_id) is not None:
+            match = self._match(rfid_uid, external_id)
+        return match
+
+    async def resolve(
+        self,
+        db: AsyncSession,
+        rfid_uid: str | None,
+        external_id: str | None,
+        *options: Any,
+    ) -> Spool | None:
+        """Non-deleted spool by rfid_uid, else by external_id, loaded with options."""
+        if not rfid_uid and not external_id:
+            return None
+        await self.ensure_loaded(db)
+        match = self._match(rfid_uid, external_id)
+        if match is None:
+            return await self._query(db, rfid_uid, external_id, *options)
+        spool_id, column, value = match
+
+        result = await db.execute(
+            select(Spool).where(Spool.id == spool_id, Spool.deleted_at.is_(None)).options(*options)
+        )
+        spool = result.scalar_one_or_none()
+        if spool is not None and getattr(spool, column) == value:
+            return spool
+
+        # Stale entry: resolve with one query and reload on next use
+        self.invalidate()
+        return await self._query(db, rfid_uid, external_id, *options)
+
+
+spool_identifier_index = SpoolIdentifierIndex()
+
+
+# Changes are collected per flush and applied on commit, so rolled back
+# changes never reach the index.
+
+@event.listens_for(Session, "after_flush")
+def _collect_spool_identifier_changes(session, flush_context) -> None:
+    changes = None
+    for obj in session.new | session.dirty:
+        if isinstance(obj, Spool):
+            if changes is None:
+                changes = session.info.setdefault(_CHANGES_KEY, {})
+            changes[obj.id] = None if obj.deleted_at is not None else (obj.rfid_uid, obj.external_id)
+    for obj in session.deleted:
+        if isinstance(obj, Spool):
+            if changes is None:
+                changes = session.info.setdefault(_CHANGES_KEY, {})
+            changes[obj.id] = None
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_spool_identifier_changes(session) -> None:
+    changes = session.info.pop(_CHANGES_KEY, None)
+    if not changes:
+        return
+    for spool_id, identifiers in changes.items():
+        if identifiers is None:
+            spool_identifier_index.discard(spool_id)
+        else:
+            spool_identifier_index.put(spool_id, *identifiers)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_spool_identifier_changes(session) -> None:
+    session.info.pop(_CHANGES_KEY, None)
@@ -1,12 +1,64 @@
-from datetime import datetime
+from datetime import datetime, timezone
 from typing import Any
 
-from sqlalchemy import select, update
+from sqlalchemy import and_, delete, insert, or_, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
+from sqlalchemy.orm.attributes import set_committed_value
 
 from app.core.security import Principal
-from app.models import Filament, Location, Spool, SpoolEvent, SpoolStatus
+from app.models import Filament, Location, Spool, SpoolEvent, SpoolWeightCheckpoint
+from app.services.consumption_rollup_service import ConsumptionRollupService
+from app.services.event_archive_store import SPOOL_EVENTS, EventArchiveStore, merge_event_streams
+from app.services.runout_forecast_service import queue_consumption
+from app.services.spool_identifier_index import spool_identifier_index
+from app.services.status_registry import status_registry
+
+# Spools per statement in change_statuses_bulk, keeps IN lists below parameter limits
+BULK_STATUS_CHUNK = 500
+
+# Event types replayed by rebuild_remaining_weight
+WEIGHT_EVENT_TYPES = ("measurement", "manual_adjust", "print_consumption")
+REBUILD_STREAM_BATCH = 500
+REBUILD_CHECKPOINT_INTERVAL = 1000
+REBUILD_CHECKPOINTS_KEPT = 3
+
+
+def to_naive_utc(value: datetime) -> datetime:
+    """Event times are stored as naive UTC; convert aware datetimes."""
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def replay_weight_event(
+    remaining: float | None,
+    event: Any,
+    tara: float | None,
+) -> tuple[float | None, bool]:
+    """Apply one weight event during a rebuild.
+
+    Returns the new remaining weight and whether the rebuild is blocked
+    because the event needs a tara that is missing.
+    """
+    if event.event_type == "measurement":
+        if tara is None:
+            return None, True
+        return max(0.0, event.measured_weight_g - tara), False
+
+    if event.event_type == "manual_adjust":
+        adj_type = event.meta.get("adjustment_type") if event.meta else None
+        if adj_type == "absolute":
+            if tara is None:
+                return None, True
+            return max(0.0, event.measured_weight_g - tara), False
+        if adj_type == "relative" and remaining is not None:
+            return max(0.0, remaining + event.delta_weight_g), False
+
+    elif event.event_type == "print_consumption" and remaining is not None:
+        return max(0.0, remaining + event.delta_weight_g), False
+
+    return remaining, False
 
 
 class SpoolService:
@@ -25,29 +77,13 @@ class SpoolService:
         return result.scalar_one_or_none()
 
     async def get_spool_by_identifier(self, rfid_uid: str | None, external_id: str | None) -> Spool | None:
-        if rfid_uid:
-            result = await self.db.execute(
-                select(Spool)
-                .where(Spool.rfid_uid == rfid_uid, Spool.deleted_at.is_(None))
-                .options(
-                    selectinload(Spool.filament).selectinload(Filament.manufacturer),
-                    selectinload(Spool.status),
-                )
-            )
-            spool = result.scalar_one_or_none()
-            if spool:
-                return spool
-        if external_id:
-            result = await self.db.execute(
-                select(Spool)
-                .where(Spool.external_id == external_id, Spool.deleted_at.is_(None))
-                .options(
-                    selectinload(Spool.filament).selectinload(Filament.manufacturer),
-                    selectinload(Spool.status),
-                )
-            )
-            return result.scalar_one_or_none()
-        return None
+        return await spool_identifier_index.resolve(
+            self.db,
+            rfid_uid,
+            external_id,
+            selectinload(Spool.filament).selectinload(Filament.manufacturer),
+            selectinload(Spool.status),
+        )
 
     def _get_tara(self, spool: Spool) -> float | None:
         if spool.empty_spool_weight_g is not None:
@@ -56,9 +92,11 @@ class SpoolService:
             return spool.filament.default_spool_weight_g
         return None
 
-    async def _get_status_by_key(self, key: str) -> SpoolStatus | None:
-        result = await self.db.execute(select(SpoolStatus).where(SpoolStatus.key == key))
-        return result.scalar_one_or_none()
+    async def _get_status_id(self, key: str) -> int | None:
+        return await status_registry.get_id(self.db, key)
+
+    async def _get_status_key(self, status_id: int | None) -> str | None:
+        return await status_registry.get_key(self.db, status_id)
 
     async def _create_event(
         self,
@@ -93,31 +131,57 @@ class SpoolService:
             note=note,
             meta=meta,
         )
+        # Not flushed here: pending events are written together on the next
+        # flush/commit. Callers that need the id use _event_id().
         self.db.add(event)
-        await self.db.flush()
         return event
 
+    async def _event_id(self, event: SpoolEvent) -> int:
+        if event.id is None:
+            await self.db.flush()
+        return event.id
+
+    async def _track_consumption(
+        self,
+        spool: Spool,
+        consumed_g: float,
+        event_at: datetime,
+    ) -> None:
+        """Add consumed filament to the daily rollup and, on commit, the run-out forecast."""
+        if consumed_g <= 0:
+            return
+        # The rollup statements do not depend on pending events; keep those
+        # queued for the single flush at commit.
+        with self.db.no_autoflush:
+            await ConsumptionRollupService(self.db).add(
+                day=event_at.date(),
+                filament_id=spool.filament_id,
+                location_id=spool.location_id,
+                consumed_g=consumed_g,
+            )
+        queue_consumption(self.db, spool.id, event_at.date(), consumed_g)
+
     async def _handle_auto_empty(
         self,
         spool: Spool,
         remaining: float,
-        trigger_event_id: int,
+        trigger_event: SpoolEvent,
         event_at: datetime,
     ) -> None:
-        if remaining == 0 and spool.status.key != "empty":
-            empty_status = await self._get_status_by_key("empty")
-            if empty_status:
-                spool.status_id = empty_status.id
+        if remaining == 0 and await self._get_status_key(spool.status_id) != "empty":
+            empty_status_id = await self._get_status_id("empty")
+            if empty_status_id:
+                spool.status_id = empty_status_id
                 await self._create_event(
                     spool_id=spool.id,
                     event_type="empty",
                     event_at=event_at,
                     source="system",
                     from_status_id=spool.status_id,
-                    to_status_id=empty_status.id,
+                    to_status_id=empty_status_id,
                     meta={
                         "auto": True,
-                        "trigger_event_id": trigger_event_id,
+                        "trigger_event_id": await self._event_id(trigger_event),
                     },
                 )
 
@@ -127,24 +191,31 @@ class SpoolService:
         event_at: datetime,
     ) -> None:
         """Auto-transition from 'new' to 'opened' when weight changes."""
-        if spool.status and spool.status.key == "new":
-            opened_status = await self._get_status_by_key("opened")
-            if opened_status:
+        if await self._get_status_key(spool.status_id) == "new":
+            opened_status_id = await self._get_status_id("opened")
+            if opened_status_id:
                 old_status_id = spool.status_id
-                spool.status_id = opened_status.id
+                spool.status_id = opened_status_id
                 await self._create_event(
                     spool_id=spool.id,
                     event_type="opened",
                     event_at=event_at,
                     source="system",
                     from_status_id=old_status_id,
-                    to_status_id=opened_status.id,
+                    to_status_id=opened_status_id,
                     meta={
                         "auto": True,
                         "reason": "weight_changed",
                     },
                 )
 
+    def remaining_after_measurement(self, spool: Spool, measured_weight_g: float) -> float | None:
+        """Remaining weight a measurement would result in, without recording it."""
+        tara = self._get_tara(spool)
+        if tara is None:
+            return spool.remaining_weight_g
+        return max(0.0, measured_weight_g - tara)
+
     async def record_measurement(
         self,
         spool: Spool,
@@ -154,6 +225,22 @@ class SpoolService:
         source: str = "ui",
         note: str | None = None,
     ) -> tuple[SpoolEvent, float | None]:
+        event, remaining = await self._apply_measurement(
+            spool, measured_weight_g, to_naive_utc(event_at), principal, source, note
+        )
+        await self.db.commit()
+        return event, remaining
+
+    async def _apply_measurement(
+        self,
+        spool: Spool,
+        measured_weight_g: float,
+        event_at: datetime,
+        principal: Principal | None = None,
+        source: str = "ui",
+        note: str | None = None,
+    ) -> tuple[SpoolEvent, float | None]:
+        """Measurement semantics without committing (shared with the batch path)."""
         tara = self._get_tara(spool)
         meta: dict[str, Any] = {}
 
@@ -192,16 +279,178 @@ class SpoolService:
             meta=meta if meta else None,
         )
 
+        previous = spool.remaining_weight_g
         spool.remaining_weight_g = remaining
 
+        if previous is not None and remaining < previous:
+            await self._track_consumption(spool, previous - remaining, event_at)
+
         await self._handle_auto_opened(spool, event_at)
 
         if remaining == 0 and not clamped:
-            await self._handle_auto_empty(spool, remaining, event.id, event_at)
+            await self._handle_auto_empty(spool, remaining, event, event_at)
 
-        await self.db.commit()
         return event, remaining
 
+    async def get_spools_by_identifiers(
+        self,
+        rfid_uids: list[str],
+        external_ids: list[str],
+        spool_ids: list[int] | None = None,
+    ) -> tuple[dict[str, Spool], dict[str, Spool], dict[int, Spool]]:
+        """Resolve many identifiers with one query.
+
+        Returns lookup maps by rfid_uid, external_id and id.
+        """
+        conditions = []
+        if rfid_uids:
+            conditions.append(Spool.rfid_uid.in_(set(rfid_uids)))
+        if external_ids:
+            conditions.append(Spool.external_id.in_(set(external_ids)))
+        if spool_ids:
+            conditions.append(Spool.id.in_(set(spool_ids)))
+        if not conditions:
+            return {}, {}, {}
+
+        result = await self.db.execute(
+            select(Spool)
+            .where(or_(*conditions), Spool.deleted_at.is_(None))
+            .options(
+                selectinload(Spool.filament).selectinload(Filament.manufacturer),
+                selectinload(Spool.status),
+            )
+        )
+        by_rfid: dict[str, Spool] = {}
+        by_external_id: dict[str, Spool] = {}
+        by_id: dict[int, Spool] = {}
+        for spool in result.scalars().all():
+            if spool.rfid_uid:
+                by_rfid[spool.rfid_uid] = spool
+            if spool.external_id:
+                by_external_id[spool.external_id] = spool
+            by_id[spool.id] = spool
+        return by_rfid, by_external_id, by_id
+
+    async def record_measurements_batch(
+        self,
+        items: list[dict[str, Any]],
+        principal: Principal | None = None,
+        source: str = "device",
+        note: str | None = None,
+    ) -> list[dict[str, Any]]:
+        """Record many measurements in one transaction.
+
+        Each item has measured_weight_g, optional event_at and at least one of
+        rfid_uid, external_id, spool_id (looked up in that order). Items are
+        applied in event_at order so buffered readings replay chronologically.
+        Returns one result per item in input order; unknown spools are
+        reported per item and do not abort the batch.
+        """
+        by_rfid, by_external_id, by_id = await self.get_spools_by_identifiers(
+            [item["rfid_uid"] for item in items if item.get("rfid_uid")],
+            [item["external_id"] for item in items if item.get("external_id")],
+            [item["spool_id"] for item in items if item.get("spool_id")],
+        )
+
+        # Mixed naive and aware event times would not even sort
+        now = datetime.utcnow()
+        event_ats = [to_naive_utc(item["event_at"]) if item.get("event_at") else now for item in items]
+        results: list[dict[str, Any]] = [{} for _ in items]
+        events: dict[int, SpoolEvent] = {}
+        order = sorted(range(len(items)), key=lambda i: event_ats[i])
+
+        for index in order:
+            item = items[index]
+            spool = (
+                by_rfid.get(item.get("rfid_uid") or "")
+                or by_external_id.get(item.get("external_id") or "")
+                or by_id.get(item.get("spool_id") or 0)
+            )
+            if spool is None:
+                results[index] = {
+                    "index": index,
+                    "status": "not_found",
+                    "message": "Spool not found by identifier",
+                }
+                continue
+
+            event, remaining = await self._apply_measurement(
+                spool=spool,
+                measured_weight_g=item["measured_weight_g"],
+                event_at=event_ats[index],
+                principal=principal,
+                source=source,
+                note=note,
+            )
+            results[index] = {
+                "index": index,
+                "status": "ok",
+                "spool_id": spool.id,
+                "remaining_weight_g": remaining,
+            }
+            events[index] = event
+
+        await self.db.commit()
+        # Ids are assigned by the single flush of the commit
+        for index, event in events.items():
+            results[index]["event_id"] = event.id
+        return results
+
+    async def _add_remaining_weight(
+        self,
+        spool: Spool,
+        delta_weight_g: float,
+    ) -> tuple[float | None, float | None, bool]:
+        """Atomically add a delta to remaining_weight_g, clamped at zero.
+
+        Runs as a single UPDATE ... RETURNING, so concurrent consumption from
+        several printers/scales never loses an update. Clamping needs the old
+        value and falls back to a compare-and-set on the current row, as do
+        dialects without RETURNING.
+
+        Returns (previous, remaining, clamped); both weights are None when
+        the spool has no remaining weight.
+        """
+        if self.db.get_bind().dialect.update_returning:
+            result = await self.db.execute(
+                update(Spool)
+                .where(
+                    Spool.id == spool.id,
+                    Spool.remaining_weight_g.isnot(None),
+                    Spool.remaining_weight_g + delta_weight_g >= 0,
+                )
+                .values(remaining_weight_g=Spool.remaining_weight_g + delta_weight_g)
+                .returning(Spool.remaining_weight_g)
+                .execution_options(synchronize_session=False)
+            )
+            remaining = result.scalar_one_or_none()
+            if remaining is not None:
+                set_committed_value(spool, "remaining_weight_g", remaining)
+                return remaining - delta_weight_g, remaining, False
+
+        while True:
+            result = await self.db.execute(
+                select(Spool.remaining_weight_g).where(Spool.id == spool.id)
+            )
+            previous = result.scalar_one()
+            if previous is None:
+                set_committed_value(spool, "remaining_weight_g", None)
+                return None, None, False
+
+            remaining = previous + delta_weight_g
+            clamped = remaining < 0
+            if clamped:
+                remaining = 0.0
+            result = await self.db.execute(
+                update(Spool)
+                .where(Spool.id == spool.id, Spool.remaining_weight_g == previous)
+                .values(remaining_weight_g=remaining)
+                .execution_options(synchronize_session=False)
+            )
+            if result.rowcount:
+                set_committed_value(spool, "remaining_weight_g", remaining)
+                return previous, remaining, clamped
+
     async def record_adjustment(
         self,
         spool: Spool,
@@ -219,22 +468,31 @@ class SpoolService:
             if delta_weight_g is None:
                 raise ValueError("delta_weight_g required for relative adjustment")
 
-            if spool.remaining_weight_g is None:
-                event = await self._create_event(
-                    spool_id=spool.id,
-                    event_type="manual_adjust",
-                    event_at=event_at,
-                    user_id=principal.user_id if principal else None,
-                    device_id=principal.device_id if principal else None,
-                    source=source,
-                    delta_weight_g=delta_weight_g,
-                    note=note,
-                    meta=meta,
-                )
+            _, remaining, clamped = await self._add_remaining_weight(spool, delta_weight_g)
+            if clamped:
+                meta["clamped_to_zero"] = True
+            event = await self._create_event(
+                spool_id=spool.id,
+                event_type="manual_adjust",
+                event_at=event_at,
+                user_id=principal.user_id if principal else None,
+                device_id=principal.device_id if principal else None,
+                source=source,
+                delta_weight_g=delta_weight_g,
+                note=note,
+                meta=meta,
+            )
+            if remaining is None:
                 await self.db.commit()
                 return event, None
 
-            remaining = spool.remaining_weight_g + delta_weight_g
+            await self._handle_auto_opened(spool, event_at)
+
+            if remaining == 0 and not clamped:
+                await self._handle_auto_empty(spool, remaining, event, event_at)
+
+            await self.db.commit()
+            return event, remaining
 
         elif adjustment_type == "absolute":
             if measured_weight_g is None:
@@ -287,7 +545,7 @@ class SpoolService:
         await self._handle_auto_opened(spool, event_at)
 
         if remaining == 0 and not clamped:
-            await self._handle_auto_empty(spool, remaining, event.id, event_at)
+            await self._handle_auto_empty(spool, remaining, event, event_at)
 
         await self.db.commit()
         return event, remaining
@@ -306,28 +564,9 @@ class SpoolService:
 
         meta: dict[str, Any] = {}
 
-        if spool.remaining_weight_g is None:
-            event = await self._create_event(
-                spool_id=spool.id,
-                event_type="print_consumption",
-                event_at=event_at,
-                user_id=principal.user_id if principal else None,
-                device_id=principal.device_id if principal else None,
-                source=source,
-                delta_weight_g=delta_weight_g,
-                note=note,
-                meta=meta if meta else None,
-            )
-            await self.db.commit()
-            return event, None
-
-        remaining = spool.remaining_weight_g + delta_weight_g
-        clamped = False
-
-        if remaining < 0:
-            remaining = 0
+        previous, remaining, clamped = await self._add_remaining_weight(spool, delta_weight_g)
+        if clamped:
             meta["clamped_to_zero"] = True
-            clamped = True
 
         event = await self._create_event(
             spool_id=spool.id,
@@ -341,13 +580,20 @@ class SpoolService:
             meta=meta if meta else None,
         )
 
-        spool.remaining_weight_g = remaining
+        if remaining is None:
+            await self._track_consumption(spool, -delta_weight_g, event_at)
+            await self.db.commit()
+            return event, None
+
+        consumed = previous - remaining
         spool.last_used_at = event_at
 
+        await self._track_consumption(spool, consumed, event_at)
+
         await self._handle_auto_opened(spool, event_at)
 
         if remaining == 0 and not clamped:
-            await self._handle_auto_empty(spool, remaining, event.id, event_at)
+            await self._handle_auto_empty(spool, remaining, event, event_at)
 
         await self.db.commit()
         return event, remaining
@@ -362,8 +608,8 @@ class SpoolService:
         note: str | None = None,
         meta: dict[str, Any] | None = None,
     ) -> SpoolEvent:
-        new_status = await self._get_status_by_key(status_key)
-        if new_status is None:
+        new_status_id = await self._get_status_id(status_key)
+        if new_status_id is None:
             raise ValueError(f"Status not found: {status_key}")
 
         old_status_id = spool.status_id
@@ -376,12 +622,12 @@ class SpoolService:
             device_id=principal.device_id if principal else None,
             source=source,
             from_status_id=old_status_id,
-            to_status_id=new_status.id,
+            to_status_id=new_status_id,
             note=note,
             meta=meta,
         )
 
-        spool.status_id = new_status.id
+        spool.status_id = new_status_id
         await self.db.commit()
         return event
 
@@ -393,34 +639,52 @@ class SpoolService:
         source: str = "ui",
         note: str | None = None,
     ) -> int:
-        new_status = await self._get_status_by_key(status_key)
-        if new_status is None:
+        new_status_id = await self._get_status_id(status_key)
+        if new_status_id is None:
             raise ValueError(f"Status not found: {status_key}")
 
         event_at = datetime.utcnow()
+        user_id = principal.user_id if principal else None
         count = 0
-        
-        # We process one by one to ensure events are created. 
-        # For small numbers (dashboard modals), this is fine.
-        for sid in spool_ids:
-            spool = await self.get_spool(sid)
-            if not spool:
+
+        # Set-based in chunks: read the old status ids, update all spools of the
+        # chunk in one statement, insert all events in one statement.
+        unique_ids = list(dict.fromkeys(spool_ids))
+        for i in range(0, len(unique_ids), BULK_STATUS_CHUNK):
+            chunk = unique_ids[i:i + BULK_STATUS_CHUNK]
+            result = await self.db.execute(
+                select(Spool.id, Spool.status_id)
+                .where(Spool.id.in_(chunk), Spool.deleted_at.is_(None))
+                .with_for_update()
+            )
+            old_status_ids = dict(result.all())
+            if not old_status_ids:
                 continue
-            
-            old_status_id = spool.status_id
-            await self._create_event(
-                spool_id=spool.id,
-                event_type=status_key,
-                event_at=event_at,
-                user_id=principal.user_id if principal else None,
-                source=source,
-                from_status_id=old_status_id,
-                to_status_id=new_status.id,
-                note=note,
+
+            await self.db.execute(
+                update(Spool)
+                .where(Spool.id.in_(list(old_status_ids)))
+                .values(status_id=new_status_id)
+            )
+            await self.db.execute(
+                insert(SpoolEvent),
+                [
+                    {
+                        "spool_id": sid,
+                        "event_type": status_key,
+                        "event_at": event_at,
+                        "user_id": user_id,
+                        "source": source,
+                        "from_status_id": old_status_ids[sid],
+                        "to_status_id": new_status_id,
+                        "note": note,
+                    }
+                    for sid in chunk
+                    if sid in old_status_ids
+                ],
             )
-            spool.status_id = new_status.id
-            count += 1
-            
+            count += len(old_status_ids)
+
         await self.db.commit()
         return count
 
@@ -451,98 +715,198 @@ class SpoolService:
         await self.db.commit()
         return event
 
-    async def rebuild_remaining_weight(self, spool: Spool) -> float | None:
+    async def _latest_valid_checkpoint(
+        self,
+        spool_id: int,
+        tara: float | None,
+    ) -> SpoolWeightCheckpoint | None:
+        """Newest checkpoint that is still consistent with the event history.
+
+        A checkpoint is stale when the tara changed since it was written or
+        when an event was inserted before it afterwards (backdated event).
+        Stale checkpoints are deleted.
+        """
+        result = await self.db.execute(
+            select(SpoolWeightCheckpoint)
+            .where(SpoolWeightCheckpoint.spool_id == spool_id)
+            .order_by(SpoolWeightCheckpoint.event_at.desc(), SpoolWeightCheckpoint.id.desc())
+        )
+        stale_ids: list[int] = []
+        valid: SpoolWeightCheckpoint | None = None
+        for checkpoint in result.scalars().all():
+            if checkpoint.tara_g != tara:
+                stale_ids.append(checkpoint.id)
+                continue
+            backdated = await self.db.execute(
+                select(SpoolEvent.id)
+                .where(
+                    SpoolEvent.spool_id == spool_id,
+                    SpoolEvent.event_type.in_(WEIGHT_EVENT_TYPES),
+                    SpoolEvent.id > checkpoint.event_id,
+                    SpoolEvent.event_at < checkpoint.event_at,
+                )
+                .limit(1)
+            )
+            if backdated.first() is not None:
+                stale_ids.append(checkpoint.id)
+                continue
+            valid = checkpoint
+            break
+
+        if stale_ids:
+            await self.db.execute(
+                delete(SpoolWeightCheckpoint).where(SpoolWeightCheckpoint.id.in_(stale_ids))
+            )
+        return valid
+
+    async def _save_checkpoint(
+        self,
+        spool_id: int,
+        event_id: int,
+        event_at: datetime,
+        remaining: float | None,
+        tara: float | None,
+        events_replayed: int,
+    ) -> None:
+        self.db.add(SpoolWeightCheckpoint(
+            spool_id=spool_id,
+            event_id=event_id,
+            event_at=event_at,
+            remaining_weight_g=remaining,
+            tara_g=tara,
+            events_replayed=events_replayed,
+        ))
+        await self.db.flush()
+
+        # Only the newest few are ever used
         result = await self.db.execute(
-            select(SpoolEvent)
-            .where(SpoolEvent.spool_id == spool.id)
-            .order_by(SpoolEvent.event_at.asc())
+            select(SpoolWeightCheckpoint.id)
+            .where(SpoolWeightCheckpoint.spool_id == spool_id)
+            .order_by(SpoolWeightCheckpoint.event_at.desc(), SpoolWeightCheckpoint.id.desc())
+            .offset(REBUILD_CHECKPOINTS_KEPT)
         )
-        events = result.scalars().all()
+        old_ids = result.scalars().all()
+        if old_ids:
+            await self.db.execute(
+                delete(SpoolWeightCheckpoint).where(SpoolWeightCheckpoint.id.in_(old_ids))
+            )
+
+    async def rebuild_remaining_weight(self, spool: Spool) -> float | None:
+        """Recompute remaining_weight_g by replaying the spool's weight events.
+
+        Replays only the events after the latest valid checkpoint, or after
+        the archive state when the spool's old events were archived. Events
+        are streamed, and a new checkpoint is written every
+        REBUILD_CHECKPOINT_INTERVAL replayed events.
+        """
+        tara = self._get_tara(spool)
+        checkpoint = await self._latest_valid_checkpoint(spool.id, tara)
 
         remaining: float | None = None
         last_plausible_remaining: float | None = spool.remaining_weight_g
+        events_replayed = 0
         blocked_event_id: int | None = None
-
-        for event in events:
-            if event.event_type == "measurement":
-                tara = self._get_tara(spool)
-                if tara is None:
-                    blocked_event_id = event.id
-                    remaining = None
-                    await self._create_event(
-                        spool_id=spool.id,
-                        event_type="manual_adjust",
-                        event_at=datetime.utcnow(),
-                        source="system",
-                        meta={
-                            "source": "rebuild",
-                            "warning": "tara_missing",
-                            "last_plausible_remaining_g": last_plausible_remaining,
-                            "affected_event_id": blocked_event_id,
-                        },
-                        note="Rebuild blocked: tara missing, remaining set to NULL",
-                    )
-                    spool.remaining_weight_g = None
-                    await self.db.commit()
-                    return None
-
-                remaining = event.measured_weight_g - tara
-                if remaining < 0:
-                    remaining = 0
-
-            elif event.event_type == "manual_adjust":
-                adj_type = event.meta.get("adjustment_type") if event.meta else None
-                if adj_type == "absolute":
-                    tara = self._get_tara(spool)
-                    if tara is None:
-                        blocked_event_id = event.id
-                        remaining = None
-                        await self._create_event(
-                            spool_id=spool.id,
-                            event_type="manual_adjust",
-                            event_at=datetime.utcnow(),
-                            source="system",
-                            meta={
-                                "source": "rebuild",
-                                "warning": "tara_missing",
-                                "last_plausible_remaining_g": last_plausible_remaining,
-                                "affected_event_id": blocked_event_id,
-                            },
-                            note="Rebuild blocked: tara missing, remaining set to NULL",
-                        )
-                        spool.remaining_weight_g = None
-                        await self.db.commit()
-                        return None
-
-                    remaining = event.measured_weight_g - tara
-                    if remaining < 0:
-                        remaining = 0
-
-                elif adj_type == "relative" and remaining is not None:
-                    remaining += event.delta_weight_g
-                    if remaining < 0:
-                        remaining = 0
-
-            elif event.event_type == "print_consumption" and remaining is not None:
-                remaining += event.delta_weight_g
-                if remaining < 0:
-                    remaining = 0
-
+        archived_events: list[Any] = []
+
+        stmt = (
+            select(
+                SpoolEvent.id,
+                SpoolEvent.event_type,
+                SpoolEvent.event_at,
+                SpoolEvent.measured_weight_g,
+                SpoolEvent.delta_weight_g,
+                SpoolEvent.meta,
+            )
+            .where(
+                SpoolEvent.spool_id == spool.id,
+                SpoolEvent.event_type.in_(WEIGHT_EVENT_TYPES),
+            )
+            .order_by(SpoolEvent.event_at.asc(), SpoolEvent.id.asc())
+            .execution_options(yield_per=REBUILD_STREAM_BATCH)
+        )
+        if checkpoint is not None:
+            remaining = checkpoint.remaining_weight_g
             if remaining is not None:
                 last_plausible_remaining = remaining
+            events_replayed = checkpoint.events_replayed
+            stmt = stmt.where(
+                or_(
+                    SpoolEvent.event_at > checkpoint.event_at,
+                    and_(SpoolEvent.event_at == checkpoint.event_at, SpoolEvent.id > checkpoint.event_id),
+                )
+            )
+        else:
+            archive = EventArchiveStore(self.db)
+            state = (await archive.get_states([spool.id])).get(spool.id)
+            if state is not None:
+                backdated = await archive.backdated_spool_ids([spool.id], WEIGHT_EVENT_TYPES)
+                if state.tara_g == tara and not backdated:
+                    remaining = state.remaining_weight_g
+                    if state.last_plausible_remaining_g is not None:
+                        last_plausible_remaining = state.last_plausible_remaining_g
+                    blocked_event_id = state.blocked_event_id
+                    events_replayed = state.event_count
+                else:
+                    archived_events = await archive.load_events(SPOOL_EVENTS, spool.id, WEIGHT_EVENT_TYPES)
+
+        pending_checkpoint: tuple[int, datetime, float | None, int] | None = None
+        since_checkpoint = 0
+
+        if blocked_event_id is None:
+            stream = await self.db.stream(stmt)
+            try:
+                async for event in merge_event_streams(archived_events, stream):
+                    remaining, blocked = replay_weight_event(remaining, event, tara)
+                    if blocked:
+                        blocked_event_id = event.id
+                        break
+
+                    if remaining is not None:
+                        last_plausible_remaining = remaining
+
+                    events_replayed += 1
+                    since_checkpoint += 1
+                    # Checkpoints can only point at live events
+                    if since_checkpoint >= REBUILD_CHECKPOINT_INTERVAL and not getattr(event, "archived", False):
+                        pending_checkpoint = (event.id, event.event_at, remaining, events_replayed)
+                        since_checkpoint = 0
+            finally:
+                await stream.close()
+
+        if blocked_event_id is not None:
+            await self._create_event(
+                spool_id=spool.id,
+                event_type="manual_adjust",
+                event_at=datetime.utcnow(),
+                source="system",
+                meta={
+                    "source": "rebuild",
+                    "warning": "tara_missing",
+                    "last_plausible_remaining_g": last_plausible_remaining,
+                    "affected_event_id": blocked_event_id,
+                },
+                note="Rebuild blocked: tara missing, remaining set to NULL",
+            )
+            spool.remaining_weight_g = None
+            await self.db.commit()
+            return None
+
+        if pending_checkpoint is not None:
+            event_id, event_at, checkpoint_remaining, replayed = pending_checkpoint
+            await self._save_checkpoint(spool.id, event_id, event_at, checkpoint_remaining, tara, replayed)
 
         spool.remaining_weight_g = remaining
 
-        if remaining == 0 and spool.status.key != "empty":
-            empty_status = await self._get_status_by_key("empty")
-            if empty_status:
-                spool.status_id = empty_status.id
+        if remaining == 0 and await self._get_status_key(spool.status_id) != "empty":
+            empty_status_id = await self._get_status_id("empty")
+            if empty_status_id:
+                spool.status_id = empty_status_id
                 await self._create_event(
                     spool_id=spool.id,
                     event_type="empty",
                     event_at=datetime.utcnow(),
                     source="system",
-                    to_status_id=empty_status.id,
+                    to_status_id=empty_status_id,
                     meta={
                         "auto": True,
                         "source": "rebuild",
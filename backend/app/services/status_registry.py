@@ -0,0 +1,75 @@
+"""Process-wide cache of spool statuses (key <-> id)."""
+
+import asyncio
+import logging
+
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import SpoolStatus
+
+logger = logging.getLogger(__name__)
+
+
+class StatusRegistry:
+    """Key->id and id->key lookups for spool statuses.
+
+    Loaded lazily on first use. Any insert/update/delete of a SpoolStatus
+    through the ORM invalidates the cache; a lookup miss triggers one reload
+    so statuses created elsewhere (other process, raw SQL) are picked up too.
+    """
+
+    def __init__(self):
+        self._id_by_key: dict[str, int] = {}
+        self._key_by_id: dict[int, str] = {}
+        self._loaded = False
+        self._lock = asyncio.Lock()
+
+    def invalidate(self) -> None:
+        self._loaded = False
+
+    async def load(self, db: AsyncSession) -> None:
+        # Independent of pending objects, don't force an early flush
+        with db.no_autoflush:
+            result = await db.execute(select(SpoolStatus.id, SpoolStatus.key))
+        rows = result.all()
+        self._id_by_key = {key: status_id for status_id, key in rows}
+        self._key_by_id = {status_id: key for status_id, key in rows}
+        self._loaded = True
+        logger.debug(f"Status registry loaded: {len(rows)} statuses")
+
+    async def _ensure_loaded(self, db: AsyncSession, force: bool = False) -> None:
+        if self._loaded and not force:
+            return
+        async with self._lock:
+            if self._loaded and not force:
+                return
+            await self.load(db)
+
+    async def get_id(self, db: AsyncSession, key: str) -> int | None:
+        await self._ensure_loaded(db)
+        status_id = self._id_by_key.get(key)
+        if status_id is None:
+            await self._ensure_loaded(db, force=True)
+            status_id = self._id_by_key.get(key)
+        return status_id
+
+    async def get_key(self, db: AsyncSession, status_id: int | None) -> str | None:
+        if status_id is None:
+            return None
+        await self._ensure_loaded(db)
+        key = self._key_by_id.get(status_id)
+        if key is None:
+            await self._ensure_loaded(db, force=True)
+            key = self._key_by_id.get(status_id)
+        return key
+
+
+status_registry = StatusRegistry()
+
+
+@event.listens_for(SpoolStatus, "after_insert")
+@event.listens_for(SpoolStatus, "after_update")
+@event.listens_for(SpoolStatus, "after_delete")
+def _invalidate_status_registry(mapper, connection, target) -> None:
+    status_registry.invalidate()
@@ -0,0 +1,92 @@
+"""Benchmark of the Bambu report handling against a session of MQTT reports.
+
+data/bambu_reports.jsonl is a five minute print session of one printer
+at one report per second: full push_status reports, temperature/progress
+deltas, wifi and fan-only reports, AMS reports where only humidity and
+temperature moved, one real tray change and an "info" message.
+
+Compares the previous handling (json.loads of every report plus
+json.dumps(sort_keys=True) of the AMS array, no merging of deltas) with
+Driver._handle_message.
+
+    cd backend && python -m benchmarks.bambu_reports [--rounds N]
+"""
+
+import argparse
+import json
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+from app.plugins.bambu.driver import PRINT_STATE_FIELDS, Driver
+
+DATA = Path(__file__).parent / "data" / "bambu_reports.jsonl"
+
+
+def load_reports() -> list[SimpleNamespace]:
+    with DATA.open("rb") as f:
+        return [SimpleNamespace(payload=line.rstrip(b"\n")) for line in f if line.strip()]
+
+
+class PreviousDriver(Driver):
+    """The report handling before the fast path, for comparison."""
+
+    def _handle_message(self, msg) -> None:
+        try:
+            payload = json.loads(msg.payload)
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            return
+        print_data = payload.get("print", {})
+        if not print_data:
+            return
+        for key in PRINT_STATE_FIELDS:
+            if print_data.get(key) is not None:
+                self._print_state[key] = print_data[key]
+        ams_data = print_data.get("ams")
+        if not ams_data:
+            return
+        ams_units_raw = ams_data.get("ams", [])
+        if not ams_units_raw:
+            return
+        ams_hash = json.dumps(ams_units_raw, sort_keys=True)
+        if ams_hash == self._last_ams_fingerprint:
+            return
+        self._last_ams_fingerprint = ams_hash
+        ams_units = self._parse_ams_state(ams_units_raw)
+        if ams_units:
+            self.emit({"event_type": "ams_state", "ams_units": ams_units})
+
+
+def run(driver_class: type[Driver], reports: list[SimpleNamespace], rounds: int) -> tuple[float, int]:
+    """Seconds per report and ams_state events of one round."""
+    events: list[dict] = []
+    elapsed = 0.0
+    for round_no in range(rounds):
+        events.clear()
+        driver = driver_class(printer_id=0, config={}, emitter=events.append)
+        started = time.perf_counter()
+        for report in reports:
+            driver._handle_message(report)
+        elapsed += time.perf_counter() - started
+    return elapsed / (rounds * len(reports)), len(events)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args()
+
+    reports = load_reports()
+    size = sum(len(report.payload) for report in reports)
+    print(f"{len(reports)} reports, {size / 1024:.0f} KiB, {args.rounds} rounds")
+
+    results = {}
+    for name, driver_class in (("previous", PreviousDriver), ("current", Driver)):
+        per_report, events = run(driver_class, reports, args.rounds)
+        results[name] = per_report
+        print(f"{name:>9}: {per_report * 1e6:7.2f} us/report, {events} ams_state events")
+    print(f"  speedup: {results['previous'] / results['current']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
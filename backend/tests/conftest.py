@@ -137,4 +137,50 @@ async def auth_client(client, admin_user, db_session):
     return client, csrf_token
 
 
+@pytest_asyncio.fixture
+async def make_filament(db_session):
+    """Factory for filaments of one test manufacturer (PLA, 250 g default tara)."""
+    from app.models import Filament, Manufacturer
+
+    manufacturer = None
+
+    async def make(**fields) -> Filament:
+        nonlocal manufacturer
+        if manufacturer is None:
+            manufacturer = Manufacturer(name="Test Manufacturer")
+            db_session.add(manufacturer)
+            await db_session.commit()
+        fields = {
+            "designation": "Test PLA",
+            "type": "PLA",
+            "diameter_mm": 1.75,
+            "default_spool_weight_g": 250.0,
+            **fields,
+        }
+        filament = Filament(manufacturer_id=manufacturer.id, **fields)
+        db_session.add(filament)
+        await db_session.commit()
+        return filament
+
+    return make
+
+
+@pytest_asyncio.fixture
+async def make_spool(db_session, make_filament):
+    """Factory for spools in the given status; creates a filament unless one is passed."""
+    from app.models import Spool, SpoolStatus
+
+    async def make(filament=None, status: str = "opened", **fields) -> Spool:
+        if filament is None:
+            filament = await make_filament()
+        result = await db_session.execute(select(SpoolStatus.id).where(SpoolStatus.key == status))
+        # Keeps the filament loaded on the spool, tara lookups need it
+        spool = Spool(filament=filament, status_id=result.scalar_one(), **fields)
+        db_session.add(spool)
+        await db_session.commit()
+        return spool
+
+    return make
+
+
 from sqlalchemy import select
@@ -6,10 +6,11 @@ from app.core.security import hash_password, generate_token_secret
 from app.models import (
     User, Filament, Manufacturer, Spool, SpoolStatus,
     Printer, PrinterAmsUnit, PrinterSlot, PrinterSlotAssignment,
-    Device
+    PrinterSlotEvent, Device
 )
 from app.services.ams_slots_service import AmsSlotsService
-from sqlalchemy import select
+from app.services.spool_identifier_index import spool_identifier_index
+from sqlalchemy import func, select
 
 
 @pytest.fixture
@@ -248,3 +249,107 @@ class TestAmsSlotsService:
         await db_session.refresh(slot)
         assert slot.assignment.spool_id is None
         assert slot.assignment.present is False
+
+
+def _ams_report(humidity: int, second_tray: bool = False) -> list[dict]:
+    slots = [
+        {"slot_no": 1, "present": True, "rfid_uid": "TEST-RFID-001", "meta": {"humidity": humidity}},
+        {"slot_no": 2, "present": second_tray, "meta": {"humidity": humidity} if second_tray else None},
+        {"slot_no": 3, "present": False},
+        {"slot_no": 4, "present": False},
+    ]
+    return [{"ams_unit_no": 0, "slots_total": 4, "slots": slots}]
+
+
+class TestApplyAmsState:
+    @pytest.mark.asyncio
+    async def test_only_changed_slots_are_written(self, db_session, test_spool, test_printer):
+        await spool_identifier_index.load(db_session)
+        service = AmsSlotsService(db_session)
+
+        events, _ = await service.apply_ams_state(test_printer.id, _ams_report(3), datetime(2026, 3, 1, 10))
+        assert [(e.event_type, e.spool_id) for e in events] == [("spool_inserted", test_spool.id)]
+
+        # Humidity only: no slot events, the assignment meta follows
+        events, _ = await service.apply_ams_state(test_printer.id, _ams_report(4), datetime(2026, 3, 1, 11))
+        assert events == []
+
+        result = await db_session.execute(
+            select(PrinterSlotAssignment)
+            .join(PrinterSlot)
+            .where(PrinterSlot.printer_id == test_printer.id, PrinterSlot.slot_no == 1)
+        )
+        assignment = result.scalar_one()
+        assert assignment.spool_id == test_spool.id
+        assert assignment.meta == {"humidity": 4, "source": "ams_state"}
+
+        events, _ = await service.apply_ams_state(
+            test_printer.id, _ams_report(4, second_tray=True), datetime(2026, 3, 1, 12)
+        )
+        assert [(e.event_type, e.spool_id) for e in events] == [("spool_inserted", None)]
+
+        result = await db_session.execute(
+            select(func.count()).select_from(PrinterSlotEvent).where(PrinterSlotEvent.printer_id == test_printer.id)
+        )
+        assert result.scalar() == 2
+
+    @pytest.mark.asyncio
+    async def test_report_is_one_transaction(self, db_session, test_spool, test_printer):
+        from sqlalchemy import event as sa_event
+
+        await spool_identifier_index.load(db_session)
+        service = AmsSlotsService(db_session)
+
+        commits: list[int] = []
+
+        def count_commit(session):
+            commits.append(1)
+
+        sa_event.listen(db_session.sync_session, "after_commit", count_commit)
+        try:
+            events, conflicts = await service.apply_ams_state(
+                test_printer.id, _ams_report(3, second_tray=True), datetime(2026, 3, 1, 10)
+            )
+        finally:
+            sa_event.remove(db_session.sync_session, "after_commit", count_commit)
+
+        assert len(commits) == 1
+        assert len(events) == 2
+        assert conflicts == []
+
+        assignment = await db_session.get(PrinterSlotAssignment, events[0].slot_id)
+        assignment.meta = {"source": "manual", "material": "PETG"}
+        await db_session.commit()
+
+        events, conflicts = await service.apply_ams_state(test_printer.id, _ams_report(4, second_tray=True), datetime(2026, 3, 1, 11))
+        assert events == []
+        assert [(c["ams_unit_no"], c["slot_no"]) for c in conflicts] == [(0, 1)]
+        assert conflicts[0]["assignment"].meta["material"] == "PETG"
+
+    @pytest.mark.asyncio
+    async def test_topology_is_loaded_once(self, db_session, db_engine, test_spool, test_printer):
+        from sqlalchemy import event as sa_event
+
+        await spool_identifier_index.load(db_session)
+        service = AmsSlotsService(db_session)
+        await service.apply_ams_state(test_printer.id, _ams_report(3), datetime(2026, 3, 1, 10))
+
+        statements: list[str] = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        sa_event.listen(db_engine.sync_engine, "before_cursor_execute", record)
+        try:
+            events, _ = await service.apply_ams_state(
+                test_printer.id, _ams_report(4, second_tray=True), datetime(2026, 3, 1, 11)
+            )
+        finally:
+            sa_event.remove(db_engine.sync_engine, "before_cursor_execute", record)
+
+        assert len(events) == 1
+        topology_selects = [
+            s for s in statements
+            if s.lstrip().startswith("SELECT") and ("FROM printer_slots" in s or "FROM printer_ams_units" in s)
+        ]
+        assert len(topology_selects) == 2
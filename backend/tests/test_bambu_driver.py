@@ -0,0 +1,95 @@
+import json
+from types import SimpleNamespace
+
+from app.plugins.bambu.driver import Driver
+
+
+def _tray(tray_id: int, tray_type: str = "PLA", remain: int = 80) -> dict:
+    return {
+        "id": str(tray_id),
+        "tag_uid": f"TAG{tray_id}0000000000000",
+        "tray_uuid": f"UUID{tray_id}",
+        "tray_type": tray_type,
+        "tray_color": "FFFFFFFF",
+        "remain": remain,
+    }
+
+
+def _report(print_data: dict) -> SimpleNamespace:
+    return SimpleNamespace(payload=json.dumps({"print": print_data}).encode())
+
+
+def _ams_report(humidity: str, temp: str, trays: list[dict], msg: int = 1) -> SimpleNamespace:
+    return _report({"msg": msg, "ams": {"ams": [{"id": "0", "humidity": humidity, "temp": temp, "tray": trays}]}})
+
+
+def _driver(events: list[dict]) -> Driver:
+    return Driver(printer_id=1, config={}, emitter=events.append)
+
+
+class TestBambuReportDetection:
+    def test_humidity_and_temperature_alone_are_no_change(self):
+        events: list[dict] = []
+        driver = _driver(events)
+
+        driver._handle_message(_ams_report("4", "27.5", [_tray(0)], msg=0))
+        driver._handle_message(_ams_report("5", "28.1", [_tray(0)]))
+        assert len(events) == 1
+
+        driver._handle_message(_ams_report("5", "28.1", [_tray(0, remain=79)]))
+        driver._handle_message(_ams_report("5", "28.1", [_tray(0, remain=79), _tray(1, "PETG")]))
+        assert len(events) == 3
+        # The emitted state carries the humidity of its report
+        assert events[-1]["ams_units"][0]["slots"][1]["meta"]["humidity"] == "5"
+
+    def test_irrelevant_reports_are_skipped_unparsed(self):
+        events: list[dict] = []
+        driver = _driver(events)
+
+        driver._handle_message(_report({"command": "push_status", "wifi_signal": "-50dBm"}))
+        driver._handle_message(SimpleNamespace(payload=b'{"info": {"command": "get_version"}}'))
+        driver._handle_message(SimpleNamespace(payload=b"not json"))
+        assert driver.reports_skipped == 3
+
+        driver._handle_message(_report({"command": "push_status", "mc_percent": 42, "nozzle_temper": 219.5}))
+        assert driver.reports_skipped == 3
+        assert driver._print_state == {"mc_percent": 42, "nozzle_temper": 219.5}
+        assert events == []
+
+
+class TestBambuPrinterState:
+    def test_deltas_merge_onto_the_full_report(self):
+        events: list[dict] = []
+        driver = _driver(events)
+
+        # Deltas before the first full report don't emit a partial AMS state
+        driver._handle_message(_report({"msg": 1, "ams": {"ams": [{"id": "0", "tray": [{"id": "1", "remain": 50}]}]}}))
+        assert events == []
+
+        driver._handle_message(_ams_report("4", "27.5", [_tray(0), _tray(1, "PETG")], msg=0))
+        driver._handle_message(_report({"msg": 1, "mc_percent": 10, "nozzle_temper": 220.0}))
+        driver._handle_message(_report({"msg": 1, "ams": {"ams": [{"id": "0", "tray": [{"id": "1", "remain": 42}]}]}}))
+        driver._handle_message(_report({"msg": 1, "mc_percent": 11}))
+
+        assert len(events) == 2
+        slots = events[-1]["ams_units"][0]["slots"]
+        assert [slot["slot_no"] for slot in slots] == [1, 2]
+        assert slots[1]["meta"]["material"] == "PETG"
+        assert slots[1]["meta"]["remain_percent"] == 42
+        assert slots[1]["rfid_uid"] == "TAG10000000000000"
+        assert driver._print_state == {"mc_percent": 11, "nozzle_temper": 220.0}
+
+    def test_empty_tray_and_full_report_replace_state(self):
+        events: list[dict] = []
+        driver = _driver(events)
+        driver._handle_message(_ams_report("4", "27.5", [_tray(0), _tray(1)], msg=0))
+
+        # Spool pulled from tray 1: the delta carries the tray id only
+        driver._handle_message(_report({"msg": 1, "ams": {"ams": [{"id": "0", "tray": [{"id": "1"}]}]}}))
+        assert events[-1]["ams_units"][0]["slots"][1] == {"slot_no": 2, "present": False}
+
+        # A full report without unit 1 drops it
+        driver._state.apply({"msg": 1, "ams": {"ams": [{"id": "1", "tray": [_tray(0)]}]}})
+        driver._handle_message(_ams_report("4", "27.5", [_tray(0)], msg=0))
+        assert [unit["ams_unit_no"] for unit in events[-1]["ams_units"]] == [0]
+        assert len(events[-1]["ams_units"][0]["slots"]) == 1
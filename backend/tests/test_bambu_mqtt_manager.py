@@ -0,0 +1,144 @@
+import asyncio
+import threading
+import pytest
+
+import paho.mqtt.client as mqtt
+
+from app.plugins.bambu.mqtt_manager import MqttConnectionManager
+
+
+def _packet(packet_type: int, body: bytes) -> bytes:
+    length = len(body)
+    encoded = bytearray()
+    while True:
+        byte, length = length % 128, length // 128
+        encoded.append(byte | (0x80 if length else 0))
+        if not length:
+            break
+    return bytes([packet_type]) + bytes(encoded) + body
+
+
+class FakeBroker:
+    """Just enough MQTT 3.1.1 to connect, subscribe, ping and receive a publish."""
+
+    def __init__(self):
+        self.writers: list[asyncio.StreamWriter] = []
+        self.connects = 0
+        self.subscribed = asyncio.Event()
+
+    async def start(self) -> int:
+        self.server = await asyncio.start_server(self._serve, "127.0.0.1", 0)
+        return self.server.sockets[0].getsockname()[1]
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.writers.append(writer)
+        try:
+            while True:
+                header = (await reader.readexactly(1))[0]
+                length, shift = 0, 0
+                while True:
+                    byte = (await reader.readexactly(1))[0]
+                    length += (byte & 0x7F) << shift
+                    shift += 7
+                    if not byte & 0x80:
+                        break
+                body = await reader.readexactly(length)
+                if header == 0x10:
+                    self.connects += 1
+                    writer.write(b"\x20\x02\x00\x00")
+                elif header == 0x82:
+                    writer.write(_packet(0x90, body[:2] + b"\x00"))
+                    self.subscribed.set()
+                elif header == 0xC0:
+                    writer.write(b"\xd0\x00")
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+
+    def publish(self, topic: str, payload: bytes) -> None:
+        data = _packet(0x30, len(topic).to_bytes(2, "big") + topic.encode() + payload)
+        for writer in self.writers:
+            writer.write(data)
+
+    def drop_clients(self) -> None:
+        for writer in self.writers:
+            writer.close()
+        self.writers = []
+        self.subscribed.clear()
+
+    async def close(self) -> None:
+        self.drop_clients()
+        self.server.close()
+        await self.server.wait_closed()
+
+
+@pytest.fixture
+async def broker():
+    broker = FakeBroker()
+    broker.port = await broker.start()
+    yield broker
+    await broker.close()
+
+
+def _client_factory(received: list[tuple[int, bytes]]):
+    def create_client() -> mqtt.Client:
+        client = mqtt.Client(callback_api_version=mqtt.CallbackAPIVersion.VERSION2, protocol=mqtt.MQTTv311)
+        client.on_connect = lambda c, ud, flags, rc, props=None: c.subscribe("device/report")
+        client.on_message = lambda c, ud, msg: received.append((threading.get_ident(), msg.payload))
+        return client
+
+    return create_client
+
+
+async def _wait_for(condition, timeout: float = 5.0) -> None:
+    for _ in range(int(timeout / 0.02)):
+        if condition():
+            return
+        await asyncio.sleep(0.02)
+    raise AssertionError("condition not met")
+
+
+def _non_executor_threads() -> int:
+    return sum(1 for thread in threading.enumerate() if not thread.name.startswith("asyncio_"))
+
+
+class TestMqttConnectionManager:
+    @pytest.mark.asyncio
+    async def test_clients_run_on_the_event_loop(self, broker):
+        manager = MqttConnectionManager()
+        threads_before = _non_executor_threads()
+        received: list[tuple[int, bytes]] = []
+
+        connections = [
+            manager.connect(f"printer {n}", _client_factory(received), "127.0.0.1", broker.port, 60, 0.1)
+            for n in range(5)
+        ]
+        await _wait_for(lambda: broker.connects == 5 and len(broker.writers) == 5)
+        await asyncio.wait_for(broker.subscribed.wait(), 5)
+        await asyncio.sleep(0.1)
+        broker.publish("device/report", b'{"print": {}}')
+        await _wait_for(lambda: len(received) == 5)
+
+        # No thread per printer, messages are handled on the loop thread
+        assert _non_executor_threads() == threads_before
+        assert {thread for thread, _payload in received} == {threading.get_ident()}
+
+        for connection in connections:
+            await manager.disconnect(connection)
+        assert manager._misc_task is None
+
+    @pytest.mark.asyncio
+    async def test_reconnects_after_connection_loss(self, broker):
+        manager = MqttConnectionManager()
+        received: list[tuple[int, bytes]] = []
+        connection = manager.connect("printer 1", _client_factory(received), "127.0.0.1", broker.port, 60, 0.1)
+        await asyncio.wait_for(broker.subscribed.wait(), 5)
+
+        broker.drop_clients()
+        await _wait_for(lambda: broker.connects == 2)
+        await asyncio.wait_for(broker.subscribed.wait(), 5)
+        broker.publish("device/report", b"after reconnect")
+        await _wait_for(lambda: received)
+
+        assert received[0][1] == b"after reconnect"
+        await manager.disconnect(connection)
@@ -0,0 +1,84 @@
+import pytest
+from datetime import date, datetime
+
+from app.api.v1.analytics import _bucket_start, _bucket_starts
+from app.models import Location, SpoolConsumptionDaily
+from app.models.consumption import NO_LOCATION
+from app.services.consumption_rollup_service import ConsumptionRollupService
+from app.services.spool_service import SpoolService
+from sqlalchemy import select
+
+
+@pytest.fixture
+async def test_spool(make_spool):
+    return await make_spool(initial_total_weight_g=1250.0, remaining_weight_g=1000.0)
+
+
+async def _rollup_rows(db_session):
+    result = await db_session.execute(
+        select(SpoolConsumptionDaily).order_by(SpoolConsumptionDaily.day)
+    )
+    return [(r.day, r.filament_id, r.location_id, round(r.consumed_g, 2), r.event_count) for r in result.scalars().all()]
+
+
+class TestConsumptionRollup:
+    @pytest.mark.asyncio
+    async def test_events_maintain_rollup(self, db_session, test_spool):
+        service = SpoolService(db_session)
+        spool = await service.get_spool(test_spool.id)
+
+        await service.record_consumption(spool, 100.0, datetime(2026, 3, 1, 10))
+        await service.record_consumption(spool, 50.0, datetime(2026, 3, 1, 18))
+        await service.record_measurement(spool, 1000.0, datetime(2026, 3, 2, 9))
+        # A heavier reading (e.g. re-spooled) must not count as negative consumption
+        await service.record_measurement(spool, 1100.0, datetime(2026, 3, 3, 9))
+
+        rows = await _rollup_rows(db_session)
+        assert rows == [
+            (date(2026, 3, 1), spool.filament_id, NO_LOCATION, 150.0, 2),
+            (date(2026, 3, 2), spool.filament_id, NO_LOCATION, 100.0, 1),
+        ]
+
+    @pytest.mark.asyncio
+    async def test_backfill_matches_incremental(self, db_session, test_spool):
+        service = SpoolService(db_session)
+        spool = await service.get_spool(test_spool.id)
+
+        await service.record_consumption(spool, 100.0, datetime(2026, 3, 1, 10))
+        await service.record_measurement(spool, 1000.0, datetime(2026, 3, 2, 9))
+        await service.record_adjustment(spool, "relative", datetime(2026, 3, 2, 10), delta_weight_g=20.0)
+        await service.record_consumption(spool, 30.0, datetime(2026, 3, 4, 10))
+        incremental = await _rollup_rows(db_session)
+
+        stats = await ConsumptionRollupService(db_session).backfill()
+
+        assert stats["rows_written"] == 3
+        assert await _rollup_rows(db_session) == incremental
+
+
+    @pytest.mark.asyncio
+    async def test_deleted_location_folds_into_no_location(self, db_session, test_spool):
+        location = Location(name="Rollup Shelf")
+        db_session.add(location)
+        await db_session.commit()
+        rollup = ConsumptionRollupService(db_session)
+        filament_id = test_spool.filament_id
+
+        await rollup.add(date(2026, 3, 1), filament_id, None, 10.0)
+        await rollup.add(date(2026, 3, 1), filament_id, None, 5.0)
+        await rollup.add(date(2026, 3, 1), filament_id, location.id, 20.0)
+        await rollup.fold_location(location.id)
+        await db_session.commit()
+
+        assert await _rollup_rows(db_session) == [(date(2026, 3, 1), filament_id, NO_LOCATION, 35.0, 3)]
+
+
+class TestConsumptionBuckets:
+    def test_week_and_month_bucket_start(self):
+        assert _bucket_start(date(2026, 3, 5), "week") == date(2026, 3, 2)
+        assert _bucket_start(date(2026, 3, 5), "month") == date(2026, 3, 1)
+        assert _bucket_start(date(2026, 3, 5), "day") == date(2026, 3, 5)
+
+    def test_month_buckets_cover_range(self):
+        starts = _bucket_starts(date(2026, 1, 15), date(2026, 4, 2), "month")
+        assert starts == [date(2026, 1, 1), date(2026, 2, 1), date(2026, 3, 1), date(2026, 4, 1)]
@@ -0,0 +1,134 @@
+import asyncio
+import os
+import pytest
+from typing import Any
+
+from app.plugins.base import BaseDriver
+from app.plugins.driver_host import DriverHost, RemoteDriver, _Worker
+from app.plugins.telemetry import driver_telemetry
+
+
+class EchoDriver(BaseDriver):
+    """Imported by the worker process; reports its pid and echoes commands."""
+
+    driver_key = "echo"
+
+    async def start(self) -> None:
+        self._running = True
+        self.telemetry.record_connect()
+        self.emit({"event_type": "hello", "pid": os.getpid()})
+
+    async def stop(self) -> None:
+        self._running = False
+
+    def health(self) -> dict[str, Any]:
+        return {"status": "ok", "pid": os.getpid()}
+
+    async def send_command(self, command: dict[str, Any]) -> bool:
+        self.telemetry.record_message(0.001)
+        return command.get("command") == "ping"
+
+
+class FlakyDriver(BaseDriver):
+    """Fails its first (slow) start, like a printer that is not reachable yet."""
+
+    driver_key = "flaky"
+    starts = 0
+
+    async def start(self) -> None:
+        type(self).starts += 1
+        await asyncio.sleep(0.05)
+        if type(self).starts == 1:
+            raise ConnectionError("printer unreachable")
+
+    async def stop(self) -> None:
+        pass
+
+    def health(self) -> dict[str, Any]:
+        return {"status": "ok"}
+
+    async def send_command(self, command: dict[str, Any]) -> bool:
+        return False
+
+
+class _Pipe:
+    def __init__(self):
+        self.sent: list[tuple] = []
+
+    def send(self, message: tuple) -> None:
+        self.sent.append(message)
+
+
+async def _wait_for(condition, timeout: float = 10.0) -> None:
+    for _ in range(int(timeout / 0.05)):
+        if condition():
+            return
+        await asyncio.sleep(0.05)
+    raise AssertionError("condition not met")
+
+
+@pytest.fixture
+async def host():
+    exited: list[int] = []
+    host = DriverHost(1, exited.extend)
+    host.exited_printers = exited
+    yield host
+    await host.close()
+
+
+def _remote(host: DriverHost, printer_id: int, events: list[dict]) -> RemoteDriver:
+    return RemoteDriver(
+        printer_id=printer_id,
+        config={},
+        emitter=events.append,
+        driver_class=EchoDriver,
+        host=host,
+    )
+
+
+class TestDriverHost:
+    @pytest.mark.asyncio
+    async def test_driver_runs_in_worker_process(self, host):
+        events: list[dict] = []
+        driver_telemetry.discard(901)
+        driver = _remote(host, 901, events)
+
+        await asyncio.wait_for(driver.start(), 30)
+        await _wait_for(lambda: events)
+
+        worker_pid = host.workers[0].process.pid
+        assert worker_pid != os.getpid()
+        assert events == [{"event_type": "hello", "pid": worker_pid}]
+        assert driver.health()["pid"] == worker_pid
+        assert driver.health()["running"] is True
+
+        assert await driver.send_command({"command": "ping"}) is True
+        assert await driver.send_command({"command": "other"}) is False
+        await _wait_for(lambda: driver_telemetry.get(901).messages == 2)
+        assert driver_telemetry.get(901).connects == 1
+
+        await driver.stop()
+        assert host.workers[0].drivers == {}
+
+    @pytest.mark.asyncio
+    async def test_exited_worker_reports_its_printers(self, host):
+        driver = _remote(host, 902, [])
+        await asyncio.wait_for(driver.start(), 30)
+
+        host.workers[0].process.kill()
+        await _wait_for(lambda: host.exited_printers)
+
+        assert host.exited_printers == [902]
+        assert driver.health()["status"] == "error"
+
+    @pytest.mark.asyncio
+    async def test_stop_during_failed_start_does_not_cancel_the_next_start(self):
+        worker = _Worker(_Pipe())
+        start = asyncio.create_task(worker._start(1, __name__, "FlakyDriver", {}))
+        await asyncio.sleep(0.01)
+        await worker._stop(1)
+        with pytest.raises(ConnectionError):
+            await start
+
+        await worker._start(1, __name__, "FlakyDriver", {})
+        assert 1 in worker.drivers
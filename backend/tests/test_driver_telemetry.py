@@ -0,0 +1,66 @@
+import asyncio
+import pytest
+
+from app.models import Printer
+from app.plugins import manager as manager_module
+from app.plugins.manager import EventEmitter, PluginManager
+from app.plugins.telemetry import SAMPLE_SIZE, DriverTelemetry, driver_telemetry, render_prometheus
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+
+@pytest.fixture
+def manager(db_engine, monkeypatch):
+    monkeypatch.setattr(manager_module, "async_session_maker", async_sessionmaker(db_engine, expire_on_commit=False))
+    monkeypatch.setattr(manager_module.settings, "printer_event_batch_delay_ms", 20)
+    return PluginManager()
+
+
+class TestDriverTelemetry:
+    def test_samples_stay_bounded(self):
+        telemetry = DriverTelemetry(1, "bambu")
+        for n in range(SAMPLE_SIZE * 3):
+            telemetry.record_message(parse_seconds=n / 1000)
+        telemetry.record_connect()
+        telemetry.record_connect()
+
+        snapshot = telemetry.snapshot()
+        assert len(telemetry._message_times) == SAMPLE_SIZE
+        assert len(telemetry._parse_seconds.values) == SAMPLE_SIZE
+        assert snapshot["messages"] == SAMPLE_SIZE * 3
+        assert snapshot["parse_seconds"]["count"] == SAMPLE_SIZE * 3
+        # Quantiles only cover the retained samples
+        assert snapshot["parse_seconds"]["p50"] >= SAMPLE_SIZE * 2 / 1000
+        assert snapshot["reconnects"] == 1
+        assert snapshot["message_rate"] > 0
+        assert snapshot["last_message_age_s"] is not None
+
+    def test_prometheus_text(self):
+        telemetry = DriverTelemetry(7, "klipper")
+        telemetry.record_message(parse_seconds=0.002)
+        text = render_prometheus({7: telemetry.snapshot()}, {7: 3})
+
+        assert "# TYPE propus_driver_messages_total counter" in text
+        assert 'propus_driver_messages_total{printer_id="7",driver="klipper"} 1' in text
+        assert 'propus_driver_parse_seconds{printer_id="7",driver="klipper",quantile="0.5"} 0.002' in text
+        assert 'propus_driver_parse_seconds_count{printer_id="7",driver="klipper"} 1' in text
+        assert 'propus_printer_event_queue_depth{printer_id="7"} 3' in text
+        # No persisted events yet, so no latency quantiles
+        assert 'propus_driver_persist_latency_seconds{' not in text
+
+    @pytest.mark.asyncio
+    async def test_emit_to_persist_latency(self, db_session, manager):
+        printer = Printer(name="Telemetry printer", driver_key="dummy")
+        db_session.add(printer)
+        await db_session.commit()
+        driver_telemetry.discard(printer.id)
+
+        emitter = EventEmitter(printer.id, manager._create_event_handler(printer.id))
+        emitter.emit({"event_type": "spool_removed", "slot": {"slot_no": 1}})
+        await asyncio.wait_for(manager.event_queues[printer.id].join(), 2)
+
+        snapshot = driver_telemetry.get(printer.id).snapshot()
+        assert snapshot["emitted"] == 1
+        assert snapshot["persisted"] == 1
+        assert snapshot["persist_latency_seconds"]["p50"] > 0
+        assert f'propus_driver_events_persisted_total{{printer_id="{printer.id}",driver=""}} 1' in manager.render_metrics()
+        await manager.stop_all()
@@ -0,0 +1,182 @@
+import pytest
+from datetime import datetime
+
+from app.api.v1.spools import list_spool_events
+from app.api.v1.system import killswitch
+from app.core.config import settings
+from app.core.security import Principal
+from app.models import (
+    EventArchiveSegment,
+    SpoolArchiveState,
+    SpoolConsumptionDaily,
+    SpoolEvent,
+)
+from app.services.consumption_rollup_service import ConsumptionRollupService
+from app.services.event_archive_service import EventArchiveService, archive_cutoff
+from app.services.remaining_weight_rebuild_service import rebuild_remaining_weights
+from app.services.spool_service import SpoolService
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+NOW = datetime(2026, 10, 19, 12)
+
+
+@pytest.fixture
+async def spool(db_session, make_spool):
+    spool = await make_spool(initial_total_weight_g=1250.0, remaining_weight_g=1000.0)
+
+    service = SpoolService(db_session)
+    await service.record_measurement(spool, 1150.0, datetime(2026, 1, 10, 10))
+    await service.record_consumption(spool, 100.0, datetime(2026, 2, 1, 10))
+    await service.record_consumption(spool, 50.0, datetime(2026, 10, 1, 10))
+    await service.record_consumption(spool, 25.0, datetime(2026, 10, 2, 10))
+    return spool
+
+
+@pytest.fixture(autouse=True)
+def archive_path(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "event_archive_dir", str(tmp_path))
+    return tmp_path
+
+
+async def _archive(db_session):
+    return await EventArchiveService(db_session).archive(180, now=NOW)
+
+
+class TestEventArchive:
+    def test_minimum_age(self):
+        with pytest.raises(ValueError):
+            archive_cutoff(30, NOW)
+        assert archive_cutoff(180, NOW) == datetime(2026, 4, 22)
+
+    @pytest.mark.asyncio
+    async def test_archive_moves_old_events(self, db_session, spool, archive_path):
+        spool_result, slot_result = await _archive(db_session)
+
+        assert spool_result.events_archived == 2
+        assert spool_result.segments == 1
+        assert slot_result.events_archived == 0
+
+        live = await db_session.execute(
+            select(func.count()).select_from(SpoolEvent).where(SpoolEvent.spool_id == spool.id)
+        )
+        assert live.scalar() == 2
+
+        segment = (await db_session.execute(select(EventArchiveSegment))).scalar_one()
+        assert (archive_path / segment.file_name).exists()
+
+        state = await db_session.get(SpoolArchiveState, spool.id)
+        assert state.remaining_weight_g == 800.0
+        assert state.rollup_remaining_g == 800.0
+        assert state.event_count == 2
+
+        # A second run finds nothing new
+        spool_result, _ = await _archive(db_session)
+        assert spool_result.events_archived == 0
+
+    @pytest.mark.asyncio
+    async def test_rebuild_continues_from_archive_state(self, db_session, db_engine, spool, archive_path):
+        service = SpoolService(db_session)
+        assert await service.rebuild_remaining_weight(spool) == 725.0
+
+        await _archive(db_session)
+        assert await service.rebuild_remaining_weight(spool) == 725.0
+
+        spool.remaining_weight_g = 1.0
+        await db_session.commit()
+        await rebuild_remaining_weights(async_sessionmaker(db_engine, expire_on_commit=False))
+        await db_session.refresh(spool)
+        assert spool.remaining_weight_g == 725.0
+
+    @pytest.mark.asyncio
+    async def test_backdated_event_replays_archive(self, db_session, db_engine, spool, archive_path):
+        await _archive(db_session)
+
+        # Inserted after archival, but dated before the first archived measurement
+        db_session.add(SpoolEvent(
+            spool_id=spool.id,
+            event_type="manual_adjust",
+            event_at=datetime(2026, 1, 20, 10),
+            measured_weight_g=1050.0,
+            meta={"adjustment_type": "absolute"},
+        ))
+        await db_session.commit()
+
+        service = SpoolService(db_session)
+        assert await service.rebuild_remaining_weight(spool) == 625.0
+
+        spool.remaining_weight_g = 1.0
+        await db_session.commit()
+        await rebuild_remaining_weights(async_sessionmaker(db_engine, expire_on_commit=False))
+        await db_session.refresh(spool)
+        assert spool.remaining_weight_g == 625.0
+
+    @pytest.mark.asyncio
+    async def test_tara_change_replays_archive(self, db_session, spool, archive_path):
+        await _archive(db_session)
+
+        spool.empty_spool_weight_g = 200.0
+        await db_session.commit()
+
+        assert await SpoolService(db_session).rebuild_remaining_weight(spool) == 775.0
+
+    @pytest.mark.asyncio
+    async def test_rollup_backfill_keeps_archived_days(self, db_session, spool, archive_path):
+        await ConsumptionRollupService(db_session).backfill()
+        before = (await db_session.execute(
+            select(SpoolConsumptionDaily.day, SpoolConsumptionDaily.consumed_g).order_by(SpoolConsumptionDaily.day)
+        )).all()
+
+        await _archive(db_session)
+        await ConsumptionRollupService(db_session).backfill()
+        after = (await db_session.execute(
+            select(SpoolConsumptionDaily.day, SpoolConsumptionDaily.consumed_g).order_by(SpoolConsumptionDaily.day)
+        )).all()
+
+        assert after == before
+        assert [consumed for _, consumed in after] == [100.0, 100.0, 50.0, 25.0]
+
+    @pytest.mark.asyncio
+    async def test_event_list_pages_into_archive(self, db_session, spool, archive_path):
+        await _archive(db_session)
+
+        first = await list_spool_events(spool.id, db_session, None, page=1, page_size=3)
+        assert first.total == 4
+        assert [e.event_type for e in first.items] == ["print_consumption", "print_consumption", "print_consumption"]
+        assert first.items[2].event_at == datetime(2026, 2, 1, 10)
+
+        second = await list_spool_events(spool.id, db_session, None, page=2, page_size=3)
+        assert [e.event_type for e in second.items] == ["measurement"]
+        assert second.items[0].measured_weight_g == 1150.0
+
+    @pytest.mark.asyncio
+    async def test_event_list_merges_overlapping_segments(self, db_session, spool, archive_path):
+        await _archive(db_session)
+        # Backdated into the range of the first segment, archived by a later run
+        db_session.add(SpoolEvent(
+            spool_id=spool.id,
+            event_type="manual_adjust",
+            event_at=datetime(2026, 1, 20, 10),
+            measured_weight_g=1050.0,
+            meta={"adjustment_type": "absolute"},
+        ))
+        await db_session.commit()
+        await _archive(db_session)
+
+        first = await list_spool_events(spool.id, db_session, None, page=1, page_size=4)
+        second = await list_spool_events(spool.id, db_session, None, page=2, page_size=4)
+        event_ats = [e.event_at for e in first.items + second.items]
+        assert first.total == 5
+        assert event_ats == sorted(event_ats, reverse=True)
+        assert event_ats[3] == datetime(2026, 1, 20, 10)
+
+    @pytest.mark.asyncio
+    async def test_killswitch_removes_segment_files(self, db_session, spool, archive_path):
+        await _archive(db_session)
+        assert any(archive_path.iterdir())
+
+        principal = Principal(auth_type="session", user_id=1, is_superadmin=True)
+        response = await killswitch(db_session, principal)
+
+        assert response.deleted["event_archive_segments"] == 1
+        assert list(archive_path.iterdir()) == []
@@ -0,0 +1,80 @@
+import pytest
+from datetime import datetime
+
+from app.models import Printer
+from app.plugins.manager import PluginManager
+from app.services.ams_slots_service import AmsSlotsService
+from app.services.printer_event_bus import RESYNC, Subscription, printer_event_bus
+from app.services.printer_state_projection import printer_state_projection
+from app.services.spool_service import SpoolService
+
+
+@pytest.fixture
+def subscription():
+    subscription = printer_event_bus.subscribe()
+    yield subscription
+    printer_event_bus.unsubscribe(subscription)
+
+
+def _drain(subscription: Subscription) -> list[dict]:
+    messages = []
+    while not subscription.queue.empty():
+        messages.append(subscription.queue.get_nowait())
+    return messages
+
+
+class _Driver:
+    def __init__(self, print_state):
+        self.print_state = print_state
+
+    def health(self):
+        return {"print_state": dict(self.print_state)}
+
+
+class TestPrinterEventBus:
+    def test_slow_subscriber_gets_resync(self):
+        subscription = Subscription(maxsize=2)
+        for n in range(3):
+            subscription.push({"type": "slot", "n": n})
+
+        assert _drain(subscription) == [RESYNC]
+        assert subscription.resyncs == 1
+
+    @pytest.mark.asyncio
+    async def test_slot_and_spool_changes_are_published_on_commit(self, db_session, make_spool, subscription):
+        printer = Printer(name="Push Printer", driver_key="bambu")
+        db_session.add(printer)
+        await db_session.commit()
+        spool = await make_spool(remaining_weight_g=500.0)
+        await printer_state_projection.load(db_session)
+        _drain(subscription)
+
+        report = [{"ams_unit_no": 0, "slots_total": 1, "slots": [{"slot_no": 1, "present": True, "meta": {"material": "PLA"}}]}]
+        await AmsSlotsService(db_session).apply_ams_state(printer.id, report, datetime(2026, 3, 1, 10))
+        slot_messages = [m for m in _drain(subscription) if m["type"] == "slot"]
+        assert [(m["printer_id"], m["ams_unit_no"], m["slot_no"], m["present"]) for m in slot_messages] == [
+            (printer.id, 0, 1, True)
+        ]
+
+        await SpoolService(db_session).record_consumption(spool, 20.0, datetime(2026, 3, 1, 11))
+        assert _drain(subscription) == [{
+            "type": "spool",
+            "spool_id": spool.id,
+            "event_type": "print_consumption",
+            "remaining_weight_g": 480.0,
+        }]
+
+    def test_print_state_diffs(self, subscription):
+        manager = PluginManager()
+        driver = _Driver({"gcode_state": "RUNNING", "mc_percent": 10})
+        manager.drivers[3] = driver
+
+        manager.publish_print_state_changes()
+        driver.print_state["mc_percent"] = 11
+        manager.publish_print_state_changes()
+        manager.publish_print_state_changes()
+
+        assert [m["changes"] for m in _drain(subscription)] == [
+            {"gcode_state": "RUNNING", "mc_percent": 10},
+            {"mc_percent": 11},
+        ]
@@ -0,0 +1,114 @@
+import asyncio
+import pytest
+
+from app.models import Printer, PrinterSlotAssignment, PrinterSlotEvent
+from app.plugins import manager as manager_module
+from app.plugins.manager import PluginManager, PrinterEventQueue
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+
+def _event(event_type: str, n: int) -> dict:
+    return {"event_type": event_type, "n": n}
+
+
+def _ams_state(humidity: int) -> dict:
+    return {
+        "event_type": "ams_state",
+        "event_at": "2026-03-01T10:00:00",
+        "ams_units": [{
+            "ams_unit_no": 0,
+            "slots_total": 4,
+            "slots": [{"slot_no": 1, "present": True, "rfid_uid": "TAG-1", "meta": {"humidity": humidity}}],
+        }],
+    }
+
+
+@pytest.fixture
+async def printers(db_session):
+    printers = [Printer(name=f"Printer {i}", driver_key="dummy") for i in range(2)]
+    db_session.add_all(printers)
+    await db_session.commit()
+    return printers
+
+
+@pytest.fixture
+def manager(db_engine, monkeypatch):
+    monkeypatch.setattr(manager_module, "async_session_maker", async_sessionmaker(db_engine, expire_on_commit=False))
+    monkeypatch.setattr(manager_module.settings, "printer_event_batch_delay_ms", 20)
+    return PluginManager()
+
+
+async def _join(manager):
+    for queue in manager.event_queues.values():
+        await asyncio.wait_for(queue.join(), 2)
+
+
+class TestPrinterEventQueue:
+    def test_newer_ams_state_supersedes_queued_one(self):
+        queue = PrinterEventQueue(1, 10, asyncio.Event())
+        queue.put(_event("ams_state", 1))
+        queue.put(_event("spool_removed", 2))
+        queue.put(_event("ams_state", 3))
+
+        assert [e["n"] for e in queue._events] == [2, 3]
+        assert queue.stats() == {"depth": 2, "received": 3, "processed": 0, "dropped": 0, "superseded": 1}
+
+    def test_full_queue_drops_oldest(self):
+        queue = PrinterEventQueue(1, 2, asyncio.Event())
+        for n in range(3):
+            queue.put(_event("spool_inserted", n))
+
+        assert [e["n"] for e in queue._events] == [1, 2]
+        assert queue.dropped == 1
+
+
+class TestEventWriter:
+    @pytest.mark.asyncio
+    async def test_events_of_a_printer_are_applied_in_order(self, manager, monkeypatch):
+        handled: list[tuple[int, int]] = []
+
+        async def apply(service, printer_id, event):
+            handled.append((printer_id, event["n"]))
+            return []
+
+        monkeypatch.setattr(manager, "_apply_event", apply)
+
+        emit = manager._create_event_handler(7)
+        for n in range(3):
+            emit(_event("spool_inserted", n))
+        manager._create_event_handler(8)(_event("spool_inserted", 0))
+        await _join(manager)
+
+        # Round-robin over printers, in order per printer
+        assert handled == [(7, 0), (8, 0), (7, 1), (7, 2)]
+        assert manager.get_event_queue_stats()[7]["processed"] == 3
+        assert manager.get_event_writer_stats().batches == 1
+        await manager.stop_all()
+
+    @pytest.mark.asyncio
+    async def test_printers_share_one_transaction(self, db_session, manager, printers):
+        for printer in printers:
+            manager._create_event_handler(printer.id)(_ams_state(3))
+        await _join(manager)
+
+        stats = manager.get_event_writer_stats()
+        assert (stats.batches, stats.events, stats.failed_batches) == (1, 2, 0)
+        assert stats.last_batch_ms > 0
+
+        result = await db_session.execute(select(func.count()).select_from(PrinterSlotEvent))
+        assert result.scalar() == 2
+        await manager.stop_all()
+
+    @pytest.mark.asyncio
+    async def test_failing_event_does_not_lose_the_batch(self, db_session, manager, printers):
+        emit = manager._create_event_handler(printers[0].id)
+        emit(_ams_state(3))
+        # slot_no is NOT NULL: this event fails on flush
+        emit({"event_type": "spool_inserted", "slot": {"slot_no": None}, "identifiers": {}})
+        await _join(manager)
+
+        assert manager.get_event_writer_stats().failed_batches == 1
+        result = await db_session.execute(select(func.count()).select_from(PrinterSlotAssignment))
+        assert result.scalar() == 4
+        await manager.stop_all()
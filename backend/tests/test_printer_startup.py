@@ -0,0 +1,87 @@
+import asyncio
+import pytest
+
+from app.models import Printer
+from app.plugins import manager as manager_module
+from app.plugins.dummy.driver import Driver as DummyDriver
+from app.plugins.manager import PluginManager
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+
+class SlowDriver(DummyDriver):
+    """Dummy driver whose start hangs while hang_printers contains its printer."""
+
+    hang_printers: set[int] = set()
+    running = 0
+    max_running = 0
+
+    async def start(self) -> None:
+        SlowDriver.running += 1
+        SlowDriver.max_running = max(SlowDriver.max_running, SlowDriver.running)
+        try:
+            await asyncio.sleep(0.05)
+            if self.printer_id in SlowDriver.hang_printers:
+                await asyncio.sleep(60)
+            await super().start()
+        finally:
+            SlowDriver.running -= 1
+
+
+@pytest.fixture
+async def printers(db_session):
+    printers = [Printer(name=f"Printer {i}", driver_key="slow") for i in range(4)]
+    db_session.add_all(printers)
+    await db_session.commit()
+    return printers
+
+
+@pytest.fixture
+async def manager(db_engine, monkeypatch):
+    monkeypatch.setattr(manager_module, "async_session_maker", async_sessionmaker(db_engine, expire_on_commit=False))
+    monkeypatch.setattr(manager_module.settings, "printer_start_concurrency", 2)
+    monkeypatch.setattr(manager_module.settings, "printer_start_timeout_seconds", 0.3)
+    monkeypatch.setattr(manager_module.settings, "printer_start_retry_seconds", 0.1)
+    monkeypatch.setattr(SlowDriver, "hang_printers", set())
+    monkeypatch.setattr(SlowDriver, "max_running", 0)
+    manager = PluginManager()
+    monkeypatch.setattr(manager, "load_driver", lambda driver_key: SlowDriver)
+    yield manager
+    await manager.stop_all()
+
+
+class TestDriverStartup:
+    @pytest.mark.asyncio
+    async def test_starts_concurrently_and_times_out_slow_driver(self, manager, printers):
+        slow_id = printers[0].id
+        SlowDriver.hang_printers.add(slow_id)
+
+        await manager.start_all()
+        assert manager.get_startup_progress()["state"] == "running"
+        await asyncio.wait_for(manager.wait_started(), 2)
+
+        assert SlowDriver.max_running == 2
+        assert manager.get_startup_progress() == {
+            "state": "done", "total": 4, "started": 3, "failed": 1, "pending": 0,
+        }
+        assert set(manager.drivers) == {p.id for p in printers[1:]}
+        health = manager.get_health()[slow_id]
+        assert health["status"] == "error"
+        assert "timed out" in health["message"]
+        assert slow_id in manager._retry_tasks
+
+    @pytest.mark.asyncio
+    async def test_failed_start_is_retried(self, manager, printers):
+        slow_id = printers[0].id
+        SlowDriver.hang_printers.add(slow_id)
+        await manager.start_all()
+        await asyncio.wait_for(manager.wait_started(), 2)
+
+        SlowDriver.hang_printers.clear()
+        for _ in range(50):
+            if slow_id in manager.drivers:
+                break
+            await asyncio.sleep(0.05)
+
+        assert slow_id in manager.drivers
+        assert manager.get_health()[slow_id]["status"] == "ok"
+        assert slow_id not in manager._retry_tasks
@@ -0,0 +1,82 @@
+import pytest
+from datetime import datetime
+
+from app.api.v1.printers import get_printers_status
+from app.models import Printer, PrinterSlot, PrinterSlotAssignment
+from app.services.ams_slots_service import AmsSlotsService
+from app.services.printer_state_projection import printer_state_projection
+from sqlalchemy import event as sa_event
+from sqlalchemy import select
+
+
+def _ams_report(present: bool) -> list[dict]:
+    slot = {"slot_no": 1, "present": present}
+    if present:
+        slot["meta"] = {"material": "PETG", "color_hex": "FF0000FF", "remain_percent": 80}
+    return [{"ams_unit_no": 0, "slots_total": 4, "slots": [slot]}]
+
+
+@pytest.fixture
+async def printer(db_session):
+    printer = Printer(name="Projection Printer", driver_key="bambu")
+    db_session.add(printer)
+    await db_session.commit()
+    await printer_state_projection.load(db_session)
+    return printer
+
+
+class TestPrinterStateProjection:
+    @pytest.mark.asyncio
+    async def test_follows_ams_state_without_queries(self, db_session, db_engine, printer):
+        await AmsSlotsService(db_session).apply_ams_state(printer.id, _ams_report(True), datetime(2026, 3, 1, 10))
+
+        statements: list[str] = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        sa_event.listen(db_engine.sync_engine, "before_cursor_execute", record)
+        try:
+            status = await get_printers_status(principal=None)
+        finally:
+            sa_event.remove(db_engine.sync_engine, "before_cursor_execute", record)
+
+        assert statements == []
+        [printer_status] = [p for p in status if p["id"] == printer.id]
+        unit = printer_status["ams_units"][0]
+        assert unit["slots_total"] == 4
+        assert unit["slots"][0] == {
+            "slot_no": 1,
+            "present": True,
+            "spool_id": None,
+            "material": "PETG",
+            "color_hex": "#FF0000",
+            "designation": None,
+            "remain_percent": 80,
+        }
+        assert [s["present"] for s in unit["slots"][1:]] == [False, False, False]
+
+        await AmsSlotsService(db_session).apply_ams_state(printer.id, _ams_report(False), datetime(2026, 3, 1, 11))
+        status = await get_printers_status(principal=None)
+        [printer_status] = [p for p in status if p["id"] == printer.id]
+        assert printer_status["ams_units"][0]["slots"][0]["present"] is False
+
+    @pytest.mark.asyncio
+    async def test_rolled_back_and_deactivated(self, db_session, printer):
+        printer_id = printer.id
+        await AmsSlotsService(db_session).apply_ams_state(printer_id, _ams_report(False), datetime(2026, 3, 1, 10))
+        result = await db_session.execute(
+            select(PrinterSlotAssignment).join(PrinterSlot).where(PrinterSlot.printer_id == printer_id, PrinterSlot.slot_no == 1)
+        )
+        assignment = result.scalar_one()
+        slot_id = assignment.slot_id
+
+        assignment.present = True
+        await db_session.flush()
+        await db_session.rollback()
+        assert printer_state_projection.get_printer(printer_id).slots_by_id[slot_id].assignment.present is False
+
+        printer = await db_session.get(Printer, printer_id)
+        printer.is_active = False
+        await db_session.commit()
+        assert printer_id not in [p.id for p in await printer_state_projection.active_printers()]
@@ -0,0 +1,124 @@
+import pytest
+from datetime import datetime
+
+from app.models import SpoolEvent
+from app.services.remaining_weight_rebuild_service import RebuildJobManager, rebuild_remaining_weights
+from app.services.spool_service import SpoolService
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+
+@pytest.fixture
+async def filaments(make_filament):
+    with_tara = await make_filament(designation="Tara PLA")
+    without_tara = await make_filament(designation="No Tara PLA", default_spool_weight_g=None)
+    return with_tara, without_tara
+
+
+class TestRemainingWeightRebuild:
+    @pytest.mark.asyncio
+    async def test_fleet_rebuild_after_tara_fix(self, db_session, db_engine, filaments, make_spool):
+        with_tara, without_tara = filaments
+        service = SpoolService(db_session)
+
+        a = await make_spool(with_tara, remaining_weight_g=750.0)
+        await service.record_measurement(a, 1000.0, datetime(2026, 3, 1, 10))
+        await service.record_consumption(a, 100.0, datetime(2026, 3, 2, 10))
+
+        b = await make_spool(with_tara, remaining_weight_g=100.0)
+        await service.record_measurement(b, 300.0, datetime(2026, 3, 1, 10))
+        await service.record_consumption(b, 120.0, datetime(2026, 3, 2, 10))
+
+        c = await make_spool(without_tara, remaining_weight_g=500.0)
+        db_session.add(SpoolEvent(spool_id=c.id, event_type="measurement", event_at=datetime(2026, 3, 1), measured_weight_g=800.0))
+        await db_session.commit()
+
+        # Tara was wrong: the real empty spool weighs 200g
+        with_tara.default_spool_weight_g = 200.0
+        await db_session.commit()
+
+        progress = await rebuild_remaining_weights(async_sessionmaker(db_engine, expire_on_commit=False))
+
+        assert progress.total == 3
+        assert progress.written == 3
+        assert progress.blocked == 1
+        assert progress.emptied == 1
+        assert progress.updated == 2
+
+        await db_session.refresh(a)
+        await db_session.refresh(b)
+        await db_session.refresh(c)
+        assert a.remaining_weight_g == 700.0
+        assert b.remaining_weight_g == 0.0
+        assert c.remaining_weight_g is None
+
+        result = await db_session.execute(
+            select(SpoolEvent.meta).where(SpoolEvent.spool_id == c.id, SpoolEvent.source == "system")
+        )
+        assert result.scalar_one()["warning"] == "tara_missing"
+
+    @pytest.mark.asyncio
+    async def test_matches_single_spool_rebuild(self, db_session, db_engine, filaments, make_spool):
+        with_tara, _ = filaments
+        service = SpoolService(db_session)
+        spool = await make_spool(with_tara, remaining_weight_g=750.0)
+        await service.record_measurement(spool, 900.0, datetime(2026, 3, 1, 10))
+        await service.record_adjustment(spool, "relative", datetime(2026, 3, 2, 10), delta_weight_g=-30.0)
+        await service.record_consumption(spool, 700.0, datetime(2026, 3, 3, 10))
+        spool.remaining_weight_g = 123.0
+        await db_session.commit()
+
+        progress = await rebuild_remaining_weights(
+            async_sessionmaker(db_engine, expire_on_commit=False),
+            spool_ids=[spool.id],
+        )
+        await db_session.refresh(spool)
+        fleet_value = spool.remaining_weight_g
+
+        spool.remaining_weight_g = 123.0
+        await db_session.commit()
+        assert await service.rebuild_remaining_weight(spool) == fleet_value == 0.0
+        assert progress.updated == 1
+
+    @pytest.mark.asyncio
+    async def test_sparse_selection_scans_only_selected_spools(self, db_session, db_engine, filaments, make_spool):
+        with_tara, _ = filaments
+        service = SpoolService(db_session)
+        spools = [await make_spool(with_tara, remaining_weight_g=750.0) for _ in range(3)]
+        for spool in spools:
+            await service.record_measurement(spool, 900.0, datetime(2026, 3, 1, 10))
+        first, middle, last = (spool.id for spool in spools)
+
+        scans: list[tuple[str, tuple]] = []
+
+        def capture(conn, cursor, statement, parameters, context, executemany):
+            if statement.startswith("SELECT spool_events.id"):
+                scans.append((statement, parameters))
+
+        event.listen(db_engine.sync_engine, "before_cursor_execute", capture)
+        try:
+            progress = await rebuild_remaining_weights(
+                async_sessionmaker(db_engine, expire_on_commit=False),
+                spool_ids=[last, first],
+            )
+        finally:
+            event.remove(db_engine.sync_engine, "before_cursor_execute", capture)
+
+        assert progress.total == 2
+        assert progress.events_replayed == 2
+        [(statement, parameters)] = scans
+        assert "BETWEEN" not in statement
+        assert middle not in parameters and {first, last} <= set(parameters)
+
+    @pytest.mark.asyncio
+    async def test_job_manager_runs_one_job_at_a_time(self, db_session, db_engine, filaments):
+        manager = RebuildJobManager()
+        session_maker = async_sessionmaker(db_engine, expire_on_commit=False)
+
+        job = manager.start(session_maker, filament_id=filaments[0].id)
+        with pytest.raises(RuntimeError):
+            manager.start(session_maker)
+
+        await manager._tasks[job.id]
+        assert manager.get(job.id).status == "completed"
+        assert manager.list() == [job]
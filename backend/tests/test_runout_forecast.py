@@ -0,0 +1,89 @@
+import pytest
+from datetime import date, datetime, timedelta
+
+from app.services.runout_forecast_service import REFRESH_INTERVAL, RunoutForecaster, queue_consumption, runout_forecaster
+from app.services.spool_service import SpoolService
+
+
+@pytest.fixture
+async def test_spool(make_spool):
+    return await make_spool(initial_total_weight_g=1250.0, remaining_weight_g=1000.0)
+
+
+class TestRunoutForecaster:
+    @pytest.mark.asyncio
+    async def test_refresh_blends_windows(self, db_session, test_spool):
+        service = SpoolService(db_session)
+        spool = await service.get_spool(test_spool.id)
+
+        # 20 days ago: 140g, last week: 70g (one via measurement)
+        await service.record_consumption(spool, 140.0, datetime(2026, 2, 9, 10))
+        await service.record_consumption(spool, 35.0, datetime(2026, 2, 25, 10))
+        await service.record_measurement(spool, 1040.0, datetime(2026, 2, 27, 10))
+
+        forecaster = RunoutForecaster()
+        await forecaster.refresh(db_session, today=date(2026, 3, 1))
+
+        rate = forecaster.daily_rate(spool.id, today=date(2026, 3, 1))
+        assert rate == pytest.approx(0.5 * 70 / 7 + 0.5 * 210 / 30)
+
+        [forecast] = forecaster.forecast_spools([(spool.id, spool.filament_id, 790.0)], today=date(2026, 3, 1))
+        assert forecast.days_to_empty == pytest.approx(790.0 / rate)
+
+    @pytest.mark.asyncio
+    async def test_record_updates_cache_incrementally(self, db_session, test_spool):
+        runout_forecaster.invalidate()
+        await runout_forecaster.refresh(db_session)
+        today = datetime.utcnow().date()
+        assert runout_forecaster.daily_rate(test_spool.id, today) == 0.0
+
+        service = SpoolService(db_session)
+        spool = await service.get_spool(test_spool.id)
+        await service.record_consumption(spool, 70.0, datetime.combine(today, datetime.min.time()))
+
+        assert runout_forecaster.daily_rate(test_spool.id, today) == pytest.approx(0.5 * 10 + 0.5 * 70 / 30)
+
+    @pytest.mark.asyncio
+    async def test_rolled_back_consumption_never_reaches_the_cache(self, db_session, test_spool):
+        runout_forecaster.invalidate()
+        await runout_forecaster.refresh(db_session)
+        today = datetime.utcnow().date()
+        spool_id = test_spool.id
+
+        queue_consumption(db_session, spool_id, today, 70.0)
+        await db_session.rollback()
+        assert runout_forecaster.daily_rate(spool_id, today) == 0.0
+
+        queue_consumption(db_session, spool_id, today, 70.0)
+        assert runout_forecaster.daily_rate(spool_id, today) == 0.0
+        await db_session.commit()
+        assert runout_forecaster.daily_rate(spool_id, today) > 0.0
+
+    @pytest.mark.asyncio
+    async def test_due_refresh_serves_the_last_snapshot(self, db_session, test_spool):
+        forecaster = RunoutForecaster()
+        today = datetime.utcnow().date()
+        await forecaster.ensure_loaded(db_session)
+        forecaster._daily = {test_spool.id: {today: 70.0}}
+        forecaster._loaded_at = datetime.utcnow() - REFRESH_INTERVAL - timedelta(minutes=1)
+
+        await forecaster.ensure_loaded(db_session)
+        assert forecaster.daily_rate(test_spool.id, today) > 0.0
+
+        await forecaster._refresh_task
+        assert forecaster.daily_rate(test_spool.id, today) == 0.0
+        assert datetime.utcnow() - forecaster._loaded_at < REFRESH_INTERVAL
+
+    def test_filament_forecast_sums_stock_and_rates(self):
+        forecaster = RunoutForecaster()
+        today = date(2026, 3, 1)
+        forecaster._daily = {1: {today: 70.0}, 2: {today: 70.0}}
+        forecaster._loaded_at = datetime.utcnow()
+
+        spools = forecaster.forecast_spools([(1, 5, 100.0), (2, 5, 300.0), (3, 5, 200.0)], today=today)
+        [filament] = forecaster.forecast_filaments(spools)
+
+        assert spools[2].days_to_empty is None
+        assert filament.spool_count == 3
+        assert filament.remaining_weight_g == 600.0
+        assert filament.days_to_empty == pytest.approx(600.0 / filament.daily_rate_g)
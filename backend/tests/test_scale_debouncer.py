@@ -0,0 +1,94 @@
+import asyncio
+import pytest
+from datetime import datetime, timedelta
+
+from app.core.security import Principal
+from app.models import SpoolEvent
+from app.services.scale_debouncer import ScaleDebouncer
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+PRINCIPAL = Principal(auth_type="device", device_id=None, scopes=None)
+
+
+@pytest.fixture
+async def spool(make_spool):
+    return await make_spool(remaining_weight_g=1000.0)
+
+
+async def _measurements(db_session, spool_id):
+    result = await db_session.execute(
+        select(SpoolEvent.measured_weight_g)
+        .where(SpoolEvent.spool_id == spool_id, SpoolEvent.event_type == "measurement")
+    )
+    return result.scalars().all()
+
+
+class TestScaleDebouncer:
+    @pytest.mark.asyncio
+    async def test_stable_readings_write_one_event(self, db_session, db_engine, spool):
+        debouncer = ScaleDebouncer(async_sessionmaker(db_engine, expire_on_commit=False), 60.0, 2.0)
+        start = datetime(2026, 3, 1, 10)
+
+        for i, weight in enumerate([1180.0, 1110.0, 1101.0, 1100.0, 1100.5]):
+            await debouncer.submit(1, spool.id, weight, PRINCIPAL, event_at=start + timedelta(seconds=i))
+
+        assert debouncer.pending_count() == 0
+        assert await _measurements(db_session, spool.id) == [1100.5]
+        await db_session.refresh(spool)
+        assert spool.remaining_weight_g == 850.5
+
+    @pytest.mark.asyncio
+    async def test_quiet_window_flushes_last_reading(self, db_session, db_engine, spool):
+        debouncer = ScaleDebouncer(async_sessionmaker(db_engine, expire_on_commit=False), 0.05, 2.0)
+
+        await debouncer.submit(1, spool.id, 1200.0, PRINCIPAL)
+        await debouncer.submit(1, spool.id, 1150.0, PRINCIPAL)
+        await debouncer.submit(2, spool.id, 1140.0, PRINCIPAL)
+        assert debouncer.pending_count() == 2
+
+        measurements = []
+        for _ in range(50):
+            await asyncio.sleep(0.05)
+            measurements = await _measurements(db_session, spool.id)
+            if len(measurements) == 2:
+                break
+        assert debouncer.pending_count() == 0
+        assert sorted(measurements) == [1140.0, 1150.0]
+
+    @pytest.mark.asyncio
+    async def test_flush_all(self, db_session, db_engine, spool):
+        debouncer = ScaleDebouncer(async_sessionmaker(db_engine, expire_on_commit=False), 60.0, 2.0)
+        await debouncer.submit(1, spool.id, 1200.0, PRINCIPAL)
+
+        await debouncer.flush_all()
+        assert await _measurements(db_session, spool.id) == [1200.0]
+
+    @pytest.mark.asyncio
+    async def test_writes_are_serialized_per_key_only(self, db_engine):
+        debouncer = ScaleDebouncer(async_sessionmaker(db_engine, expire_on_commit=False), 60.0, 2.0)
+        running: list[tuple[int, int]] = []
+        overlaps: list[list[tuple[int, int]]] = []
+
+        async def write(pending) -> None:
+            running.append((pending.device_id, pending.spool_id))
+            overlaps.append(list(running))
+            await asyncio.sleep(0.02)
+            running.remove((pending.device_id, pending.spool_id))
+
+        debouncer._write = write
+        start = datetime(2026, 3, 1, 10)
+        await debouncer.submit(1, 10, 500.0, PRINCIPAL, event_at=start)
+        await debouncer.submit(2, 20, 500.0, PRINCIPAL, event_at=start)
+        first = asyncio.gather(debouncer.flush((1, 10)), debouncer.flush((2, 20)))
+        await asyncio.sleep(0)
+        # A second reading of a key that is still being written waits for it
+        await debouncer.submit(1, 10, 400.0, PRINCIPAL, event_at=start)
+        second = asyncio.ensure_future(debouncer.flush((1, 10)))
+        await debouncer.flush_all()
+        await asyncio.gather(first, second)
+
+        assert len(overlaps) == 3
+        assert max(len(o) for o in overlaps) == 2
+        assert all(o.count((1, 10)) <= 1 for o in overlaps)
+        assert debouncer._locks == {}
@@ -0,0 +1,77 @@
+import pytest
+from datetime import datetime
+
+from app.models import Spool
+from app.services.spool_identifier_index import spool_identifier_index
+from app.services.spool_service import SpoolService
+from sqlalchemy import update
+
+
+@pytest.fixture
+async def spool(db_session, make_filament, make_spool):
+    filament = await make_filament(default_spool_weight_g=None)
+    spool = await make_spool(filament, rfid_uid="TAG-1", external_id="EXT-1")
+    await spool_identifier_index.load(db_session)
+    return spool
+
+
+class TestSpoolIdentifierIndex:
+    @pytest.mark.asyncio
+    async def test_resolves_by_rfid_then_external_id(self, db_session, spool):
+        service = SpoolService(db_session)
+
+        assert (await service.get_spool_by_identifier("TAG-1", None)).id == spool.id
+        assert (await service.get_spool_by_identifier("UNKNOWN", "EXT-1")).id == spool.id
+        assert await service.get_spool_by_identifier("UNKNOWN", None) is None
+        assert await spool_identifier_index.lookup(db_session, "TAG-1", None) == (spool.id, "rfid_uid", "TAG-1")
+
+    @pytest.mark.asyncio
+    async def test_follows_committed_changes(self, db_session, spool):
+        service = SpoolService(db_session)
+
+        spool.rfid_uid = "TAG-2"
+        await db_session.commit()
+        assert await spool_identifier_index.lookup(db_session, "TAG-1", None) is None
+        assert (await service.get_spool_by_identifier("TAG-2", None)).id == spool.id
+
+        spool.deleted_at = datetime.utcnow()
+        await db_session.commit()
+        assert await spool_identifier_index.lookup(db_session, "TAG-2", "EXT-1") is None
+
+    @pytest.mark.asyncio
+    async def test_ignores_rolled_back_changes(self, db_session, spool):
+        spool_id = spool.id
+        spool.rfid_uid = "TAG-2"
+        await db_session.flush()
+        await db_session.rollback()
+
+        assert await spool_identifier_index.lookup(db_session, "TAG-1", None) == (spool_id, "rfid_uid", "TAG-1")
+        assert await spool_identifier_index.lookup(db_session, "TAG-2", None) is None
+
+    @pytest.mark.asyncio
+    async def test_stale_entry_falls_back_to_query(self, db_session, spool):
+        # Changed outside the ORM, the index still points at the old tag
+        await db_session.execute(
+            update(Spool).where(Spool.id == spool.id).values(rfid_uid="TAG-3").execution_options(synchronize_session=False)
+        )
+        await db_session.commit()
+        db_session.expire_all()
+
+        service = SpoolService(db_session)
+        assert await service.get_spool_by_identifier("TAG-1", None) is None
+        assert (await service.get_spool_by_identifier("TAG-3", None)).id == spool.id
+
+    @pytest.mark.asyncio
+    async def test_miss_falls_back_to_query_and_indexes_the_hit(self, db_session, spool):
+        # Written by another process, the index has not seen it yet
+        await db_session.execute(
+            update(Spool).where(Spool.id == spool.id).values(external_id="EXT-9").execution_options(synchronize_session=False)
+        )
+        await db_session.commit()
+        db_session.expire_all()
+
+        assert await spool_identifier_index.lookup(db_session, None, "EXT-9") == (spool.id, "external_id", "EXT-9")
+        assert spool_identifier_index._by_external_id.get("EXT-9") == spool.id
+        assert "EXT-1" not in spool_identifier_index._by_external_id
+        assert (await SpoolService(db_session).get_spool_by_identifier(None, "EXT-9")).id == spool.id
+        assert await spool_identifier_index.lookup(db_session, "UNKNOWN", None) is None
@@ -1,5 +1,5 @@
 import pytest
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 from httpx import AsyncClient
 
 from app.core.security import hash_password, generate_token_secret
@@ -290,3 +290,226 @@ class TestSpoolMove:
         
         await db_session.refresh(test_spool)
         assert test_spool.location_id == location.id
+
+
+class TestBulkStatusChange:
+    @pytest.mark.asyncio
+    async def test_bulk_status_change_writes_one_event_per_spool(
+        self, db_session, test_filament, test_status, monkeypatch
+    ):
+        from app.services import spool_service
+        from app.services.spool_service import SpoolService
+
+        monkeypatch.setattr(spool_service, "BULK_STATUS_CHUNK", 2)
+
+        result = await db_session.execute(select(SpoolStatus).where(SpoolStatus.key == "opened"))
+        opened = result.scalar_one()
+        result = await db_session.execute(select(SpoolStatus).where(SpoolStatus.key == "archived"))
+        archived = result.scalar_one()
+
+        spools = [
+            Spool(filament_id=test_filament.id, status_id=test_status.id),
+            Spool(filament_id=test_filament.id, status_id=opened.id),
+            Spool(filament_id=test_filament.id, status_id=opened.id),
+            Spool(filament_id=test_filament.id, status_id=test_status.id, deleted_at=datetime(2026, 1, 1)),
+        ]
+        db_session.add_all(spools)
+        await db_session.commit()
+        ids = [s.id for s in spools]
+
+        count = await SpoolService(db_session).change_statuses_bulk(
+            spool_ids=[ids[0], ids[1], ids[0], ids[3], 99999, ids[2]],
+            status_key="archived",
+            note="stocktake",
+        )
+        assert count == 3
+
+        result = await db_session.execute(
+            select(Spool.id, Spool.status_id).where(Spool.id.in_(ids)).order_by(Spool.id)
+        )
+        assert dict(result.all()) == {
+            ids[0]: archived.id,
+            ids[1]: archived.id,
+            ids[2]: archived.id,
+            ids[3]: test_status.id,
+        }
+
+        result = await db_session.execute(select(SpoolEvent).order_by(SpoolEvent.id))
+        events = [
+            (e.spool_id, e.event_type, e.from_status_id, e.to_status_id, e.source, e.note)
+            for e in result.scalars().all()
+        ]
+        assert events == [
+            (ids[0], "archived", test_status.id, archived.id, "ui", "stocktake"),
+            (ids[1], "archived", opened.id, archived.id, "ui", "stocktake"),
+            (ids[2], "archived", opened.id, archived.id, "ui", "stocktake"),
+        ]
+
+
+class TestBatchMeasurements:
+    @pytest.mark.asyncio
+    async def test_batch_applies_in_event_order(self, db_session, test_spool):
+        from app.services.spool_service import SpoolService
+
+        test_spool.rfid_uid = "TAG-1"
+        await db_session.commit()
+
+        results = await SpoolService(db_session).record_measurements_batch([
+            {"rfid_uid": "TAG-1", "measured_weight_g": 700.0, "event_at": datetime(2026, 3, 2, 10)},
+            {"rfid_uid": "UNKNOWN", "measured_weight_g": 500.0, "event_at": datetime(2026, 3, 1, 10)},
+            {"spool_id": test_spool.id, "measured_weight_g": 900.0, "event_at": datetime(2026, 3, 1, 10)},
+        ])
+
+        assert [r["status"] for r in results] == ["ok", "not_found", "ok"]
+        assert results[0]["remaining_weight_g"] == 450.0
+        assert results[2]["remaining_weight_g"] == 650.0
+
+        await db_session.refresh(test_spool)
+        assert test_spool.remaining_weight_g == 450.0
+
+        result = await db_session.execute(
+            select(SpoolEvent.measured_weight_g)
+            .where(SpoolEvent.event_type == "measurement")
+            .order_by(SpoolEvent.id)
+        )
+        assert result.scalars().all() == [900.0, 700.0]
+
+    @pytest.mark.asyncio
+    async def test_batch_mixes_aware_naive_and_missing_event_at(self, db_session, test_spool):
+        from app.services.spool_service import SpoolService
+
+        results = await SpoolService(db_session).record_measurements_batch([
+            {"spool_id": test_spool.id, "measured_weight_g": 700.0},
+            {"spool_id": test_spool.id, "measured_weight_g": 800.0,
+             "event_at": datetime(2026, 3, 1, 12, tzinfo=timezone(timedelta(hours=2)))},
+            {"spool_id": test_spool.id, "measured_weight_g": 900.0, "event_at": datetime(2026, 3, 1, 9)},
+        ])
+
+        assert [r["status"] for r in results] == ["ok", "ok", "ok"]
+        result = await db_session.execute(
+            select(SpoolEvent.measured_weight_g, SpoolEvent.event_at)
+            .where(SpoolEvent.event_type == "measurement")
+            .order_by(SpoolEvent.id)
+        )
+        rows = result.all()
+        assert [weight for weight, _ in rows] == [900.0, 800.0, 700.0]
+        assert rows[1][1] == datetime(2026, 3, 1, 10)
+
+
+class TestRebuildCheckpoints:
+    @pytest.mark.asyncio
+    async def test_rebuild_resumes_from_checkpoint(self, db_session, test_spool, monkeypatch):
+        from app.models import SpoolWeightCheckpoint
+        from app.services import spool_service
+        from app.services.spool_service import SpoolService
+
+        monkeypatch.setattr(spool_service, "REBUILD_CHECKPOINT_INTERVAL", 2)
+        service = SpoolService(db_session)
+        spool = await service.get_spool(test_spool.id)
+
+        await service.record_measurement(spool, 1000.0, datetime(2026, 3, 1, 10))
+        for day in range(2, 6):
+            await service.record_consumption(spool, 50.0, datetime(2026, 3, day, 10))
+
+        assert await service.rebuild_remaining_weight(spool) == 550.0
+        result = await db_session.execute(select(SpoolWeightCheckpoint))
+        checkpoint = result.scalars().one()
+        assert checkpoint.events_replayed == 4
+        assert checkpoint.remaining_weight_g == 600.0
+
+        await service.record_consumption(spool, 25.0, datetime(2026, 3, 6, 10))
+        assert await service.rebuild_remaining_weight(spool) == 525.0
+
+    @pytest.mark.asyncio
+    async def test_backdated_event_and_tara_change_invalidate(self, db_session, test_spool, monkeypatch):
+        from app.services import spool_service
+        from app.services.spool_service import SpoolService
+
+        monkeypatch.setattr(spool_service, "REBUILD_CHECKPOINT_INTERVAL", 1)
+        service = SpoolService(db_session)
+        spool = await service.get_spool(test_spool.id)
+
+        await service.record_measurement(spool, 1000.0, datetime(2026, 3, 1, 10))
+        await service.record_consumption(spool, 100.0, datetime(2026, 3, 3, 10))
+        assert await service.rebuild_remaining_weight(spool) == 650.0
+
+        # Backdated reading between the two events replaces the baseline
+        await service.record_measurement(spool, 900.0, datetime(2026, 3, 2, 10))
+        assert await service.rebuild_remaining_weight(spool) == 550.0
+
+        spool.empty_spool_weight_g = 200.0
+        await db_session.commit()
+        assert await service.rebuild_remaining_weight(spool) == 600.0
+
+
+class TestEventFlushBatching:
+    @pytest.mark.asyncio
+    async def test_measurement_flushes_once(self, db_session, test_spool):
+        from sqlalchemy import event as sa_event
+        from app.services.spool_service import SpoolService
+
+        service = SpoolService(db_session)
+        spool = await service.get_spool(test_spool.id)
+
+        flushes: list[int] = []
+
+        def count_flush(session, flush_context, instances):
+            flushes.append(len(session.new))
+
+        sa_event.listen(db_session.sync_session, "before_flush", count_flush)
+        try:
+            # new -> opened: measurement and auto-open event go out with the commit
+            await service.record_measurement(spool, 900.0, datetime(2026, 3, 1, 10))
+            assert flushes == [2]
+
+            # auto-empty references the measurement id: one extra flush
+            flushes.clear()
+            await service.record_measurement(spool, 250.0, datetime(2026, 3, 2, 10))
+            assert flushes == [1, 1]
+        finally:
+            sa_event.remove(db_session.sync_session, "before_flush", count_flush)
+
+        result = await db_session.execute(
+            select(SpoolEvent).where(SpoolEvent.event_type == "empty")
+        )
+        empty_event = result.scalar_one()
+        result = await db_session.execute(
+            select(SpoolEvent.id).where(
+                SpoolEvent.event_type == "measurement", SpoolEvent.measured_weight_g == 250.0
+            )
+        )
+        assert empty_event.meta["trigger_event_id"] == result.scalar_one()
+
+
+class TestAtomicConsumption:
+    @pytest.mark.asyncio
+    async def test_stale_sessions_do_not_lose_updates(self, db_session, db_engine, test_spool):
+        from sqlalchemy.ext.asyncio import async_sessionmaker
+        from app.services.spool_service import SpoolService
+
+        session_maker = async_sessionmaker(db_engine, expire_on_commit=False)
+        async with session_maker() as first_db, session_maker() as second_db:
+            first = SpoolService(first_db)
+            second = SpoolService(second_db)
+            first_spool = await first.get_spool(test_spool.id)
+            second_spool = await second.get_spool(test_spool.id)
+
+            # Both sessions still see 750 g when they consume
+            _, remaining = await first.record_consumption(first_spool, 100.0, datetime(2026, 3, 1, 10))
+            assert remaining == 650.0
+            _, remaining = await second.record_consumption(second_spool, 50.0, datetime(2026, 3, 1, 11))
+            assert remaining == 600.0
+            assert second_spool.remaining_weight_g == 600.0
+
+            event, remaining = await first.record_consumption(first_spool, 700.0, datetime(2026, 3, 1, 12))
+            assert remaining == 0.0
+            assert event.meta == {"clamped_to_zero": True}
+
+        await db_session.refresh(test_spool)
+        assert test_spool.remaining_weight_g == 0.0
+
+        result = await db_session.execute(
+            select(SpoolEvent.event_type).where(SpoolEvent.spool_id == test_spool.id).order_by(SpoolEvent.id)
+        )
+        # Clamped consumption does not mark the spool empty on its own
+        assert "empty" not in result.scalars().all()
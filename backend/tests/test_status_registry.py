@@ -0,0 +1,59 @@
+import pytest
+from datetime import datetime
+
+from app.models import SpoolStatus
+from app.services.spool_service import SpoolService
+from app.services.status_registry import status_registry
+from sqlalchemy import event, select
+
+
+@pytest.fixture
+async def new_spool(make_spool):
+    return await make_spool(status="new", initial_total_weight_g=1250.0, remaining_weight_g=1000.0)
+
+
+class TestStatusRegistry:
+    @pytest.mark.asyncio
+    async def test_lookups_match_table(self, db_session):
+        result = await db_session.execute(select(SpoolStatus))
+        for status in result.scalars().all():
+            assert await status_registry.get_id(db_session, status.key) == status.id
+            assert await status_registry.get_key(db_session, status.id) == status.key
+        assert await status_registry.get_id(db_session, "does-not-exist") is None
+
+    @pytest.mark.asyncio
+    async def test_measurement_does_not_query_statuses(self, db_session, db_engine, new_spool):
+        service = SpoolService(db_session)
+        spool = await service.get_spool(new_spool.id)
+        await status_registry.get_id(db_session, "new")
+
+        statements: list[str] = []
+
+        def capture(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(db_engine.sync_engine, "before_cursor_execute", capture)
+        try:
+            await service.record_measurement(spool, 250.0, datetime(2026, 3, 1, 10))
+        finally:
+            event.remove(db_engine.sync_engine, "before_cursor_execute", capture)
+
+        # new -> opened -> empty without a single lookup on spool_statuses
+        assert spool.status_id == await status_registry.get_id(db_session, "empty")
+        assert not any("FROM spool_statuses" in s for s in statements)
+
+    @pytest.mark.asyncio
+    async def test_invalidated_on_status_edit(self, db_session):
+        assert await status_registry.get_id(db_session, "new") is not None
+
+        status = SpoolStatus(key="reserved", label="Reserved", sort_order=99)
+        db_session.add(status)
+        await db_session.commit()
+        assert status_registry._loaded is False
+
+        assert await status_registry.get_id(db_session, "reserved") == status.id
+
+        status.key = "on_hold"
+        await db_session.commit()
+        assert await status_registry.get_key(db_session, status.id) == "on_hold"
+        assert await status_registry.get_id(db_session, "reserved") is None